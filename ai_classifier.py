@@ -9,11 +9,13 @@ import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
 # Import the refactored components
-from src.ai_classification.core.classifier import AITextClassifier, quick_classify, classify_with_confidence
+from src.ai_classification.core.classifier import (
+    AITextClassifier, quick_classify, classify_with_confidence, get_shared_classifier
+)
 from src.ai_classification.core.config import CATEGORIES
 
 # Make them available at module level for backward compatibility
-__all__ = ['AITextClassifier', 'quick_classify', 'classify_with_confidence', 'CATEGORIES']
+__all__ = ['AITextClassifier', 'quick_classify', 'classify_with_confidence', 'get_shared_classifier', 'CATEGORIES']
 
 if __name__ == "__main__":
     # Quick test
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark di latenza e throughput: backend torch contro backend ONNX Runtime
+"""
+import sys
+import os
+import time
+import random
+import argparse
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import torch
+
+from src.ai_classification.core.model_utils import ModelManager
+from src.ai_classification.data.training_data import ALL_TRAINING_DATA
+
+
+def current_rss_mb() -> float:
+    """RSS corrente del processo in MB (Linux)"""
+    with open("/proc/self/statm") as f:
+        resident_pages = int(f.read().split()[1])
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") / 1024**2
+
+
+def load(backend: str):
+    """Carica un ModelManager su CPU con il backend richiesto e misura il tempo"""
+    manager = ModelManager()
+    manager.device = torch.device("cpu")
+    manager.backend = backend
+    manager.quantization = None
+
+    start = time.perf_counter()
+    manager.load_or_create_model()
+    return manager, time.perf_counter() - start
+
+
+def benchmark(manager, texts: list, batch_sizes: list, repeats: int) -> dict:
+    """Latenza del singolo testo e throughput per dimensione di batch"""
+    manager.predict_batch(texts[:8])  # Warm-up
+
+    latencies = []
+    for text in texts[:50]:
+        start = time.perf_counter()
+        manager.predict(text)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    throughput = {}
+    for batch_size in batch_sizes:
+        start = time.perf_counter()
+        for _ in range(repeats):
+            manager.predict_batch(texts, batch_size=batch_size)
+        throughput[batch_size] = len(texts) * repeats / (time.perf_counter() - start)
+
+    return {
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "throughput": throughput,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Confronto backend torch / ONNX Runtime")
+    parser.add_argument("--size", type=int, default=256, help="Numero di testi")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    texts = [rng.choice(ALL_TRAINING_DATA)[0] for _ in range(args.size)]
+
+    results = {}
+    for backend in ("torch", "onnx"):
+        rss_before = current_rss_mb()
+        manager, load_seconds = load(backend)
+        rss_after = current_rss_mb()
+        results[backend] = benchmark(manager, texts, args.batch_sizes, args.repeats)
+        results[backend]["load_s"] = load_seconds
+        results[backend]["rss_delta_mb"] = rss_after - rss_before
+        del manager
+
+    print(f"{'backend':8}{'avvio s':>9}{'+RSS MB':>9}{'p50 ms':>9}{'p95 ms':>9}"
+          + "".join(f"{'bs=' + str(b):>10}" for b in args.batch_sizes))
+    for backend, r in results.items():
+        print(f"{backend:8}{r['load_s']:>9.2f}{r['rss_delta_mb']:>9.0f}{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}"
+              + "".join(f"{r['throughput'][b]:>10.1f}" for b in args.batch_sizes))
+    print("(throughput in testi/s, +RSS = memoria residente aggiunta dal caricamento)")
+
+
+if __name__ == "__main__":
+    main()
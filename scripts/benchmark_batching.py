@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark del batching per lunghezza su un dataset con testi di lunghezza mista
+"""
+import sys
+import os
+import time
+import random
+import argparse
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.ai_classification.core.model_utils import ModelManager
+from src.ai_classification.core.batching import plan_token_batches, padded_token_count
+from src.ai_classification.core.config import INFERENCE_CONFIG, MODEL_CONFIG
+from src.ai_classification.data.training_data import ALL_TRAINING_DATA
+
+
+def build_mixed_dataset(size: int, long_ratio: float, seed: int = 42) -> list:
+    """Costruisce un dataset di titoli brevi con una quota di testi lunghi (articoli)"""
+    rng = random.Random(seed)
+    texts = [text for text, _ in ALL_TRAINING_DATA]
+    dataset = []
+    for _ in range(size):
+        if rng.random() < long_ratio:
+            # Articolo lungo ottenuto concatenando molti esempi
+            dataset.append(". ".join(rng.choices(texts, k=40)))
+        else:
+            dataset.append(rng.choice(texts))
+    return dataset
+
+
+def run(manager: ModelManager, texts: list, length_bucketing: bool, repeats: int) -> dict:
+    """Esegue predict_batch e misura throughput in testi e token al secondo"""
+    encodings = manager.tokenizer(texts, truncation=True, max_length=MODEL_CONFIG["max_length"])
+    lengths = [len(ids) for ids in encodings["input_ids"]]
+    batches = plan_token_batches(
+        lengths,
+        max_tokens=INFERENCE_CONFIG["max_tokens_per_batch"] if length_bucketing else None,
+        max_batch_size=INFERENCE_CONFIG["batch_size"]
+    )
+
+    # Warm-up
+    manager.predict_batch(texts[:INFERENCE_CONFIG["batch_size"]], length_bucketing=length_bucketing)
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        manager.predict_batch(texts, length_bucketing=length_bucketing)
+    elapsed = (time.perf_counter() - start) / repeats
+
+    real_tokens = sum(lengths)
+    padded_tokens = padded_token_count(lengths, batches)
+    return {
+        "seconds": elapsed,
+        "texts_per_sec": len(texts) / elapsed,
+        "tokens_per_sec": real_tokens / elapsed,
+        "batches": len(batches),
+        "padding_overhead": padded_tokens / real_tokens - 1,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del batching per lunghezza")
+    parser.add_argument("--size", type=int, default=500, help="Numero di testi nel dataset")
+    parser.add_argument("--long-ratio", type=float, default=0.05, help="Quota di testi lunghi")
+    parser.add_argument("--repeats", type=int, default=3, help="Ripetizioni per configurazione")
+    args = parser.parse_args()
+
+    manager = ModelManager()
+    manager.load_or_create_model()
+    texts = build_mixed_dataset(args.size, args.long_ratio)
+
+    print(f"📊 Dataset: {len(texts)} testi ({args.long_ratio:.0%} lunghi), device {manager.device}")
+    print("-" * 60)
+    for label, bucketing in (("Batch fissi", False), ("Bucketing per lunghezza", True)):
+        stats = run(manager, texts, bucketing, args.repeats)
+        print(f"{label:25}: {stats['tokens_per_sec']:8.0f} token/s  "
+              f"{stats['texts_per_sec']:7.1f} testi/s  "
+              f"{stats['batches']:4d} batch  padding +{stats['padding_overhead']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
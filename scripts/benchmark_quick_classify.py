@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Latenza di chiamate ripetute a quick_classify: un classificatore nuovo per
+chiamata (comportamento precedente) contro il classificatore condiviso
+
+Senza registro ogni chiamata ricarica tokenizer e pesi; con il registro
+solo la prima. La cache delle predizioni è disattivata e i testi sono
+diversi a ogni chiamata, così si misura sempre un forward pass.
+"""
+import sys
+import os
+import time
+import argparse
+import statistics
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.ai_classification.core.config import CACHE_CONFIG, MODEL_PATHS
+
+CACHE_CONFIG["enabled"] = False
+
+from src.ai_classification.core.classifier import AITextClassifier, quick_classify
+
+TESTI = [
+    "Reti neurali per il riconoscimento di immagini",
+    "Ricetta tradizionale della pizza margherita",
+    "Veicoli a guida autonoma con sensori LiDAR",
+    "Modelli generativi per la creazione di testo",
+    "Analisi predittiva su dataset aziendali",
+]
+
+
+def misura(classifica, chiamate: int) -> list:
+    """Millisecondi di ciascuna chiamata"""
+    tempi = []
+    for i in range(chiamate):
+        testo = f"{TESTI[i % len(TESTI)]} ({i})"
+        start = time.perf_counter()
+        classifica(testo)
+        tempi.append((time.perf_counter() - start) * 1000)
+    return tempi
+
+
+def riepilogo(nome: str, tempi: list):
+    successive = tempi[1:] or tempi
+    print(f"{nome:<28}{tempi[0]:>10.1f}{statistics.median(successive):>14.1f}"
+          f"{sum(tempi):>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark di quick_classify con e senza registro")
+    parser.add_argument("--chiamate", type=int, default=20)
+    args = parser.parse_args()
+
+    if not os.path.exists(MODEL_PATHS["trained_model"]):
+        print("Modello addestrato non trovato: eseguire prima il training")
+        sys.exit(1)
+
+    prima = misura(lambda testo: AITextClassifier(auto_train=False).classify(testo), args.chiamate)
+    dopo = misura(quick_classify, args.chiamate)
+
+    print(f"\n{args.chiamate} chiamate")
+    print(f"{'':<28}{'prima ms':>10}{'mediana ms':>14}{'totale ms':>12}")
+    riepilogo("classificatore per chiamata", prima)
+    riepilogo("registro condiviso", dopo)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Suite di benchmark dell'inferenza con baseline JSON e controllo delle regressioni
+
+Misura, senza server esterni né rete:
+- model_manager: avvio a freddo, latenza di un singolo testo, throughput per
+  dimensione del batch e per mix di testi brevi/lunghi, memoria di picco
+- app: lo stesso percorso attraverso l'app FastAPI in-process (TestClient),
+  con avvio del server, /predict e /predict_batch; la cache delle predizioni
+  è disattivata per misurare sempre il modello
+
+I tempi di avvio a freddo sono misurati dall'avvio dell'interprete.
+
+Ogni sezione gira in un processo Python nuovo, così avvio a freddo e memoria
+di picco non dipendono dalle sezioni precedenti.
+
+Esempi:
+    python scripts/benchmark_suite.py run --output benchmarks/baseline.json
+    python scripts/benchmark_suite.py compare benchmarks/baseline.json --threshold 0.15
+    python scripts/benchmark_suite.py compare benchmarks/baseline.json --results attuale.json
+"""
+import time
+
+AVVIO = time.perf_counter()
+
+import sys
+import os
+import json
+import argparse
+import subprocess
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.ai_classification.utils.benchmark import (
+    DEFAULT_THRESHOLD, RESULTS_FORMAT, build_texts, compare_results, environment_differences,
+    format_comparison, latency_stats, load_results, metric, peak_rss_mb, save_results, time_call
+)
+
+SEZIONI = ("model_manager", "app")
+
+# Quota di testi lunghi per ciascun mix
+MIX = {"brevi": 0.0, "misti": 0.1, "lunghi": 1.0}
+
+IMPOSTAZIONI_DEFAULT = {
+    "batch_sizes": [1, 8, 32, 128],
+    "latency_iterations": 200,
+    "mix_size": 256,
+    "repeats": 5,
+    "threads": None,
+    "seed": 42,
+}
+
+IMPOSTAZIONI_RAPIDE = {
+    "batch_sizes": [1, 8, 32],
+    "latency_iterations": 30,
+    "mix_size": 64,
+    "repeats": 3,
+}
+
+TESTO_RISCALDAMENTO = "Reti neurali per il riconoscimento di immagini"
+
+
+def prepara_processo(impostazioni: dict):
+    """Numero di thread torch fisso per risultati confrontabili"""
+    import torch
+    if impostazioni["threads"]:
+        torch.set_num_threads(impostazioni["threads"])
+
+
+def sezione_model_manager(impostazioni: dict) -> dict:
+    """Benchmark di ModelManager (eseguito nel processo figlio)"""
+    from src.ai_classification.core.model_utils import ModelManager
+    from src.ai_classification.core.config import MODEL_CONFIG
+    import_s = time.perf_counter() - AVVIO
+
+    prepara_processo(impostazioni)
+    manager = ModelManager()
+    manager.load_or_create_model()
+    caricamento_s = time.perf_counter() - AVVIO
+    manager.predict(TESTO_RISCALDAMENTO)
+    prima_predizione_s = time.perf_counter() - AVVIO
+
+    metriche = {
+        "model_manager.cold_start.import_s": metric(import_s, "s", "lower"),
+        "model_manager.cold_start.load_s": metric(caricamento_s, "s", "lower"),
+        "model_manager.cold_start.first_prediction_s": metric(prima_predizione_s, "s", "lower"),
+    }
+
+    # Latenza di un singolo testo, una chiamata per testo
+    testi = build_texts(impostazioni["latency_iterations"], seed=impostazioni["seed"])
+    for testo in testi[:10]:
+        manager.predict(testo)
+    durate = []
+    for testo in testi:
+        start = time.perf_counter()
+        manager.predict(testo)
+        durate.append(time.perf_counter() - start)
+    for nome, valore in latency_stats(durate).items():
+        metriche[f"model_manager.single_text.latency_{nome}_ms"] = metric(valore, "ms", "lower")
+
+    # Throughput per dimensione del batch (un forward pass per chiamata)
+    brevi = build_texts(max(impostazioni["batch_sizes"]), seed=impostazioni["seed"])
+    for dimensione in impostazioni["batch_sizes"]:
+        batch = brevi[:dimensione]
+        manager.predict_batch(batch, batch_size=dimensione)
+        secondi = time_call(lambda: manager.predict_batch(batch, batch_size=dimensione), impostazioni["repeats"])
+        metriche[f"model_manager.batch_{dimensione}.texts_per_s"] = metric(dimensione / secondi, "testi/s", "higher")
+
+    # Mix di testi brevi e lunghi con il batching di produzione (INFERENCE_CONFIG)
+    for nome, quota_lunghi in MIX.items():
+        testi = build_texts(impostazioni["mix_size"], quota_lunghi, seed=impostazioni["seed"])
+        token = sum(
+            len(ids) for ids in
+            manager.tokenizer(testi, truncation=True, max_length=MODEL_CONFIG["max_length"])["input_ids"]
+        )
+        manager.predict_batch(testi[:32])
+        secondi = time_call(lambda: manager.predict_batch(testi), impostazioni["repeats"])
+        metriche[f"model_manager.mix_{nome}.texts_per_s"] = metric(len(testi) / secondi, "testi/s", "higher")
+        metriche[f"model_manager.mix_{nome}.tokens_per_s"] = metric(token / secondi, "token/s", "higher")
+
+    rss = peak_rss_mb()
+    if rss is not None:
+        metriche["model_manager.peak_rss_mb"] = metric(rss, "MB", "lower")
+    return {"metrics": metriche, "model_version": manager.model_version}
+
+
+def sezione_app(impostazioni: dict) -> dict:
+    """Benchmark dell'app FastAPI in-process (eseguito nel processo figlio)"""
+    from fastapi.testclient import TestClient
+    from src.ai_classification.core.config import CACHE_CONFIG
+    # Senza cache ogni richiesta ripetuta passa comunque dal modello
+    CACHE_CONFIG["enabled"] = False
+    from src.ai_classification.api import server
+    import_s = time.perf_counter() - AVVIO
+
+    prepara_processo(impostazioni)
+    with TestClient(server.app) as client:
+        avvio_s = time.perf_counter() - AVVIO
+
+        def post(percorso, corpo):
+            risposta = client.post(percorso, json=corpo)
+            risposta.raise_for_status()
+            return risposta
+
+        post("/predict", {"text": TESTO_RISCALDAMENTO})
+        prima_risposta_s = time.perf_counter() - AVVIO
+        metriche = {
+            "app.cold_start.import_s": metric(import_s, "s", "lower"),
+            "app.cold_start.startup_s": metric(avvio_s, "s", "lower"),
+            "app.cold_start.first_response_s": metric(prima_risposta_s, "s", "lower"),
+        }
+
+        testi = build_texts(impostazioni["latency_iterations"], seed=impostazioni["seed"])
+        for testo in testi[:10]:
+            post("/predict", {"text": testo})
+        durate = []
+        for testo in testi:
+            start = time.perf_counter()
+            post("/predict", {"text": testo})
+            durate.append(time.perf_counter() - start)
+        for nome, valore in latency_stats(durate).items():
+            metriche[f"app.predict.latency_{nome}_ms"] = metric(valore, "ms", "lower")
+
+        brevi = build_texts(max(impostazioni["batch_sizes"]), seed=impostazioni["seed"])
+        for dimensione in impostazioni["batch_sizes"]:
+            batch = brevi[:dimensione]
+            post("/predict_batch", batch)
+            secondi = time_call(lambda: post("/predict_batch", batch), impostazioni["repeats"])
+            metriche[f"app.predict_batch_{dimensione}.texts_per_s"] = metric(dimensione / secondi, "testi/s", "higher")
+
+        testi = build_texts(impostazioni["mix_size"], MIX["misti"], seed=impostazioni["seed"])
+        secondi = time_call(lambda: post("/predict_batch", testi), impostazioni["repeats"])
+        metriche["app.predict_batch_misti.texts_per_s"] = metric(len(testi) / secondi, "testi/s", "higher")
+
+        versione = client.get("/health").json()["model_version"]
+
+    rss = peak_rss_mb()
+    if rss is not None:
+        metriche["app.peak_rss_mb"] = metric(rss, "MB", "lower")
+    return {"metrics": metriche, "model_version": versione}
+
+
+def esegui_sezione(sezione: str, impostazioni: dict) -> dict:
+    """Esegue una sezione in un processo figlio e ne restituisce i risultati"""
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--sezione", sezione, "--impostazioni", json.dumps(impostazioni)],
+        stdout=subprocess.PIPE, text=True, check=True
+    ).stdout
+    # L'ultima riga è il JSON dei risultati, le precedenti sono i log del caricamento
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def esegui_suite(sezioni, impostazioni: dict) -> dict:
+    """Esegue le sezioni richieste e raccoglie metriche e contesto"""
+    from src.ai_classification.core.config import INFERENCE_CONFIG, SERVER_CONFIG
+    from src.ai_classification.utils.benchmark import environment_info
+
+    risultati = {
+        "format": RESULTS_FORMAT,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": environment_info(),
+        "settings": {**impostazioni, "sections": list(sezioni)},
+        "config": {
+            "inference": {k: INFERENCE_CONFIG[k] for k in
+                          ("backend", "quantization", "use_snapshot", "length_bucketing",
+                           "batch_size", "max_tokens_per_batch")},
+            "server": {k: SERVER_CONFIG[k] for k in
+                       ("microbatch_enabled", "microbatch_max_size", "microbatch_max_wait_ms",
+                        "inference_threads", "worker_processes")},
+        },
+        "model_versions": {},
+        "metrics": {},
+    }
+    if impostazioni["threads"]:
+        risultati["environment"]["torch_threads"] = impostazioni["threads"]
+
+    for sezione in sezioni:
+        print(f"⏱️  Sezione {sezione}...", file=sys.stderr)
+        esito = esegui_sezione(sezione, impostazioni)
+        risultati["metrics"].update(esito["metrics"])
+        risultati["model_versions"][sezione] = esito["model_version"]
+    return risultati
+
+
+def stampa_risultati(risultati: dict):
+    for nome, valore in sorted(risultati["metrics"].items()):
+        print(f"{nome:50} {valore['value']:>12.3f} {valore['unit']}")
+
+
+def impostazioni_da_argomenti(args) -> dict:
+    impostazioni = dict(IMPOSTAZIONI_DEFAULT)
+    if args.rapida:
+        impostazioni.update(IMPOSTAZIONI_RAPIDE)
+    for chiave in IMPOSTAZIONI_DEFAULT:
+        valore = getattr(args, chiave, None)
+        if valore is not None:
+            impostazioni[chiave] = valore
+    return impostazioni
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suite di benchmark dell'inferenza con baseline JSON")
+    parser.add_argument("--sezione", choices=SEZIONI, help=argparse.SUPPRESS)
+    parser.add_argument("--impostazioni", help=argparse.SUPPRESS)
+    sub = parser.add_subparsers(dest="comando")
+
+    def opzioni_esecuzione(p):
+        p.add_argument("--sections", nargs="+", choices=SEZIONI, default=list(SEZIONI))
+        p.add_argument("--batch-sizes", dest="batch_sizes", type=int, nargs="+")
+        p.add_argument("--latency-iterations", dest="latency_iterations", type=int)
+        p.add_argument("--mix-size", dest="mix_size", type=int)
+        p.add_argument("--repeats", type=int, help="Ripetizioni per misura di throughput (si usa la mediana)")
+        p.add_argument("--threads", type=int, help="Thread torch (default: quelli di torch)")
+        p.add_argument("--seed", type=int)
+        p.add_argument("--rapida", action="store_true", help="Meno iterazioni (verifica veloce)")
+
+    run = sub.add_parser("run", help="Esegue la suite e salva i risultati")
+    opzioni_esecuzione(run)
+    run.add_argument("--output", default="benchmarks/baseline.json", help="File JSON dei risultati")
+
+    compare = sub.add_parser("compare", help="Confronta con una baseline e segnala le regressioni")
+    compare.add_argument("baseline", help="File JSON della baseline")
+    compare.add_argument("--results", help="Risultati già salvati (default: esegue la suite "
+                                           "con le impostazioni della baseline)")
+    compare.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                         help="Peggioramento relativo oltre cui una metrica è una regressione")
+    compare.add_argument("--output", help="Salva anche i risultati della nuova esecuzione")
+    args = parser.parse_args()
+
+    if args.sezione:
+        impostazioni = json.loads(args.impostazioni)
+        funzione = sezione_model_manager if args.sezione == "model_manager" else sezione_app
+        print(json.dumps(funzione(impostazioni)))
+        return
+
+    if args.comando == "run":
+        risultati = esegui_suite(args.sections, impostazioni_da_argomenti(args))
+        save_results(risultati, args.output)
+        stampa_risultati(risultati)
+        print(f"💾 Risultati salvati in {args.output}")
+        return
+
+    if args.comando == "compare":
+        baseline = load_results(args.baseline)
+        if args.results:
+            attuali = load_results(args.results)
+        else:
+            impostazioni = dict(baseline["settings"])
+            attuali = esegui_suite(impostazioni.pop("sections"), impostazioni)
+            if args.output:
+                save_results(attuali, args.output)
+
+        for differenza in environment_differences(baseline, attuali):
+            print(f"⚠️  Ambiente diverso dalla baseline: {differenza}")
+        if baseline["settings"] != attuali["settings"]:
+            print("⚠️  Impostazioni diverse dalla baseline: i valori potrebbero non essere confrontabili")
+
+        righe = compare_results(baseline, attuali, args.threshold)
+        print(format_comparison(righe))
+        regressioni = [riga["name"] for riga in righe if riga["status"] == "regression"]
+        if regressioni:
+            print(f"❌ {len(regressioni)} regressioni oltre il {args.threshold:.0%}: {', '.join(regressioni)}")
+            sys.exit(1)
+        print(f"✅ Nessuna regressione oltre il {args.threshold:.0%}")
+        return
+
+    parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark delle risposte di /predict_batch: JSON contro formato binario compatto
+
+Richiede il server in esecuzione. Per ogni dimensione di batch misura i byte
+della risposta, la latenza end-to-end e il tempo di decodifica lato client.
+La cache delle predizioni del server rende trascurabile l'inferenza dopo la
+prima ripetizione, così il confronto isola il costo di serializzazione.
+"""
+import sys
+import os
+import json
+import time
+import random
+import argparse
+import statistics
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.ai_classification.api.client import AIClassificationClient
+from src.ai_classification.api.wire import BINARY_MEDIA_TYPE, decode_batch
+from src.ai_classification.data.training_data import ALL_TRAINING_DATA
+
+
+def measure(client, texts: list, binary: bool, repeats: int) -> dict:
+    """Byte, latenza mediana e decodifica mediana per un formato di risposta"""
+    headers = {"Accept": BINARY_MEDIA_TYPE} if binary else {}
+    latencies, decode_times = [], []
+    size = 0
+
+    for _ in range(repeats + 1):
+        start = time.perf_counter()
+        response = client.session.post(f"{client.base_url}/predict_batch", json=texts,
+                                       headers=headers, timeout=client.timeout)
+        response.raise_for_status()
+        received = time.perf_counter()
+        if binary:
+            decode_batch(response.content)
+        else:
+            json.loads(response.content)
+        done = time.perf_counter()
+
+        latencies.append((done - start) * 1000)
+        decode_times.append((done - received) * 1000)
+        size = len(response.content)
+
+    # La prima richiesta esegue l'inferenza e riempie la cache: esclusa
+    return {
+        "bytes": size,
+        "latency_ms": statistics.median(latencies[1:]),
+        "decode_ms": statistics.median(decode_times[1:]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Confronto JSON / binario per /predict_batch")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[32, 256, 1024])
+    parser.add_argument("--repeats", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    testi = [testo for testo, _ in ALL_TRAINING_DATA]
+
+    with AIClassificationClient(args.url) as client:
+        if not client.is_server_healthy():
+            print("Server non disponibile. Avvialo con: python server.py")
+            sys.exit(1)
+
+        print(f"{'batch':>6}{'JSON B':>10}{'bin B':>9}{'JSON ms':>9}{'bin ms':>8}"
+              f"{'dec JSON ms':>13}{'dec bin ms':>12}")
+        for batch_size in args.batch_sizes:
+            texts = [rng.choice(testi) for _ in range(batch_size)]
+            as_json = measure(client, texts, binary=False, repeats=args.repeats)
+            as_binary = measure(client, texts, binary=True, repeats=args.repeats)
+            print(f"{batch_size:>6}{as_json['bytes']:>10}{as_binary['bytes']:>9}"
+                  f"{as_json['latency_ms']:>9.1f}{as_binary['latency_ms']:>8.1f}"
+                  f"{as_json['decode_ms']:>13.2f}{as_binary['decode_ms']:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
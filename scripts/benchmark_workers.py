@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark del throughput di inferenza al crescere del numero di processi worker
+"""
+import sys
+import os
+import time
+import random
+import argparse
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.ai_classification.core.model_utils import ModelManager
+from src.ai_classification.core.worker_pool import InferenceWorkerPool
+from src.ai_classification.data.training_data import ALL_TRAINING_DATA
+
+
+def measure(predictor, texts: list, repeats: int) -> float:
+    """Restituisce i testi classificati al secondo"""
+    # Warm-up
+    predictor.predict_batch(texts[:32])
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        predictor.predict_batch(texts)
+    elapsed = time.perf_counter() - start
+    return len(texts) * repeats / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput al variare dei processi worker")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count()],
+                        help="Numero di worker da provare")
+    parser.add_argument("--size", type=int, default=512, help="Numero di testi per batch")
+    parser.add_argument("--repeats", type=int, default=3, help="Ripetizioni per configurazione")
+    args = parser.parse_args()
+
+    # Il modello viene caricato una volta sola e condiviso da tutti i pool
+    manager = ModelManager()
+    manager.load_or_create_model()
+
+    rng = random.Random(42)
+    texts = [rng.choice(ALL_TRAINING_DATA)[0] for _ in range(args.size)]
+
+    print(f"📊 {len(texts)} testi, {os.cpu_count()} CPU disponibili")
+    print("-" * 60)
+
+    # I pool vengono creati prima di eseguire inferenza nel processo padre
+    results = {}
+    for num_workers in sorted(set(args.workers)):
+        pool = InferenceWorkerPool(manager, num_workers)
+        try:
+            results[num_workers] = measure(pool, texts, args.repeats)
+        finally:
+            pool.close()
+
+    # Riferimento: inferenza nel solo processo corrente
+    baseline = measure(manager, texts, args.repeats)
+    print(f"{'in-process':>11}: {baseline:8.1f} testi/s")
+    for num_workers, throughput in results.items():
+        print(f"{num_workers:>4} worker: {throughput:8.1f} testi/s  (x{throughput / baseline:.2f})")
+
+
+if __name__ == "__main__":
+    main()
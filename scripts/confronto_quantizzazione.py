@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Confronto accuratezza/latenza tra modello fp32 e modello quantizzato int8 su CPU
+"""
+import sys
+import os
+import time
+
+# Add project root and scripts directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import torch
+
+from src.ai_classification.core.model_utils import ModelManager
+from src.ai_classification.core.config import MODEL_PATHS
+from valutazione_modello import CASI_DI_TEST
+
+
+def carica_modello(quantization):
+    """Carica il modello addestrato su CPU con la quantizzazione richiesta"""
+    manager = ModelManager()
+    manager.device = torch.device("cpu")
+    manager.quantization = quantization
+
+    start = time.perf_counter()
+    manager.load_or_create_model()
+    return manager, time.perf_counter() - start
+
+
+def valuta(manager, ripetizioni=5):
+    """Misura accuratezza e latenza sui casi di test di valutazione_modello.py"""
+    testi = [testo for testo, _, _ in CASI_DI_TEST]
+    attese = np.array([categoria for _, categoria, _ in CASI_DI_TEST])
+
+    # Warm-up
+    manager.predict_batch(testi)
+
+    latenze = []
+    for testo in testi:
+        start = time.perf_counter()
+        for _ in range(ripetizioni):
+            manager.predict(testo)
+        latenze.append((time.perf_counter() - start) / ripetizioni * 1000)
+
+    start = time.perf_counter()
+    for _ in range(ripetizioni):
+        predette, confidenze = manager.predict_batch(testi)
+    batch_ms = (time.perf_counter() - start) / ripetizioni * 1000
+
+    return {
+        "predette": predette,
+        "accuratezza": float(np.mean(predette == attese)),
+        "confidenza_media": float(np.mean(confidenze)),
+        "latenza_p50_ms": float(np.percentile(latenze, 50)),
+        "latenza_p95_ms": float(np.percentile(latenze, 95)),
+        "batch_ms": batch_ms,
+    }
+
+
+def dimensione_mb(path):
+    """Dimensione su disco di un file o di una directory in MB"""
+    if os.path.isfile(path):
+        return os.path.getsize(path) / 1024**2
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, files in os.walk(path) for name in files
+    ) / 1024**2
+
+
+def main():
+    if not os.path.exists(MODEL_PATHS["trained_model"]):
+        print("❌ Modello addestrato non trovato. Eseguire prima il training.")
+        return 1
+
+    print("⚖️  CONFRONTO FP32 vs INT8 (CPU)")
+    print("=" * 60)
+
+    fp32, avvio_fp32 = carica_modello(None)
+    int8, avvio_int8 = carica_modello("dynamic_int8")
+
+    risultati = {"fp32": valuta(fp32), "int8": valuta(int8)}
+    avvii = {"fp32": avvio_fp32, "int8": avvio_int8}
+    dimensioni = {
+        "fp32": dimensione_mb(MODEL_PATHS["trained_model"]),
+        "int8": dimensione_mb(MODEL_PATHS["quantized_model"]),
+    }
+
+    print(f"{'':6}{'accuratezza':>12}{'p50 ms':>9}{'p95 ms':>9}{'batch ms':>10}{'avvio s':>9}{'MB':>8}")
+    for nome, r in risultati.items():
+        print(f"{nome:6}{r['accuratezza']:>12.1%}{r['latenza_p50_ms']:>9.1f}"
+              f"{r['latenza_p95_ms']:>9.1f}{r['batch_ms']:>10.1f}{avvii[nome]:>9.2f}{dimensioni[nome]:>8.0f}")
+
+    accordo = np.mean(risultati["fp32"]["predette"] == risultati["int8"]["predette"])
+    speedup = risultati["fp32"]["latenza_p50_ms"] / risultati["int8"]["latenza_p50_ms"]
+    print("-" * 60)
+    print(f"Predizioni identiche fp32/int8: {accordo:.1%}")
+    print(f"Speedup latenza singola (p50): x{speedup:.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
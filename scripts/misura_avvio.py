@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Misura il tempo dall'avvio del processo alla prima predizione
+
+Ogni modalità di caricamento viene eseguita in un processo Python nuovo,
+così il tempo include avvio dell'interprete, import e caricamento del modello.
+"""
+import time
+
+AVVIO = time.perf_counter()
+
+import sys
+import os
+import json
+import argparse
+import subprocess
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MODALITA = {
+    "from_pretrained": {"use_snapshot": False, "backend": "torch"},
+    "snapshot": {"use_snapshot": True, "backend": "torch"},
+    "onnx": {"use_snapshot": False, "backend": "onnx"},
+}
+
+DIPENDENZE_TRAINING = ("datasets", "sklearn", "transformers.trainer")
+
+
+def figlio(modalita: str):
+    """Eseguito nel processo figlio: carica il classificatore e fa una predizione"""
+    from src.ai_classification.core.config import INFERENCE_CONFIG
+    INFERENCE_CONFIG.update(MODALITA[modalita])
+
+    from src.ai_classification.core.classifier import AITextClassifier
+    import_s = time.perf_counter() - AVVIO
+
+    classifier = AITextClassifier(auto_train=False)
+    caricamento_s = time.perf_counter() - AVVIO
+
+    classifier.classify("Reti neurali per il riconoscimento di immagini")
+    prima_predizione_s = time.perf_counter() - AVVIO
+
+    print(json.dumps({
+        "import_s": import_s,
+        "caricamento_s": caricamento_s,
+        "prima_predizione_s": prima_predizione_s,
+        "dipendenze_training": [m for m in DIPENDENZE_TRAINING if m in sys.modules],
+    }))
+
+
+def misura(modalita: str) -> dict:
+    """Avvia un processo figlio e restituisce i tempi misurati"""
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--figlio", modalita],
+        capture_output=True, text=True, check=True
+    ).stdout
+    totale_s = time.perf_counter() - start
+
+    risultato = json.loads(output.strip().splitlines()[-1])
+    risultato["totale_s"] = totale_s
+    return risultato
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo di avvio fino alla prima predizione")
+    parser.add_argument("--modalita", nargs="+", choices=list(MODALITA), default=list(MODALITA))
+    parser.add_argument("--ripetizioni", type=int, default=3)
+    parser.add_argument("--figlio", choices=list(MODALITA), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.figlio:
+        figlio(args.figlio)
+        return
+
+    # Prima esecuzione a vuoto: crea snapshot/export ONNX e scalda la page cache
+    for modalita in args.modalita:
+        misura(modalita)
+
+    print("Tempi in secondi dall'avvio dell'interprete (totale = misurato dal processo padre)")
+    print(f"{'modalità':16}{'import s':>10}{'modello s':>11}{'1a pred. s':>12}{'totale s':>10}  training importato")
+    for modalita in args.modalita:
+        runs = [misura(modalita) for _ in range(args.ripetizioni)]
+        best = min(runs, key=lambda r: r["totale_s"])
+        print(f"{modalita:16}{best['import_s']:>10.2f}{best['caricamento_s']:>11.2f}"
+              f"{best['prima_predizione_s']:>12.2f}{best['totale_s']:>10.2f}  "
+              f"{', '.join(best['dipendenze_training']) or 'no'}")
+
+
+if __name__ == "__main__":
+    main()
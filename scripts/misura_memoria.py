@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Misura la memoria per processo con N repliche che caricano il modello
+
+Ogni replica è un processo indipendente (start method "spawn", come repliche
+del container sullo stesso host). Con i pesi mappati da file le pagine della
+page cache sono condivise: l'RSS di ogni processo le conta per intero, il PSS
+le ripartisce fra i processi e mostra la memoria realmente occupata.
+"""
+import sys
+import os
+import argparse
+import multiprocessing
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def memoria_processo() -> dict:
+    """RSS, PSS e memoria privata del processo corrente in MB (Linux)"""
+    valori = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for riga in f:
+            campo, _, resto = riga.partition(":")
+            if campo in ("Rss", "Pss", "Private_Clean", "Private_Dirty"):
+                valori[campo] = int(resto.split()[0]) / 1024
+    return {
+        "rss": valori["Rss"],
+        "pss": valori["Pss"],
+        "privata": valori["Private_Clean"] + valori["Private_Dirty"],
+    }
+
+
+def replica(mmap_weights, barriera, risultati):
+    """Carica il modello, fa una predizione e misura la memoria con tutte le repliche attive"""
+    from src.ai_classification.core.config import INFERENCE_CONFIG
+    INFERENCE_CONFIG.update({"backend": "torch", "quantization": None,
+                             "use_snapshot": True, "mmap_weights": mmap_weights})
+
+    import torch
+    from src.ai_classification.core.model_utils import ModelManager
+
+    torch.set_num_threads(1)
+    manager = ModelManager()
+    manager.device = torch.device("cpu")
+    manager.load_or_create_model()
+    manager.predict("Reti neurali per il riconoscimento di immagini")
+
+    # Misura quando tutte le repliche hanno caricato il modello
+    barriera.wait()
+    dopo = memoria_processo()
+    risultati.put({"dopo": dopo, "mmap": manager.weights_mmapped})
+    barriera.wait()
+
+
+def misura(num_repliche: int, mmap_weights: bool) -> list:
+    """Avvia le repliche e raccoglie le misure"""
+    context = multiprocessing.get_context("spawn")
+    barriera = context.Barrier(num_repliche)
+    risultati = context.Queue()
+    processi = [
+        context.Process(target=replica, args=(mmap_weights, barriera, risultati))
+        for _ in range(num_repliche)
+    ]
+    for p in processi:
+        p.start()
+    misure = [risultati.get() for _ in processi]
+    for p in processi:
+        p.join()
+    return misure
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memoria per processo con N repliche")
+    parser.add_argument("--repliche", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    print(f"{'pesi':10}{'N':>3}{'RSS/proc MB':>13}{'PSS/proc MB':>13}{'privata/proc MB':>17}{'PSS totale MB':>15}")
+    for mmap_weights in (False, True):
+        for n in args.repliche:
+            misure = misura(n, mmap_weights)
+            etichetta = "mmap" if all(m["mmap"] for m in misure) else "copiati"
+            rss = sum(m["dopo"]["rss"] for m in misure) / n
+            pss = sum(m["dopo"]["pss"] for m in misure) / n
+            privata = sum(m["dopo"]["privata"] for m in misure) / n
+            print(f"{etichetta:10}{n:>3}{rss:>13.0f}{pss:>13.0f}{privata:>17.0f}{pss * n:>15.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Valutazione della cascata a uscita anticipata: tasso di escalation, latenza
+per stadio e accuratezza rispetto al solo modello completo
+
+Se la testa del primo stadio manca (o si passa --addestra) viene addestrata
+con ModelManager.train_cascade su ALL_TRAINING_DATA. Le misure usano i casi
+di test di valutazione_modello.py, a diverse soglie di confidenza.
+"""
+import sys
+import os
+import time
+import argparse
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from src.ai_classification.core.classifier import get_shared_classifier
+from src.ai_classification.core.config import CASCADE_CONFIG, MODEL_PATHS
+from src.ai_classification.data.training_data import ALL_TRAINING_DATA
+from valutazione_modello import CASI_DI_TEST
+
+
+def misura(manager, testi: list, etichette: np.ndarray, ripetizioni: int) -> dict:
+    """Accuratezza e millisecondi per testo di predict_batch"""
+    predette, _ = manager.predict_batch(testi)
+    start = time.perf_counter()
+    for _ in range(ripetizioni):
+        manager.predict_batch(testi)
+    return {
+        "accuratezza": (predette == etichette).mean(),
+        "ms_testo": (time.perf_counter() - start) * 1000 / (len(testi) * ripetizioni),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Valutazione della cascata a uscita anticipata")
+    parser.add_argument("--soglie", type=float, nargs="+", default=[0.7, 0.8, 0.9, 0.95])
+    parser.add_argument("--exit-layer", type=int, default=CASCADE_CONFIG["exit_layer"])
+    parser.add_argument("--addestra", action="store_true", help="Riaddestra la testa del primo stadio")
+    parser.add_argument("--ripetizioni", type=int, default=3)
+    args = parser.parse_args()
+
+    CASCADE_CONFIG["exit_layer"] = args.exit_layer
+    CASCADE_CONFIG["enabled"] = True
+    classifier = get_shared_classifier(auto_train=False)
+    manager = classifier.model_manager
+
+    if manager.cascade is None or args.addestra:
+        if manager.model is None:
+            print("La cascata richiede il backend torch (INFERENCE_CONFIG['backend'])")
+            sys.exit(1)
+        start = time.perf_counter()
+        manager.train_cascade(ALL_TRAINING_DATA)
+        print(f"Testa addestrata in {time.perf_counter() - start:.1f} s "
+              f"({os.path.getsize(MODEL_PATHS['cascade_head']) / 1024:.0f} KB)")
+    cascade = manager.cascade
+
+    testi = [testo for testo, _, _ in CASI_DI_TEST]
+    etichette = np.array([categoria for _, categoria, _ in CASI_DI_TEST])
+
+    manager.cascade = None
+    completo = misura(manager, testi, etichette, args.ripetizioni)
+    print(f"\nModello completo: accuratezza {completo['accuratezza']:.1%}, {completo['ms_testo']:.2f} ms/testo")
+
+    manager.cascade = cascade
+    print(f"\nCascata con uscita dopo il layer {cascade.exit_layer} su {len(testi)} casi di test")
+    print(f"{'soglia':>8}{'escalation':>12}{'accuratezza':>13}{'ms/testo':>10}{'speedup':>9}"
+          f"{'stadio 1 ms':>13}{'stadio 2 ms':>13}")
+    for soglia in args.soglie:
+        cascade.threshold = soglia
+        cascade.reset_stats()
+        risultato = misura(manager, testi, etichette, args.ripetizioni)
+        stats = cascade.get_stats()
+        print(f"{soglia:>8.2f}{stats['escalation_rate']:>12.1%}{risultato['accuratezza']:>13.1%}"
+              f"{risultato['ms_testo']:>10.2f}{completo['ms_testo'] / risultato['ms_testo']:>8.2f}x"
+              f"{stats['early_ms_per_batch']:>13.2f}{stats['full_ms_per_batch']:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
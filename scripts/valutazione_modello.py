@@ -7,65 +7,65 @@ import os
 # Add project root to Python path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from ai_classifier import AITextClassifier
+from ai_classifier import get_shared_classifier
 import numpy as np
 
+# Test set completo con esempi chiari per ogni categoria
+CASI_DI_TEST = [
+    # ALTRO (0)
+    ("Ricetta tradizionale della pizza margherita napoletana", 0, "ALTRO"),
+    ("Risultati campionato di calcio Serie A stagione corrente", 0, "ALTRO"),
+    ("Corso di chitarra classica per principianti", 0, "ALTRO"),
+    ("Vacanze estive nelle isole greche", 0, "ALTRO"),
+    
+    # AI generica (1)
+    ("Algoritmi di machine learning per classificazione", 1, "AI generica"),
+    ("Reti neurali artificiali e deep learning", 1, "AI generica"),
+    ("L'intelligenza artificiale nel futuro", 1, "AI generica"),
+    ("Apprendimento automatico e data mining", 1, "AI generica"),
+    
+    # AI generativa (2)
+    ("ChatGPT genera testi automaticamente", 2, "AI generativa"),
+    ("DALL-E crea immagini da descrizioni testuali", 2, "AI generativa"),
+    ("GPT-4 per la scrittura creativa", 2, "AI generativa"),
+    ("Stable Diffusion art generation", 2, "AI generativa"),
+    
+    # Computer Vision (3)
+    ("Riconoscimento facciale con OpenCV", 3, "Computer Vision"),
+    ("Object detection con YOLO algorithm", 3, "Computer Vision"),
+    ("Classificazione automatica di immagini", 3, "Computer Vision"),
+    ("OCR per estrazione testo da documenti", 3, "Computer Vision"),
+    
+    # Robotica AI (4)
+    ("Braccio robotico industriale automatizzato", 4, "Robotica AI"),
+    ("Robot domestico per pulizie autonome", 4, "Robotica AI"),
+    ("Drone intelligente per delivery", 4, "Robotica AI"),
+    ("Robot collaborativo in fabbrica", 4, "Robotica AI"),
+    
+    # Guida Autonoma (5)
+    ("Tesla Model S con Autopilot attivato", 5, "Guida Autonoma"),
+    ("Waymo self-driving car technology", 5, "Guida Autonoma"),
+    ("Sensori LiDAR per veicoli autonomi", 5, "Guida Autonoma"),
+    ("Auto senza pilota completamente autonoma", 5, "Guida Autonoma"),
+    
+    # Data Science (6)
+    ("Big Data analytics con Apache Spark", 6, "Data Science"),
+    ("Analisi predittiva su dataset aziendali", 6, "Data Science"),
+    ("Machine learning per business intelligence", 6, "Data Science"),
+    ("Data visualization con Python pandas", 6, "Data Science"),
+    
+    # AI Medica (7)
+    ("Diagnosi automatica tramite imaging medicale", 7, "AI Medica"),
+    ("AI per scoperta di nuovi farmaci", 7, "AI Medica"),
+    ("Analisi di raggi X con deep learning", 7, "AI Medica"),
+    ("Telemedicina assistita da intelligenza artificiale", 7, "AI Medica"),
+]
+
 def valutazione_completa():
     print("🔍 VALUTAZIONE COMPLETA DEL MODELLO")
     print("=" * 60)
     
-    classificatore = AITextClassifier()
-    
-    # Test set completo con esempi chiari per ogni categoria
-    test_cases = [
-        # ALTRO (0)
-        ("Ricetta tradizionale della pizza margherita napoletana", 0, "ALTRO"),
-        ("Risultati campionato di calcio Serie A stagione corrente", 0, "ALTRO"),
-        ("Corso di chitarra classica per principianti", 0, "ALTRO"),
-        ("Vacanze estive nelle isole greche", 0, "ALTRO"),
-        
-        # AI generica (1)
-        ("Algoritmi di machine learning per classificazione", 1, "AI generica"),
-        ("Reti neurali artificiali e deep learning", 1, "AI generica"),
-        ("L'intelligenza artificiale nel futuro", 1, "AI generica"),
-        ("Apprendimento automatico e data mining", 1, "AI generica"),
-        
-        # AI generativa (2)
-        ("ChatGPT genera testi automaticamente", 2, "AI generativa"),
-        ("DALL-E crea immagini da descrizioni testuali", 2, "AI generativa"),
-        ("GPT-4 per la scrittura creativa", 2, "AI generativa"),
-        ("Stable Diffusion art generation", 2, "AI generativa"),
-        
-        # Computer Vision (3)
-        ("Riconoscimento facciale con OpenCV", 3, "Computer Vision"),
-        ("Object detection con YOLO algorithm", 3, "Computer Vision"),
-        ("Classificazione automatica di immagini", 3, "Computer Vision"),
-        ("OCR per estrazione testo da documenti", 3, "Computer Vision"),
-        
-        # Robotica AI (4)
-        ("Braccio robotico industriale automatizzato", 4, "Robotica AI"),
-        ("Robot domestico per pulizie autonome", 4, "Robotica AI"),
-        ("Drone intelligente per delivery", 4, "Robotica AI"),
-        ("Robot collaborativo in fabbrica", 4, "Robotica AI"),
-        
-        # Guida Autonoma (5)
-        ("Tesla Model S con Autopilot attivato", 5, "Guida Autonoma"),
-        ("Waymo self-driving car technology", 5, "Guida Autonoma"),
-        ("Sensori LiDAR per veicoli autonomi", 5, "Guida Autonoma"),
-        ("Auto senza pilota completamente autonoma", 5, "Guida Autonoma"),
-        
-        # Data Science (6)
-        ("Big Data analytics con Apache Spark", 6, "Data Science"),
-        ("Analisi predittiva su dataset aziendali", 6, "Data Science"),
-        ("Machine learning per business intelligence", 6, "Data Science"),
-        ("Data visualization con Python pandas", 6, "Data Science"),
-        
-        # AI Medica (7)
-        ("Diagnosi automatica tramite imaging medicale", 7, "AI Medica"),
-        ("AI per scoperta di nuovi farmaci", 7, "AI Medica"),
-        ("Analisi di raggi X con deep learning", 7, "AI Medica"),
-        ("Telemedicina assistita da intelligenza artificiale", 7, "AI Medica"),
-    ]
+    classificatore = get_shared_classifier()
     
     # Esegui i test
     risultati = []
@@ -74,7 +74,7 @@ def valutazione_completa():
     print("📊 Risultati per categoria:")
     print("-" * 60)
     
-    for testo, categoria_attesa, nome_categoria in test_cases:
+    for testo, categoria_attesa, nome_categoria in CASI_DI_TEST:
         categoria_predetta_id, confidenza = classificatore.model_manager.predict(testo)
         categoria_predetta_nome = classificatore.get_categories()[categoria_predetta_id]
         
@@ -157,7 +157,7 @@ def test_esempi_reali():
     print(f"\n🌐 TEST CON ESEMPI REALI")
     print("=" * 60)
     
-    classificatore = AITextClassifier()
+    classificatore = get_shared_classifier()
     
     esempi_reali = [
         ("OpenAI ha rilasciato GPT-4, un modello di linguaggio multimodale che può processare sia testo che immagini. Il modello dimostra capacità umane in vari benchmark accademici e professionali.", "AI generativa"),
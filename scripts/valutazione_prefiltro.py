@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Valutazione del pre-filtro ALTRO: frazione di testi che salta il transformer,
+impatto sull'accuratezza e tempo risparmiato
+
+Il filtro viene addestrato su ALL_TRAINING_DATA (meno una quota di holdout,
+se richiesta) e valutato sui casi di test di valutazione_modello.py e
+sull'holdout, a diverse soglie.
+"""
+import sys
+import os
+import time
+import random
+import argparse
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from src.ai_classification.core.classifier import get_shared_classifier
+from src.ai_classification.core.config import CATEGORY_IDS, PREFILTER_CONFIG
+from src.ai_classification.core.prefilter import HashedNgramFilter
+from src.ai_classification.data.training_data import ALL_TRAINING_DATA
+from valutazione_modello import CASI_DI_TEST
+
+ALTRO = CATEGORY_IDS["ALTRO"]
+
+
+def valuta(nome: str, testi: list, etichette: np.ndarray, prefilter, predette: np.ndarray, soglie: list):
+    """Stampa filtrati, falsi ALTRO e accuratezza con e senza filtro per ogni soglia"""
+    probabilita_altro = prefilter.predict_proba(testi)
+    accuratezza_modello = (predette == etichette).mean()
+
+    print(f"\n{nome}: {len(testi)} testi, {int((etichette == ALTRO).sum())} ALTRO, "
+          f"accuratezza solo modello {accuratezza_modello:.1%}")
+    print(f"{'soglia':>8}{'filtrati':>10}{'falsi ALTRO':>13}{'accuratezza':>13}{'delta':>8}")
+    for soglia in soglie:
+        filtrati = probabilita_altro >= soglia
+        combinate = np.where(filtrati, ALTRO, predette)
+        falsi = int((filtrati & (etichette != ALTRO)).sum())
+        accuratezza = (combinate == etichette).mean()
+        print(f"{soglia:>8.2f}{filtrati.mean():>10.1%}{falsi:>13}"
+              f"{accuratezza:>13.1%}{accuratezza - accuratezza_modello:>+8.1%}")
+
+
+def tempo_per_testo(classifier, testi: list, ripetizioni: int) -> float:
+    """Millisecondi per testo di predict_records (cache disattivata)"""
+    classifier.predict_records(testi[:8])
+    start = time.perf_counter()
+    for _ in range(ripetizioni):
+        classifier.predict_records(testi)
+    return (time.perf_counter() - start) * 1000 / (len(testi) * ripetizioni)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Valutazione del pre-filtro ALTRO")
+    parser.add_argument("--soglie", type=float, nargs="+", default=[0.8, 0.9, 0.95, 0.99])
+    parser.add_argument("--holdout", type=float, default=0.2,
+                        help="Quota di ALL_TRAINING_DATA esclusa dal training del filtro")
+    parser.add_argument("--ripetizioni", type=int, default=3)
+    args = parser.parse_args()
+
+    dati = list(ALL_TRAINING_DATA)
+    random.Random(42).shuffle(dati)
+    n_holdout = int(len(dati) * args.holdout)
+    holdout, training = dati[:n_holdout], dati[n_holdout:]
+
+    prefilter = HashedNgramFilter(
+        num_buckets=PREFILTER_CONFIG["num_buckets"],
+        ngram_range=PREFILTER_CONFIG["ngram_range"]
+    )
+    start = time.perf_counter()
+    prefilter.train(
+        [testo for testo, _ in training],
+        [categoria == ALTRO for _, categoria in training],
+        epochs=PREFILTER_CONFIG["epochs"],
+        learning_rate=PREFILTER_CONFIG["learning_rate"]
+    )
+    print(f"Pre-filtro addestrato su {len(training)} esempi in {time.perf_counter() - start:.2f} s")
+
+    classifier = get_shared_classifier(auto_train=False)
+    classifier.cache = None
+
+    insiemi = [("Casi di test", [(t, c) for t, c, _ in CASI_DI_TEST])]
+    if holdout:
+        insiemi.append(("Holdout ALL_TRAINING_DATA", holdout))
+    for nome, esempi in insiemi:
+        testi = [testo for testo, _ in esempi]
+        etichette = np.array([categoria for _, categoria in esempi])
+        predette, _ = classifier.model_manager.predict_batch(testi)
+        valuta(nome, testi, etichette, prefilter, predette, args.soglie)
+
+    # Costo per testo sul traffico dei casi di test, senza e con il filtro
+    testi = [testo for testo, _, _ in CASI_DI_TEST]
+    senza = tempo_per_testo(classifier, testi, args.ripetizioni)
+    print(f"\nSenza filtro: {senza:.2f} ms/testo")
+    classifier.prefilter = prefilter
+    for soglia in args.soglie:
+        prefilter.threshold = soglia
+        con = tempo_per_testo(classifier, testi, args.ripetizioni)
+        print(f"Soglia {soglia:.2f}: {con:.2f} ms/testo ({con / senza:.0%} del tempo)")
+
+
+if __name__ == "__main__":
+    main()
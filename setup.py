@@ -51,12 +51,17 @@ setup(
         "server": [
             "fastapi>=0.104.0",
             "uvicorn>=0.24.0",
+        ],
+        "onnx": [
+            "onnx>=1.14.0",
+            "onnxruntime>=1.16.0",
         ]
     },
     entry_points={
         "console_scripts": [
             "ai-classification-server=ai_classification.api.server:main",
             "ai-classification-train=ai_classification.scripts.train:main",
+            "ai-classification=ai_classification.cli:main",
         ],
     },
     include_package_data=True,
@@ -16,5 +16,10 @@ def get_classifier(*args, **kwargs):
     from .core.classifier import AITextClassifier
     return AITextClassifier(*args, **kwargs)
 
+def get_shared_classifier(auto_train=True):
+    """Lazy loader for the process-wide shared classifier (loaded once per model path and device)"""
+    from .core.classifier import get_shared_classifier as _get_shared_classifier
+    return _get_shared_classifier(auto_train=auto_train)
+
 # Make categories available directly
-__all__ = ["get_classifier", "CATEGORIES"]
\ No newline at end of file
+__all__ = ["get_classifier", "get_shared_classifier", "CATEGORIES"]
\ No newline at end of file
@@ -0,0 +1,187 @@
+"""
+Client asincrono per le applicazioni basate su asyncio
+"""
+import asyncio
+import json
+from itertools import islice
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Union
+
+import httpx
+
+from .ndjson import encode_lines
+
+# Risposte ripetute: server sovraccarico o temporaneamente non raggiungibile
+RETRY_STATUSES = (502, 503, 504)
+
+
+class AsyncAIClassificationClient:
+    """
+    Client asincrono per il server di classificazione AI
+
+    Stessa interfaccia di AIClassificationClient su httpx.AsyncClient: le
+    connessioni keep-alive del pool sono condivise da tutte le coroutine.
+    Errori di connessione e risposte 502/503/504 vengono ripetuti con
+    backoff esponenziale, rispettando l'header Retry-After del server.
+
+        async with AsyncAIClassificationClient() as client:
+            async for result in client.iter_predictions(texts):
+                ...
+    """
+
+    def __init__(self, base_url: str = "http://localhost:8000", pool_size: int = 10,
+                 max_retries: int = 3, backoff_factor: float = 0.5, timeout: float = 30,
+                 health_timeout: float = 5, transport: Optional[httpx.AsyncBaseTransport] = None):
+        """
+        Args:
+            base_url: Indirizzo del server
+            pool_size: Connessioni keep-alive mantenute aperte
+            max_retries: Tentativi aggiuntivi per le richieste fallite
+            backoff_factor: Base dell'attesa esponenziale tra i tentativi (secondi)
+            timeout: Timeout delle richieste (secondi)
+            health_timeout: Timeout del controllo di /health (secondi)
+            transport: Trasporto httpx alternativo (test, proxy)
+        """
+        self.base_url = base_url
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.timeout = timeout
+        self.health_timeout = health_timeout
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            transport=transport
+        )
+
+    async def aclose(self):
+        """Chiude le connessioni del pool"""
+        await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def _post(self, path: str, **kwargs) -> httpx.Response:
+        """POST con retry; solleva httpx.HTTPError se tutti i tentativi falliscono"""
+        for attempt in range(self.max_retries + 1):
+            delay = self.backoff_factor * 2 ** attempt
+            try:
+                response = await self.client.post(path, timeout=self.timeout, **kwargs)
+            except httpx.TransportError:
+                if attempt == self.max_retries:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    response.raise_for_status()
+                    return response
+                retry_after = response.headers.get("Retry-After")
+                if retry_after is not None and retry_after.isdigit():
+                    delay = int(retry_after)
+            await asyncio.sleep(delay)
+
+    async def is_server_healthy(self) -> bool:
+        """Verifica se il server è attivo e il modello è caricato"""
+        try:
+            response = await self.client.get("/health", timeout=self.health_timeout)
+            return response.status_code == 200
+        except httpx.HTTPError:
+            return False
+
+    async def predict(self, text: str, top_k: Optional[int] = None) -> Optional[Dict]:
+        """Fai una singola predizione (con top_k include le k categorie più probabili)"""
+        try:
+            response = await self._post("/predict", json={"text": text, "top_k": top_k} if top_k else {"text": text})
+            return response.json()
+        except httpx.HTTPError as e:
+            print(f"Errore nella richiesta: {e}")
+            return None
+
+    async def _post_batch(self, texts: List[str], top_k: Optional[int] = None) -> List[Dict]:
+        """Invia un batch a /predict_batch, sollevando eccezione in caso di errore"""
+        response = await self._post("/predict_batch", json=texts, params={"top_k": top_k} if top_k else None)
+        return response.json()
+
+    async def predict_batch(self, texts: List[str], top_k: Optional[int] = None) -> Optional[List[Dict]]:
+        """Fai predizioni multiple (più efficiente per molti testi)"""
+        try:
+            return await self._post_batch(texts, top_k)
+        except httpx.HTTPError as e:
+            print(f"Errore nella richiesta batch: {e}")
+            return None
+
+    async def iter_predictions(self, texts: Iterable[str], chunk_size: int = 64,
+                               max_concurrency: int = 4) -> AsyncIterator[Dict]:
+        """
+        Classifica molti testi con batch concorrenti, restituendo i risultati man mano
+
+        I testi vengono letti in blocchi da chunk_size e inviati a
+        /predict_batch con al più max_concurrency richieste in corso. I
+        risultati di ogni blocco sono restituiti appena il blocco e i
+        precedenti sono completati, nell'ordine dei testi.
+
+        Raises:
+            httpx.HTTPError: Se un blocco fallisce dopo tutti i tentativi
+        """
+        items = iter(texts)
+        pending = []
+        try:
+            while True:
+                while len(pending) < max_concurrency:
+                    chunk = list(islice(items, chunk_size))
+                    if not chunk:
+                        break
+                    pending.append(asyncio.ensure_future(self._post_batch(chunk)))
+                if not pending:
+                    break
+                for result in await pending.pop(0):
+                    yield result
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def predict_many(self, texts: List[str], chunk_size: int = 64,
+                           max_concurrency: int = 4) -> Optional[List[Dict]]:
+        """Classifica molti testi con batch concorrenti e restituisce tutti i risultati in ordine"""
+        try:
+            return [result async for result in self.iter_predictions(texts, chunk_size, max_concurrency)]
+        except httpx.HTTPError as e:
+            print(f"Errore nella richiesta batch: {e}")
+            return None
+
+    async def predict_stream(self, texts: Iterable[Union[str, Dict]],
+                             chunk_size: int = 1000) -> AsyncIterator[Dict]:
+        """
+        Classifica un flusso di testi tramite /predict_stream
+
+        Come AIClassificationClient.predict_stream: i testi (stringhe o
+        dizionari {"id", "text"}) sono inviati in richieste NDJSON da
+        chunk_size testi e i risultati arrivano appena il server completa
+        ciascun batch interno.
+
+        Raises:
+            httpx.HTTPError: Se una richiesta fallisce
+        """
+        items = iter(texts)
+        offset = 0
+        while True:
+            chunk = list(islice(items, chunk_size))
+            if not chunk:
+                break
+
+            body = encode_lines(
+                item if isinstance(item, dict) else {"id": offset + i, "text": item}
+                for i, item in enumerate(chunk)
+            )
+            # Il timeout di lettura vale tra due blocchi della risposta, non per l'intero job
+            async with self.client.stream(
+                "POST", "/predict_stream",
+                content=body,
+                headers={"Content-Type": "application/x-ndjson"},
+                timeout=self.timeout
+            ) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if line:
+                        yield json.loads(line)
+            offset += len(chunk)
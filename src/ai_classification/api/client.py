@@ -1,29 +1,82 @@
 import requests
 import json
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Iterable, Iterator, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
 
+from .wire import BINARY_MEDIA_TYPE, decode_batch
+
 class AIClassificationClient:
-    """Client per comunicare con il server di classificazione AI"""
+    """
+    Client per comunicare con il server di classificazione AI
+    
+    Usa una requests.Session con un pool di connessioni keep-alive, riusate
+    tra le chiamate. Le richieste fallite per errori di connessione o per
+    risposte 502/503/504 vengono ripetute con backoff esponenziale,
+    rispettando l'header Retry-After del server. Il controllo di /health non
+    viene ripetuto: deve rispondere subito se il server è disponibile.
+    """
+    
+    def __init__(self, base_url: str = "http://localhost:8000", pool_size: int = 10,
+                 max_retries: int = 3, backoff_factor: float = 0.5, timeout: float = 30,
+                 health_timeout: float = 5):
+        """
+        Args:
+            base_url: Indirizzo del server
+            pool_size: Connessioni keep-alive mantenute aperte
+            max_retries: Tentativi aggiuntivi per le richieste fallite
+            backoff_factor: Base dell'attesa esponenziale tra i tentativi (secondi)
+            timeout: Timeout delle richieste (secondi)
+            health_timeout: Timeout del controllo di /health (secondi)
+        """
+        # Senza "/" finale gli URL composti e il prefisso di /health coincidono
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.health_timeout = health_timeout
+        
+        # Le predizioni sono idempotenti: anche le POST possono essere ripetute
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=None,
+            respect_retry_after_header=True
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # Prefisso più specifico: /health usa un adapter senza retry
+        self.session.mount(f"{self.base_url}/health", HTTPAdapter(max_retries=Retry(total=0, raise_on_status=False)))
+    
+    def close(self):
+        """Chiude le connessioni del pool"""
+        self.session.close()
     
-    def __init__(self, base_url: str = "http://localhost:8000"):
-        self.base_url = base_url
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
         
     def is_server_healthy(self) -> bool:
         """Verifica se il server è attivo e il modello è caricato"""
         try:
-            response = requests.get(f"{self.base_url}/health", timeout=5)
+            response = self.session.get(f"{self.base_url}/health", timeout=self.health_timeout)
             return response.status_code == 200
         except:
             return False
     
-    def predict(self, text: str) -> Optional[Dict]:
-        """Fai una singola predizione"""
+    def predict(self, text: str, top_k: Optional[int] = None) -> Optional[Dict]:
+        """Fai una singola predizione (con top_k include le k categorie più probabili)"""
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/predict",
-                json={"text": text},
-                timeout=10
+                json={"text": text, "top_k": top_k} if top_k else {"text": text},
+                timeout=self.timeout
             )
             response.raise_for_status()
             return response.json()
@@ -31,20 +84,113 @@ class AIClassificationClient:
             print(f"Errore nella richiesta: {e}")
             return None
     
-    def predict_batch(self, texts: List[str]) -> Optional[List[Dict]]:
+    def _post_batch(self, texts: List[str], top_k: Optional[int] = None) -> List[Dict]:
+        """Invia un batch a /predict_batch, sollevando eccezione in caso di errore"""
+        response = self.session.post(
+            f"{self.base_url}/predict_batch",
+            json=texts,
+            params={"top_k": top_k} if top_k else None,
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response.json()
+    
+    def predict_batch(self, texts: List[str], top_k: Optional[int] = None) -> Optional[List[Dict]]:
         """Fai predizioni multiple (più efficiente per molti testi)"""
         try:
-            response = requests.post(
+            return self._post_batch(texts, top_k)
+        except requests.exceptions.RequestException as e:
+            print(f"Errore nella richiesta batch: {e}")
+            return None
+    
+    def predict_batch_compact(self, texts: List[str]) -> Optional[Tuple[List[int], List[int], List[float]]]:
+        """
+        Predizioni multiple nel formato binario compatto
+        
+        La risposta non ripete i testi e non contiene oggetti JSON: solo id
+        (posizione nel batch), indici di categoria e confidenze float32.
+        
+        Returns:
+            Tupla (ids, classi, confidenze), None in caso di errore
+        """
+        try:
+            response = self.session.post(
                 f"{self.base_url}/predict_batch",
                 json=texts,
-                timeout=30
+                headers={"Accept": BINARY_MEDIA_TYPE},
+                timeout=self.timeout
             )
             response.raise_for_status()
-            return response.json()
+            return decode_batch(response.content)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"Errore nella richiesta batch: {e}")
+            return None
+    
+    def predict_many(self, texts: List[str], chunk_size: int = 64,
+                     max_concurrency: int = 4) -> Optional[List[Dict]]:
+        """
+        Classifica molti testi inviando più batch in parallelo
+        
+        La lista viene divisa in blocchi da chunk_size testi, inviati con al
+        più max_concurrency richieste contemporanee (ognuna con i retry della
+        sessione). I risultati sono restituiti nell'ordine dei testi.
+        """
+        chunks = [texts[start:start + chunk_size] for start in range(0, len(texts), chunk_size)]
+        max_concurrency = min(max_concurrency, len(chunks))
+        try:
+            if max_concurrency <= 1:
+                results = [self._post_batch(chunk) for chunk in chunks]
+            else:
+                with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+                    results = list(pool.map(self._post_batch, chunks))
+            return [r for chunk in results for r in chunk]
         except requests.exceptions.RequestException as e:
             print(f"Errore nella richiesta batch: {e}")
             return None
     
+    def predict_stream(self, texts: Iterable[Union[str, Dict]], chunk_size: int = 1000) -> Iterator[Dict]:
+        """
+        Classifica un flusso di testi tramite /predict_stream
+        
+        I testi (stringhe o dizionari {"id", "text"}) vengono letti in modo
+        incrementale e inviati in richieste NDJSON da chunk_size testi; i
+        risultati arrivano man mano che il server completa i batch interni.
+        Ai testi senza id viene assegnata la posizione nel flusso. Le richieste
+        restano limitate perché requests invia l'intero body prima di leggere
+        la risposta (e un body in memoria può essere ripetuto dai retry).
+        
+        Raises:
+            requests.exceptions.RequestException: Se una richiesta fallisce
+        """
+        items = iter(texts)
+        offset = 0
+        while True:
+            chunk = list(islice(items, chunk_size))
+            if not chunk:
+                break
+            
+            # Body in memoria (limitato a chunk_size testi): ripetibile dai retry
+            body = b"".join(
+                json.dumps(
+                    item if isinstance(item, dict) else {"id": offset + i, "text": item},
+                    ensure_ascii=False
+                ).encode("utf-8") + b"\n"
+                for i, item in enumerate(chunk)
+            )
+            # Il timeout di lettura vale tra due blocchi della risposta, non per l'intero job
+            with self.session.post(
+                f"{self.base_url}/predict_stream",
+                data=body,
+                headers={"Content-Type": "application/x-ndjson"},
+                stream=True,
+                timeout=self.timeout
+            ) as response:
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    if line:
+                        yield json.loads(line)
+            offset += len(chunk)
+    
     def get_category_name(self, prediction: int) -> str:
         """Converte il numero di categoria nel nome"""
         categories = {
@@ -60,31 +206,41 @@ class AIClassificationClient:
         return categories.get(prediction, "Sconosciuto")
 
 # Funzioni di utilità per uso semplice
+
+# Client condiviso dalle funzioni di utilità: riusa le connessioni tra le chiamate
+_default_client = None
+
+def _get_default_client() -> AIClassificationClient:
+    global _default_client
+    if _default_client is None:
+        _default_client = AIClassificationClient()
+    return _default_client
+
+def _classification_error(client: AIClassificationClient, message: str) -> Exception:
+    """Errore di classificazione; /health viene interrogato solo per spiegare il fallimento"""
+    if not client.is_server_healthy():
+        return Exception("Server non disponibile. Assicurati che sia in esecuzione con: python server.py")
+    return Exception(message)
+
 def classify_text(text: str) -> tuple[str, float]:
     """Funzione semplice per classificare un singolo testo"""
-    client = AIClassificationClient()
-    
-    if not client.is_server_healthy():
-        raise Exception("Server non disponibile. Assicurati che sia in esecuzione con: python server.py")
+    client = _get_default_client()
     
     result = client.predict(text)
     if result:
         return result['category'], result['confidence']
     else:
-        raise Exception("Errore nella classificazione")
+        raise _classification_error(client, "Errore nella classificazione")
 
 def classify_texts(texts: List[str]) -> List[tuple[str, float]]:
     """Funzione semplice per classificare più testi"""
-    client = AIClassificationClient()
+    client = _get_default_client()
     
-    if not client.is_server_healthy():
-        raise Exception("Server non disponibile. Assicurati che sia in esecuzione con: python server.py")
-    
-    results = client.predict_batch(texts)
-    if results:
+    results = client.predict_many(texts)
+    if results is not None:
         return [(r['category'], r['confidence']) for r in results]
     else:
-        raise Exception("Errore nella classificazione batch")
+        raise _classification_error(client, "Errore nella classificazione batch")
 
 # Esempio di utilizzo
 if __name__ == "__main__":
@@ -0,0 +1,196 @@
+"""
+Micro-batching delle richieste singole per il server di classificazione
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List
+
+from .executor import InferenceQueueFullError
+
+
+class CoalescerStats:
+    """Statistiche su dimensione dei batch e tempo di attesa in coda"""
+
+    def __init__(self, window: int = 1000):
+        self.batch_sizes: Dict[int, int] = {}
+        self.batches = 0
+        self.requests = 0
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+        # Finestra delle attese più recenti per calcolare i percentili
+        self._recent_waits = deque(maxlen=window)
+
+    def record_batch(self, size: int, waits_ms: List[float]):
+        """Registra un batch eseguito con le attese dei singoli elementi"""
+        self.batches += 1
+        self.requests += size
+        self.batch_sizes[size] = self.batch_sizes.get(size, 0) + 1
+        for wait in waits_ms:
+            self.wait_total_ms += wait
+            self.wait_max_ms = max(self.wait_max_ms, wait)
+            self._recent_waits.append(wait)
+
+    def _percentile(self, q: float) -> float:
+        if not self._recent_waits:
+            return 0.0
+        ordered = sorted(self._recent_waits)
+        index = min(int(q * len(ordered)), len(ordered) - 1)
+        return ordered[index]
+
+    def as_dict(self) -> dict:
+        """Restituisce le statistiche in formato serializzabile"""
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "avg_batch_size": self.requests / self.batches if self.batches else 0.0,
+            "batch_size_distribution": dict(sorted(self.batch_sizes.items())),
+            "queue_wait_ms": {
+                "avg": self.wait_total_ms / self.requests if self.requests else 0.0,
+                "p50": self._percentile(0.50),
+                "p99": self._percentile(0.99),
+                "max": self.wait_max_ms,
+            },
+        }
+
+
+class RequestCoalescer:
+    """
+    Raccoglie le richieste singole concorrenti e le esegue come un unico batch
+
+    Il primo elemento in coda apre una finestra di al massimo max_wait_ms:
+    il batch parte quando raggiunge max_batch_size elementi o quando la
+    finestra scade. Ogni chiamante riceve il proprio risultato tramite future.
+    """
+
+    def __init__(self,
+                 run_batch: Callable[[List[Any]], Awaitable[List[Any]]],
+                 max_batch_size: int = 32,
+                 max_wait_ms: float = 5.0,
+                 max_queue_size: int = 0):
+        """
+        Args:
+            run_batch: Coroutine che elabora una lista di input e restituisce
+                       una lista di risultati nello stesso ordine
+            max_batch_size: Numero massimo di richieste per batch
+            max_wait_ms: Attesa massima del primo elemento prima dell'esecuzione
+            max_queue_size: Numero massimo di richieste in coda (0 = illimitato)
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size deve essere almeno 1")
+
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_queue_size = max_queue_size
+        self.rejected = 0
+        self.stats = CoalescerStats()
+        self._queue: asyncio.Queue = None
+        self._worker: asyncio.Task = None
+
+    @property
+    def queue_depth(self) -> int:
+        """Numero di richieste in attesa di essere inserite in un batch"""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self):
+        """Avvia il worker di batching sul loop corrente"""
+        if self._worker is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Ferma il worker e annulla le richieste ancora in coda"""
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+        while not self._queue.empty():
+            _, future, _ = self._queue.get_nowait()
+            if not future.done():
+                future.cancel()
+
+    async def submit(self, item: Any) -> Any:
+        """
+        Accoda un input e attende il risultato del batch che lo contiene
+
+        Raises:
+            InferenceQueueFullError: Se la coda ha già max_queue_size richieste
+        """
+        if self._worker is None:
+            raise RuntimeError("Coalescer non avviato. Chiamare start() prima.")
+
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((item, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise InferenceQueueFullError(
+                f"Coda di micro-batching piena ({self.max_queue_size} richieste in attesa)"
+            )
+        return await future
+
+    async def _collect(self) -> list:
+        """Attende il primo elemento e accumula gli altri fino a batch pieno o timeout"""
+        pending = [await self._queue.get()]
+        deadline = pending[0][2] + self.max_wait
+
+        while len(pending) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                # Finestra scaduta: prende solo ciò che è già in coda
+                if self._queue.empty():
+                    break
+                pending.append(self._queue.get_nowait())
+                continue
+            try:
+                pending.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+        return pending
+
+    async def _run(self):
+        """Loop principale: raccoglie, esegue e risolve i batch"""
+        while True:
+            pending = await self._collect()
+
+            # Le richieste già annullate dal chiamante non entrano nel batch
+            pending = [entry for entry in pending if not entry[1].done()]
+            if not pending:
+                continue
+
+            dispatched_at = time.perf_counter()
+            self.stats.record_batch(
+                len(pending),
+                [(dispatched_at - enqueued_at) * 1000 for _, _, enqueued_at in pending]
+            )
+
+            items = [item for item, _, _ in pending]
+            try:
+                results = await self.run_batch(items)
+            except Exception as e:
+                # Il traceback riferisce i frame del worker: non va condiviso con i chiamanti
+                e = e.with_traceback(None)
+                for _, future, _ in pending:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future, _), result in zip(pending, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def get_stats(self) -> dict:
+        """Restituisce le metriche del coalescer"""
+        stats = self.stats.as_dict()
+        stats["queue_depth"] = self.queue_depth
+        stats["max_batch_size"] = self.max_batch_size
+        stats["max_wait_ms"] = self.max_wait * 1000
+        stats["rejected"] = self.rejected
+        return stats
@@ -0,0 +1,86 @@
+"""
+Esecuzione dell'inferenza fuori dall'event loop del server
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+
+class InferenceQueueFullError(Exception):
+    """Sollevata quando troppe richieste di inferenza sono già in attesa"""
+
+
+class InferenceExecutor:
+    """
+    Thread pool limitato per le chiamate bloccanti al modello
+
+    Le chiamate al classificatore sono sincrone: eseguirle direttamente negli
+    handler async bloccherebbe /health e tutte le altre richieste. Le
+    richieste oltre max_pending vengono rifiutate subito invece di accodarsi
+    senza limite.
+    """
+
+    def __init__(self, max_workers: int = 1, max_pending: int = 64):
+        """
+        Args:
+            max_workers: Numero di thread che eseguono inferenza in parallelo
+            max_pending: Numero massimo di chiamate in esecuzione o in attesa
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers deve essere almeno 1")
+        if max_pending < max_workers:
+            raise ValueError("max_pending deve essere almeno pari a max_workers")
+
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inference")
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Esegue fn in un thread del pool e ne attende il risultato
+
+        Raises:
+            InferenceQueueFullError: Se ci sono già max_pending chiamate in corso
+        """
+        # Il contatore è modificato solo dall'event loop: non serve un lock
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise InferenceQueueFullError(
+                f"Coda di inferenza piena ({self.max_pending} richieste in attesa)"
+            )
+
+        loop = asyncio.get_running_loop()
+        self.pending += 1
+        future = self._pool.submit(functools.partial(fn, *args, **kwargs))
+        # Il posto si libera quando il thread termina, non quando il chiamante
+        # smette di attendere: una richiesta annullata occupa il worker finché
+        # la chiamata in corso non finisce
+        future.add_done_callback(lambda _: self._release(loop))
+        return await asyncio.wrap_future(future, loop=loop)
+
+    def _release(self, loop):
+        """Decrementa il contatore nel thread dell'event loop"""
+        try:
+            loop.call_soon_threadsafe(self._decrement)
+        except RuntimeError:
+            # Loop già chiuso (arresto del server): il contatore non serve più
+            pass
+
+    def _decrement(self):
+        self.pending -= 1
+
+    def shutdown(self):
+        """Chiude il thread pool attendendo le chiamate in corso"""
+        self._pool.shutdown(wait=True)
+
+    def get_stats(self) -> dict:
+        """Restituisce lo stato della coda di inferenza"""
+        return {
+            "threads": self.max_workers,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,206 @@
+"""
+Ricaricamento a caldo del modello servito
+
+Una nuova versione viene caricata e riscaldata in un thread separato mentre
+quella attiva continua a servire. Lo scambio avviene sull'event loop con una
+sola assegnazione: le richieste successive usano la nuova versione, quelle
+già in corso terminano sulla precedente, che viene rilasciata quando non ha
+più richieste attive (o allo scadere del timeout di drenaggio).
+"""
+import asyncio
+import gc
+import logging
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Testi usati per il riscaldamento di una versione prima dello scambio
+WARMUP_TEXTS = [
+    "Reti neurali per il riconoscimento di immagini",
+    "Ricetta tradizionale della pizza margherita",
+    "Modelli generativi per la creazione di testo e immagini a partire da descrizioni "
+    "in linguaggio naturale, con applicazioni nella ricerca e nell'industria",
+]
+
+
+class LoadedModel:
+    """Un classificatore caricato con il conteggio delle richieste che lo usano"""
+
+    def __init__(self, classifier, version: str):
+        self.classifier = classifier
+        self.version = version
+        self.loaded_at = time.time()
+        self.in_flight = 0
+        self._drained = asyncio.Event()
+        self._drained.set()
+
+    @contextmanager
+    def lease(self):
+        """Usa il classificatore per una richiesta (solo dall'event loop)"""
+        self.in_flight += 1
+        self._drained.clear()
+        try:
+            yield self.classifier
+        finally:
+            self.in_flight -= 1
+            if self.in_flight == 0:
+                self._drained.set()
+
+    async def wait_drained(self, timeout: float) -> bool:
+        """Attende la fine delle richieste in corso; False se scade il timeout"""
+        try:
+            await asyncio.wait_for(self._drained.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+class ModelReloader:
+    """
+    Versione attiva del modello e sostituzione con una nuova versione
+
+    I contatori sono modificati solo dall'event loop: non servono lock.
+    Un solo ricaricamento alla volta; le richieste di ricaricamento
+    concorrenti attendono il precedente.
+    """
+
+    def __init__(self, load_version: Callable[[Optional[str]], tuple], drain_timeout: float = 30):
+        """
+        Args:
+            load_version: Funzione bloccante che riceve il nome della versione
+                          (None = quella indicata come attiva) e restituisce
+                          la tupla (classificatore, nome della versione)
+            drain_timeout: Attesa massima delle richieste sulla versione precedente
+        """
+        self.load_version = load_version
+        self.drain_timeout = drain_timeout
+        self.active: Optional[LoadedModel] = None
+        self.loading: Optional[str] = None
+        self.reloads = 0
+        self.failed_reloads = 0
+        self.last_error: Optional[str] = None
+        self._lock = asyncio.Lock()
+
+    def load_initial(self, version: Optional[str] = None):
+        """Carica la prima versione (bloccante, all'avvio del server)"""
+        classifier, version = self.load_version(version)
+        self.active = LoadedModel(classifier, version)
+
+    @property
+    def classifier(self):
+        """Classificatore attivo, o None se nessuna versione è caricata"""
+        return self.active.classifier if self.active is not None else None
+
+    def lease(self):
+        """Contesto che fissa la versione attiva per la durata di una richiesta"""
+        return self.active.lease()
+
+    def _load_and_warm_up(self, version: Optional[str]):
+        classifier, version = self.load_version(version)
+        # load_or_create_model non solleva eccezioni: con pesi mancanti o corrotti
+        # ripiega sul modello base non addestrato, che non deve diventare attivo
+        model_version = classifier.model_manager.model_version or ""
+        if not classifier.is_trained or model_version.startswith("base:"):
+            classifier.cleanup()
+            raise RuntimeError(f"Versione {version}: modello addestrato non caricato ({model_version or 'nessuno'})")
+        start = time.perf_counter()
+        # Primo forward pass fuori dal percorso delle richieste (allocazioni, kernel)
+        classifier.model_manager.predict_batch(WARMUP_TEXTS)
+        logger.info(f"Versione {version} riscaldata in {(time.perf_counter() - start) * 1000:.0f} ms")
+        return classifier, version
+
+    async def reload(self, version: Optional[str] = None) -> dict:
+        """
+        Carica una versione in background e la rende attiva
+
+        Returns:
+            Dizionario con la versione attivata, la precedente e l'esito del drenaggio
+        """
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            self.loading = version or "CURRENT"
+            try:
+                classifier, version = await loop.run_in_executor(None, self._load_and_warm_up, version)
+            except Exception as e:
+                self.failed_reloads += 1
+                self.last_error = str(e)
+                raise
+            finally:
+                self.loading = None
+
+            previous = self.active
+            self.active = LoadedModel(classifier, version)
+            self.reloads += 1
+            self.last_error = None
+            logger.info(f"Versione attiva: {version}")
+
+            drained = True
+            if previous is not None:
+                drained = await previous.wait_drained(self.drain_timeout)
+                if not drained:
+                    logger.warning(
+                        f"Versione {previous.version}: {previous.in_flight} richieste ancora in corso "
+                        f"dopo {self.drain_timeout} s, rilascio comunque"
+                    )
+                await loop.run_in_executor(None, self._release, previous)
+
+            return {
+                "version": version,
+                "previous_version": previous.version if previous is not None else None,
+                "drained": drained,
+            }
+
+    @staticmethod
+    def _release(previous: LoadedModel):
+        """Libera la memoria della versione precedente"""
+        classifier = previous.classifier
+        previous.classifier = None
+        classifier.close_worker_pool()
+        classifier.cleanup()
+        del classifier
+        gc.collect()
+        logger.info(f"Versione {previous.version} rilasciata")
+
+    async def watch(self, read_current: Callable[[], Optional[str]], interval: float):
+        """
+        Controlla periodicamente la versione indicata come attiva e la carica se cambia
+
+        Args:
+            read_current: Restituisce il nome della versione attiva su disco
+            interval: Secondi fra due controlli
+        """
+        failed_version = None
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if self._lock.locked():
+                    # Ricaricamento in corso (ad esempio dall'endpoint admin): si ricontrolla dopo
+                    continue
+                version = read_current()
+                if (version is None or self.active is None or version == self.active.version
+                        or version == failed_version):
+                    continue
+                logger.info(f"Nuova versione rilevata: {version}")
+                failed_version = version
+                await self.reload(version)
+                failed_version = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Non si riprova la stessa versione finché CURRENT non cambia
+                logger.error(f"Ricaricamento della versione fallito: {e}")
+
+    def get_status(self) -> dict:
+        """Versione attiva, ricaricamento in corso e contatori"""
+        active = self.active
+        return {
+            "version": active.version if active is not None else None,
+            "loaded_at": active.loaded_at if active is not None else None,
+            "in_flight": active.in_flight if active is not None else 0,
+            "loading": self.loading,
+            "reloads": self.reloads,
+            "failed_reloads": self.failed_reloads,
+            "last_error": self.last_error,
+        }
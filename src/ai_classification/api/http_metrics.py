@@ -0,0 +1,82 @@
+"""
+Strumentazione HTTP del server: richieste, decodifica JSON e serializzazione
+
+Le fasi "parse" e "serialize" sono misurate agganciandosi ai punti in cui
+FastAPI decodifica il body (Request.json) e codifica la risposta
+(JSONResponse.render), senza middleware aggiuntivi sul percorso della
+richiesta.
+"""
+import json
+import time
+
+from fastapi import HTTPException, Request, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+
+from ..core.metrics import LATENCY_BUCKETS, Counter, Histogram, stage_timer
+
+# Content type del formato testuale di Prometheus
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+REQUESTS = Counter(
+    "ai_classification_requests_total",
+    "Richieste HTTP per endpoint e codice di stato",
+    labelnames=("endpoint", "status")
+)
+REQUEST_SECONDS = Histogram(
+    "ai_classification_request_duration_seconds",
+    "Durata delle richieste HTTP per endpoint (per /predict_stream fino all'inizio della risposta)",
+    LATENCY_BUCKETS, labelnames=("endpoint",)
+)
+
+
+class TimedRequest(Request):
+    """Richiesta che misura la decodifica JSON del body come fase "parse" """
+
+    async def json(self):
+        if not hasattr(self, "_json"):
+            body = await self.body()
+            with stage_timer("parse"):
+                self._json = json.loads(body)
+        return self._json
+
+
+class TimedJSONResponse(JSONResponse):
+    """Risposta JSON che misura la codifica del contenuto come fase "serialize" """
+
+    def render(self, content) -> bytes:
+        with stage_timer("serialize"):
+            return super().render(content)
+
+
+class TimedRoute(APIRoute):
+    """Route che conta le richieste e ne misura la durata per endpoint"""
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        endpoint = self.path
+
+        async def timed_handler(request: Request) -> Response:
+            start = time.perf_counter()
+            status = 500
+            try:
+                response = await handler(TimedRequest(request.scope, request.receive))
+                status = response.status_code
+                return response
+            except HTTPException as e:
+                status = e.status_code
+                raise
+            except RequestValidationError:
+                status = 422
+                raise
+            finally:
+                REQUESTS.inc(labels=(endpoint, str(status)))
+                REQUEST_SECONDS.observe(time.perf_counter() - start, (endpoint,))
+
+        return timed_handler
+
+
+def http_metrics() -> str:
+    """Contatori e durate delle richieste nel formato di Prometheus"""
+    return REQUESTS.render() + REQUEST_SECONDS.render()
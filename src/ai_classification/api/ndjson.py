@@ -0,0 +1,75 @@
+"""
+Lettura e scrittura incrementale di NDJSON (un oggetto JSON per riga)
+
+Usato dall'endpoint /predict_stream: il body della richiesta viene letto a
+blocchi, diviso in righe e raggruppato in batch senza mai tenere in memoria
+l'intero input.
+"""
+import json
+from typing import AsyncIterator, List, Optional, Tuple
+
+# Elemento di input: (id, testo, errore). Con errore il testo è None.
+StreamItem = Tuple[object, Optional[str], Optional[str]]
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    Divide un flusso di blocchi di byte in righe (senza terminatore), saltando le righe vuote
+
+    I blocchi senza fine riga restano in attesa e sono uniti una sola volta
+    quando la riga si chiude: ogni byte viene copiato un numero costante di
+    volte anche per righe spezzate in molti blocchi piccoli.
+    """
+    pending = []
+    async for chunk in chunks:
+        pending.append(chunk)
+        if b"\n" not in chunk:
+            continue
+        *lines, rest = b"".join(pending).split(b"\n")
+        pending = [rest]
+        for line in lines:
+            if line.strip():
+                yield line
+    buffer = b"".join(pending)
+    if buffer.strip():
+        yield buffer
+
+
+def parse_item(line: bytes, index: int) -> StreamItem:
+    """
+    Interpreta una riga di input
+
+    Ogni riga è una stringa JSON oppure un oggetto {"id": ..., "text": ...};
+    senza id viene usata la posizione della riga nel flusso.
+    """
+    try:
+        value = json.loads(line)
+    except ValueError as e:
+        return index, None, f"JSON non valido: {e}"
+
+    if isinstance(value, str):
+        return index, value, None
+    if isinstance(value, dict) and isinstance(value.get("text"), str):
+        return value.get("id", index), value["text"], None
+    return index, None, 'Atteso un testo o un oggetto {"id", "text"}'
+
+
+async def iter_batches(chunks: AsyncIterator[bytes], batch_size: int) -> AsyncIterator[List[StreamItem]]:
+    """Raggruppa le righe NDJSON in batch di al più batch_size elementi, nell'ordine di arrivo"""
+    batch = []
+    index = 0
+    async for line in iter_lines(chunks):
+        batch.append(parse_item(line, index))
+        index += 1
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def encode_lines(objects) -> bytes:
+    """Serializza una sequenza di oggetti come righe NDJSON"""
+    return b"".join(
+        json.dumps(obj, ensure_ascii=False).encode("utf-8") + b"\n" for obj in objects
+    )
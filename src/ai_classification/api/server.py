@@ -1,8 +1,12 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, Field
 import uvicorn
+import asyncio
+import hmac
+import ipaddress
 import logging
-from typing import List
+from typing import List, Optional
 import sys
 import os
 
@@ -10,41 +14,203 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 from ..core.classifier import AITextClassifier
-from ..core.config import CATEGORIES
+from ..core.config import CATEGORY_NAMES, SERVER_CONFIG
+from ..core.profiling import PROFILE_MODES, get_profiler
+from ..core.metrics import BATCH_SIZE_BUCKETS, format_distribution, format_metric, render_metrics, stage_timer
+from ..core.results import Prediction
+from ..core.versions import list_versions, read_current_version, set_current_version, version_dir, version_paths
+from .coalescer import RequestCoalescer
+from .executor import InferenceExecutor, InferenceQueueFullError
+from .hot_reload import ModelReloader
+from .http_metrics import PROMETHEUS_MEDIA_TYPE, TimedJSONResponse, TimedRoute, http_metrics
+from .ndjson import encode_lines, iter_batches
+from .wire import BINARY_MEDIA_TYPE, accepts_binary, encode_batch
 
 # Configurazione logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="AI Classification Server", version="1.0.0")
+app = FastAPI(title="AI Classification Server", version="1.0.0", default_response_class=TimedJSONResponse)
+# Conteggio e durata delle richieste per endpoint (vedi /metrics)
+app.router.route_class = TimedRoute
 
-# Classificatore globale
-classifier = None
+# Versione attiva del classificatore e ricaricamento a caldo
+reloader = None
+
+# Task che osserva versions_dir/CURRENT (se model_watch_interval > 0)
+watch_task = None
+
+# Thread pool limitato per l'inferenza (l'event loop resta libero)
+executor = None
+
+# Micro-batching delle richieste /predict
+coalescer = None
 
 class PredictionRequest(BaseModel):
     text: str
+    top_k: Optional[int] = Field(None, ge=1, le=len(CATEGORY_NAMES))
+
+class TopKEntry(BaseModel):
+    prediction: int
+    category: str
+    probability: float
 
 class PredictionResponse(BaseModel):
     prediction: int
     confidence: float
     category: str
+    top_k: Optional[List[TopKEntry]] = None
 
 class BatchPredictionRequest(BaseModel):
     texts: List[str]
 
+class ReloadRequest(BaseModel):
+    version: Optional[str] = None
+
+class ProfileRequest(BaseModel):
+    mode: str = Field("cprofile", description=f"Profiler: {', '.join(PROFILE_MODES)}")
+    next_calls: int = Field(0, ge=0, description="Profila le prossime N chiamate di inferenza")
+    sample_rate: float = Field(0.0, ge=0.0, le=1.0, description="Profila questa frazione delle chiamate")
+
+def active_classifier():
+    """Classificatore della versione attiva, o None se non è caricato"""
+    return reloader.classifier if reloader is not None else None
+
+def load_model_version(version: Optional[str] = None):
+    """
+    Carica una versione pubblicata in MODEL_PATHS["versions_dir"] (bloccante)
+    
+    Senza versione si usa quella indicata in CURRENT; se non ne è stata
+    pubblicata nessuna, il modello in MODEL_PATHS con il nome "default".
+    """
+    version = version or read_current_version()
+    if version is None:
+        return AITextClassifier(auto_train=False), "default"
+    paths = version_paths(version_dir(version))
+    return AITextClassifier(auto_train=False, model_paths=paths), version
+
+async def predict_with(classifier, texts: List[str], top_k: Optional[int] = None) -> List[Prediction]:
+    """Classifica un batch di testi con un classificatore in un thread di inferenza"""
+    return await executor.run(classifier.predict_records, texts, top_k=top_k)
+
+async def classify_texts(texts: List[str], top_k: Optional[int] = None) -> List[Prediction]:
+    """Classifica un batch di testi con la versione attiva restituendo record Prediction"""
+    # La versione resta in uso (e non viene rilasciata) fino alla fine della chiamata
+    with reloader.lease() as classifier:
+        return await predict_with(classifier, texts, top_k)
+
+# Parametro opzionale ?top_k=k degli endpoint batch
+TOP_K_QUERY = Query(None, ge=1, le=len(CATEGORY_NAMES), description="Numero di categorie migliori da restituire")
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """
+    Risposta in streaming che non legge i messaggi della richiesta
+
+    StreamingResponse ascolta la disconnessione del client consumando i
+    messaggi di receive, che qui servono al generatore per leggere il body
+    in streaming mentre la risposta è già in corso.
+    """
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+def is_loopback(host: Optional[str]) -> bool:
+    """True se l'indirizzo del client è locale (127.0.0.0/8 o ::1)"""
+    try:
+        return host is not None and ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+def require_admin(request: Request, x_admin_token: Optional[str] = Header(None)):
+    """
+    Autorizza gli endpoint /admin
+    
+    Con SERVER_CONFIG["admin_token"] serve l'header X-Admin-Token corretto;
+    senza token gli endpoint rispondono solo alle richieste da localhost
+    (il server ascolta su 0.0.0.0).
+    """
+    expected = SERVER_CONFIG["admin_token"]
+    if expected is None:
+        if not is_loopback(request.client.host if request.client is not None else None):
+            raise HTTPException(
+                status_code=403,
+                detail="Endpoint di amministrazione disponibili solo da localhost senza SERVER_CONFIG['admin_token']"
+            )
+        return
+    if not hmac.compare_digest(x_admin_token or "", expected):
+        raise HTTPException(status_code=403, detail="Token di amministrazione non valido")
+
+def queue_full_response(e: InferenceQueueFullError) -> HTTPException:
+    """Risposta 503 immediata quando la coda di inferenza è satura"""
+    logger.warning(f"Richiesta rifiutata: {e}")
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
 @app.on_event("startup")
 async def load_model():
     """Carica il classificatore all'avvio del server"""
-    global classifier
+    global reloader, executor, coalescer, watch_task
     
     try:
         logger.info("Caricamento classificatore in corso...")
-        classifier = AITextClassifier(auto_train=False)
-        logger.info("Classificatore caricato con successo!")
+        reloader = ModelReloader(load_model_version, drain_timeout=SERVER_CONFIG["reload_drain_timeout"])
+        reloader.load_initial()
+        classifier = reloader.classifier
+        logger.info(f"Classificatore caricato con successo! (versione {reloader.active.version})")
         
     except Exception as e:
         logger.error(f"Errore nel caricamento del classificatore: {e}")
         raise
+    
+    inference_threads = SERVER_CONFIG["inference_threads"]
+    if SERVER_CONFIG["worker_processes"] > 0:
+        # Fork dei worker dopo il caricamento e prima di avviare altri thread
+        classifier.use_worker_pool(
+            SERVER_CONFIG["worker_processes"],
+            SERVER_CONFIG["threads_per_worker"]
+        )
+        # Un thread per processo per tenere occupati tutti i worker
+        inference_threads = max(inference_threads, SERVER_CONFIG["worker_processes"])
+        logger.info(f"Pool di inferenza attivo con {SERVER_CONFIG['worker_processes']} processi")
+    
+    executor = InferenceExecutor(
+        max_workers=inference_threads,
+        max_pending=max(SERVER_CONFIG["max_pending_requests"], inference_threads)
+    )
+    
+    if SERVER_CONFIG["microbatch_enabled"]:
+        coalescer = RequestCoalescer(
+            classify_texts,
+            max_batch_size=SERVER_CONFIG["microbatch_max_size"],
+            max_wait_ms=SERVER_CONFIG["microbatch_max_wait_ms"],
+            max_queue_size=SERVER_CONFIG["max_pending_requests"]
+        )
+        coalescer.start()
+        logger.info(
+            f"Micro-batching attivo (max {coalescer.max_batch_size} richieste, "
+            f"{SERVER_CONFIG['microbatch_max_wait_ms']} ms)"
+        )
+    
+    if SERVER_CONFIG["model_watch_interval"] > 0 and SERVER_CONFIG["worker_processes"] == 0:
+        watch_task = asyncio.ensure_future(
+            reloader.watch(read_current_version, SERVER_CONFIG["model_watch_interval"])
+        )
+        logger.info(f"Controllo delle nuove versioni ogni {SERVER_CONFIG['model_watch_interval']} s")
+
+@app.on_event("shutdown")
+async def stop_inference():
+    """Ferma micro-batching e thread di inferenza alla chiusura del server"""
+    if watch_task is not None:
+        watch_task.cancel()
+    if coalescer is not None:
+        await coalescer.stop()
+    if executor is not None:
+        executor.shutdown()
+    classifier = active_classifier()
+    if classifier is not None:
+        classifier.close_worker_pool()
 
 @app.get("/")
 async def root():
@@ -54,6 +220,7 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Verifica lo stato del classificatore"""
+    classifier = active_classifier()
     if classifier is None:
         raise HTTPException(status_code=503, detail="Classificatore non caricato")
     
@@ -61,58 +228,297 @@ async def health_check():
     return {
         "status": "healthy", 
         "device": model_info["device"],
-        "is_trained": model_info["is_trained"]
+        "is_trained": model_info["is_trained"],
+        "active_version": reloader.active.version,
+        "model_version": model_info["model_version"],
+        "cache": model_info["cache"],
+        "reload": reloader.get_status()
     }
 
-@app.post("/predict", response_model=PredictionResponse)
+@app.get("/stats")
+async def stats():
+    """Restituisce le metriche di servizio per il tuning di throughput e latenza"""
+    classifier = active_classifier()
+    cache = classifier.cache if classifier is not None else None
+    prefilter = classifier.prefilter if classifier is not None else None
+    cascade = classifier.model_manager.cascade if classifier is not None else None
+    return {
+        "cache": cache.get_stats() if cache is not None else None,
+        "prefilter": prefilter.get_stats() if prefilter is not None else None,
+        "cascade": cascade.get_stats() if cascade is not None else None,
+        "executor": executor.get_stats() if executor is not None else None,
+        "coalescer": coalescer.get_stats() if coalescer is not None else None
+    }
+
+def serving_metrics() -> str:
+    """Code, cache, pre-filtro, cascata e versione attiva nel formato di Prometheus"""
+    parts = []
+    queues = []
+    rejected = []
+    if executor is not None:
+        queues.append(({"queue": "executor"}, executor.pending))
+        rejected.append(({"queue": "executor"}, executor.rejected))
+    if coalescer is not None:
+        queues.append(({"queue": "coalescer"}, coalescer.queue_depth))
+        rejected.append(({"queue": "coalescer"}, coalescer.rejected))
+        parts.append(format_distribution(
+            "ai_classification_coalesced_batch_size", "Richieste /predict unite per batch dal micro-batching",
+            coalescer.stats.batch_sizes, BATCH_SIZE_BUCKETS
+        ))
+    parts.append(format_metric("ai_classification_queue_depth", "gauge",
+                               "Richieste in coda o in esecuzione", queues))
+    parts.append(format_metric("ai_classification_rejected_requests_total", "counter",
+                               "Richieste rifiutate con 503 per coda piena", rejected))
+    
+    classifier = active_classifier()
+    if classifier is None:
+        return "".join(parts)
+    
+    cache = classifier.cache.get_stats() if classifier.cache is not None else None
+    if cache is not None:
+        parts.append(format_metric("ai_classification_cache_lookups_total", "counter",
+                                   "Ricerche nella cache delle predizioni",
+                                   [({"result": "hit"}, cache["hits"]), ({"result": "miss"}, cache["misses"])]))
+        parts.append(format_metric("ai_classification_cache_hit_ratio", "gauge",
+                                   "Frazione di ricerche servite dalla cache", [({}, cache["hit_rate"])]))
+        parts.append(format_metric("ai_classification_cache_entries", "gauge",
+                                   "Testi in cache", [({}, cache["size"])]))
+    prefilter = classifier.prefilter.get_stats() if classifier.prefilter is not None else None
+    if prefilter is not None:
+        parts.append(format_metric("ai_classification_prefilter_texts_total", "counter",
+                                   "Testi valutati dal pre-filtro per esito",
+                                   [({"result": "short_circuited"}, prefilter["short_circuited"]),
+                                    ({"result": "model"}, prefilter["total"] - prefilter["short_circuited"])]))
+    cascade = classifier.model_manager.cascade
+    if cascade is not None:
+        cascade = cascade.get_stats()
+        parts.append(format_metric("ai_classification_cascade_texts_total", "counter",
+                                   "Testi classificati dalla cascata per stadio",
+                                   [({"stage": "early"}, cascade["total"] - cascade["escalated"]),
+                                    ({"stage": "full"}, cascade["escalated"])]))
+    parts.append(format_metric("ai_classification_model_info", "gauge", "Versione attiva del modello",
+                               [({"version": reloader.active.version,
+                                  "backend": classifier.model_manager.backend}, 1)]))
+    parts.append(format_metric("ai_classification_model_reloads_total", "counter",
+                               "Ricaricamenti a caldo completati", [({}, reloader.reloads)]))
+    return "".join(parts)
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Metriche nel formato testuale di Prometheus
+    
+    Istogrammi per fase (parse, tokenize, pad, forward, softmax, serialize),
+    dimensioni dei batch, richieste per endpoint, profondità delle code,
+    cache e memoria/CPU del processo.
+    """
+    return Response(
+        content=render_metrics(http_metrics(), serving_metrics()),
+        media_type=PROMETHEUS_MEDIA_TYPE
+    )
+
+@app.post("/predict", response_model=PredictionResponse, response_model_exclude_none=True)
 async def predict(request: PredictionRequest):
     """Predice la categoria di un testo"""
-    if classifier is None:
+    if active_classifier() is None:
         raise HTTPException(status_code=503, detail="Classificatore non disponibile")
     
     try:
-        # Usa il classificatore
-        category, confidence = classifier.classify(request.text, return_confidence=True)
+        if not request.text or not request.text.strip():
+            raise ValueError("Il testo non può essere vuoto")
         
-        # Trova l'indice della categoria
-        prediction = next(k for k, v in CATEGORIES.items() if v == category)
+        if coalescer is not None and not request.top_k:
+            # Unisce la richiesta alle altre in attesa in un unico forward pass
+            prediction = await coalescer.submit(request.text)
+        else:
+            # Usa il classificatore in un thread di inferenza
+            prediction = (await classify_texts([request.text], top_k=request.top_k))[0]
         
-        return PredictionResponse(
-            prediction=prediction,
-            confidence=confidence,
-            category=category
-        )
+        return PredictionResponse(**prediction.to_dict())
         
+    except InferenceQueueFullError as e:
+        raise queue_full_response(e)
     except Exception as e:
         logger.error(f"Errore nella predizione: {e}")
         raise HTTPException(status_code=500, detail=f"Errore nella predizione: {e}")
 
 @app.post("/predict_batch")
-async def predict_batch(texts: List[str]):
-    """Predice le categorie per una lista di testi"""
-    if classifier is None:
+async def predict_batch(texts: List[str], top_k: Optional[int] = TOP_K_QUERY,
+                        accept: Optional[str] = Header(None)):
+    """
+    Predice le categorie per una lista di testi
+    
+    Con ?top_k=k ogni risultato include le k categorie più probabili. Con
+    "Accept: application/x-ai-classification-batch" la risposta usa il
+    formato binario compatto (solo id, indici di categoria e confidenze).
+    """
+    if active_classifier() is None:
         raise HTTPException(status_code=503, detail="Classificatore non disponibile")
     
+    binary = accepts_binary(accept)
+    if binary and top_k:
+        raise HTTPException(status_code=400, detail="top_k non è supportato dal formato binario")
+    
     try:
-        # Classifica tutti i testi
-        results = classifier.classify_batch(texts, return_confidence=True)
+        # Classifica tutti i testi in un thread di inferenza
+        results = await classify_texts(texts, top_k=top_k)
         
-        # Formatta i risultati
-        formatted_results = []
-        for i, (category, confidence) in enumerate(results):
-            prediction = next(k for k, v in CATEGORIES.items() if v == category)
-            formatted_results.append({
-                "text": texts[i],
-                "prediction": prediction,
-                "category": category,
-                "confidence": confidence
-            })
+        if binary:
+            with stage_timer("serialize"):
+                content = encode_batch(
+                    range(len(results)),
+                    [prediction.class_id for prediction in results],
+                    [prediction.confidence for prediction in results]
+                )
+            return Response(content=content, media_type=BINARY_MEDIA_TYPE)
         
-        return formatted_results
+        # Formatta i risultati
+        return [
+            {"text": text, **prediction.to_dict()}
+            for text, prediction in zip(texts, results)
+        ]
         
+    except InferenceQueueFullError as e:
+        raise queue_full_response(e)
     except Exception as e:
         logger.error(f"Errore nella predizione batch: {e}")
         raise HTTPException(status_code=500, detail=f"Errore nella predizione batch: {e}")
 
+async def classify_stream_batch(classifier, items, top_k: Optional[int] = None) -> bytes:
+    """Classifica un batch del flusso e restituisce i risultati come righe NDJSON"""
+    valid = [text for _, text, error in items if error is None]
+    results = iter(await predict_with(classifier, valid, top_k)) if valid else iter(())
+    
+    with stage_timer("serialize"):
+        return encode_lines(
+            {"id": item_id, "error": error} if error is not None
+            else {"id": item_id, **next(results).to_dict()}
+            for item_id, _, error in items
+        )
+
+async def stream_predictions(request: Request, top_k: Optional[int] = None):
+    """
+    Legge il body NDJSON a blocchi e restituisce i risultati batch per batch
+
+    Mentre un batch è in inferenza viene già letto e accodato il successivo;
+    i risultati sono emessi nell'ordine di arrivo dei testi. Tutto il flusso
+    usa la versione del modello attiva al suo inizio.
+    """
+    pending = None
+    with reloader.lease() as classifier:
+        try:
+            async for items in iter_batches(request.stream(), SERVER_CONFIG["stream_batch_size"]):
+                task = asyncio.ensure_future(classify_stream_batch(classifier, items, top_k))
+                if pending is not None:
+                    yield await pending
+                pending = task
+            if pending is not None:
+                yield await pending
+                pending = None
+        except Exception as e:
+            # Lo stato HTTP è già stato inviato: l'errore diventa l'ultima riga
+            logger.error(f"Errore nella predizione in streaming: {e}")
+            yield encode_lines([{"error": f"Errore nella predizione in streaming: {e}"}])
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+@app.post("/predict_stream")
+async def predict_stream(request: Request, top_k: Optional[int] = TOP_K_QUERY):
+    """
+    Predice le categorie di un flusso NDJSON di testi
+
+    Ogni riga del body è una stringa JSON o un oggetto {"id", "text"}; la
+    risposta contiene una riga {"id", "prediction", "category", "confidence"}
+    per ogni testo, nello stesso ordine, inviata appena il batch è pronto
+    (con ?top_k=k anche le k categorie più probabili).
+    """
+    if active_classifier() is None:
+        raise HTTPException(status_code=503, detail="Classificatore non disponibile")
+    
+    return NDJSONStreamingResponse(stream_predictions(request, top_k))
+
+@app.get("/admin/models", dependencies=[Depends(require_admin)])
+async def list_model_versions():
+    """Versioni pubblicate, versione indicata in CURRENT e stato della versione attiva"""
+    return {
+        "versions": list_versions(),
+        "current": read_current_version(),
+        "active": reloader.get_status() if reloader is not None else None
+    }
+
+@app.post("/admin/reload", dependencies=[Depends(require_admin)])
+async def reload_model(request: Optional[ReloadRequest] = None):
+    """
+    Carica una versione del modello e la rende attiva senza interrompere il servizio
+    
+    Senza "version" si ricarica la versione indicata in CURRENT; con una
+    versione esplicita questa diventa anche quella in CURRENT. Il caricamento
+    e il riscaldamento avvengono in background; le richieste in corso
+    terminano sulla versione precedente, poi rilasciata.
+    """
+    if reloader is None:
+        raise HTTPException(status_code=503, detail="Classificatore non disponibile")
+    if SERVER_CONFIG["worker_processes"] > 0:
+        # Creare un nuovo pool richiederebbe un fork con i thread del server attivi
+        raise HTTPException(
+            status_code=409,
+            detail="Ricaricamento a caldo non supportato con worker_processes > 0: riavviare il server"
+        )
+    
+    version = request.version if request is not None else None
+    try:
+        if version is not None:
+            version_dir(version)
+        result = await reloader.reload(version)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Errore nel ricaricamento del modello: {e}")
+        raise HTTPException(status_code=500, detail=f"Errore nel ricaricamento del modello: {e}")
+    
+    if version is not None:
+        # CURRENT (scrittura atomica) cambia solo dopo caricamento e validazione riusciti;
+        # il controllo periodico non interviene mentre il ricaricamento tiene il lock
+        set_current_version(version)
+    return result
+
+@app.get("/admin/profile", dependencies=[Depends(require_admin)])
+async def profile_status():
+    """Stato della profilazione e metadati dei profili scritti"""
+    profiler = get_profiler()
+    return {"status": profiler.get_status(), "profiles": profiler.list_profiles()}
+
+@app.post("/admin/profile", dependencies=[Depends(require_admin)])
+async def start_profiling(request: ProfileRequest):
+    """
+    Profila le prossime chiamate di inferenza o una frazione campionata
+    
+    Ogni chiamata è un forward del classificatore: un micro-batch di più
+    richieste /predict produce un solo profilo. I profili sono scritti in
+    PROFILING_CONFIG["output_dir"] con numero di testi e token.
+    """
+    if SERVER_CONFIG["worker_processes"] > 0:
+        # I processi di inferenza non vedono lo stato del profiler del processo principale
+        raise HTTPException(
+            status_code=409,
+            detail="Profilazione da endpoint non supportata con worker_processes > 0: "
+                   "usare le variabili d'ambiente AI_CLASSIFICATION_PROFILE*"
+        )
+    profiler = get_profiler()
+    try:
+        profiler.arm(request.mode, next_calls=request.next_calls, sample_rate=request.sample_rate)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    logger.info(f"Profilazione attiva: {profiler.get_status()}")
+    return profiler.get_status()
+
+@app.delete("/admin/profile", dependencies=[Depends(require_admin)])
+async def stop_profiling():
+    """Disattiva la profilazione"""
+    profiler = get_profiler()
+    profiler.disarm()
+    return profiler.get_status()
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,65 @@
+"""
+Formato binario compatto per le risposte di /predict_batch
+
+Richiesto dal client con l'header "Accept: application/x-ai-classification-batch".
+Invece di una lista di oggetti JSON (che ripete anche i testi) la risposta
+contiene solo array impaccati little-endian:
+
+    header        "AICB", versione (uint8), 3 byte di padding, n (uint32)
+    ids           n x uint32   posizione del testo nel batch
+    confidences   n x float32  confidenza della classe predetta
+    classes       n x uint8    indice della categoria (vedi CATEGORIES)
+
+Gli array a 4 byte precedono quello a 1 byte, così restano allineati.
+"""
+import struct
+from typing import List, Sequence, Tuple
+
+BINARY_MEDIA_TYPE = "application/x-ai-classification-batch"
+
+MAGIC = b"AICB"
+VERSION = 1
+HEADER = struct.Struct("<4sB3xI")
+
+
+def accepts_binary(accept_header) -> bool:
+    """Indica se l'header Accept richiede il formato binario"""
+    return bool(accept_header) and BINARY_MEDIA_TYPE in accept_header
+
+
+def encode_batch(ids: Sequence[int], classes: Sequence[int], confidences: Sequence[float]) -> bytes:
+    """Serializza i risultati di un batch nel formato binario"""
+    n = len(ids)
+    if len(classes) != n or len(confidences) != n:
+        raise ValueError("ids, classes e confidences devono avere la stessa lunghezza")
+    return b"".join((
+        HEADER.pack(MAGIC, VERSION, n),
+        struct.pack(f"<{n}I", *ids),
+        struct.pack(f"<{n}f", *confidences),
+        struct.pack(f"<{n}B", *classes),
+    ))
+
+
+def decode_batch(data: bytes) -> Tuple[List[int], List[int], List[float]]:
+    """
+    Legge una risposta nel formato binario
+
+    Returns:
+        Tupla (ids, classi, confidenze)
+
+    Raises:
+        ValueError: Se i dati non sono nel formato atteso
+    """
+    if len(data) < HEADER.size:
+        raise ValueError("Risposta binaria troncata")
+    magic, version, n = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"Formato binario non supportato: {magic!r} v{version}")
+    if len(data) != HEADER.size + 9 * n:
+        raise ValueError("Lunghezza della risposta binaria non valida")
+
+    offset = HEADER.size
+    ids = list(struct.unpack_from(f"<{n}I", data, offset))
+    confidences = list(struct.unpack_from(f"<{n}f", data, offset + 4 * n))
+    classes = list(struct.unpack_from(f"<{n}B", data, offset + 8 * n))
+    return ids, classes, confidences
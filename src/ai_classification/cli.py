@@ -0,0 +1,395 @@
+"""
+Interfaccia a riga di comando per la classificazione offline
+
+    ai-classification classify-file titoli.jsonl risultati.json --workers 4
+    ai-classification distill --layers 3 --unlabeled titoli.jsonl
+    ai-classification publish-model --activate
+
+L'input (JSONL o CSV) viene letto in streaming e classificato a blocchi con
+AITextClassifier, senza passare dal server HTTP. I risultati sono scritti
+man mano e dopo ogni blocco viene salvato un checkpoint: rilanciando lo
+stesso comando un job interrotto riprende dall'ultimo blocco completato.
+
+Il comando distill addestra un modello studente più piccolo a partire dal
+modello addestrato (vedi core/distillation.py); publish-model lo copia (o
+copia il modello addestrato) in una cartella versionata che il server può
+caricare a caldo (vedi core/versions.py).
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from typing import Iterator, Optional, Tuple
+
+# Soglie dei livelli di confidenza (formato di classification_results.json)
+CONFIDENCE_LEVELS = ((0.8, "Alta"), (0.5, "Media"), (0.0, "Bassa"))
+
+INPUT_FORMATS = ("jsonl", "csv")
+OUTPUT_FORMATS = ("json", "jsonl")
+
+
+def confidence_level(confidence: float) -> str:
+    """Converte una confidenza nel livello Alta/Media/Bassa"""
+    for threshold, level in CONFIDENCE_LEVELS:
+        if confidence >= threshold:
+            return level
+    return CONFIDENCE_LEVELS[-1][1]
+
+
+def detect_format(path: str, formats: tuple) -> str:
+    """Deduce il formato dall'estensione del file"""
+    extension = os.path.splitext(path)[1].lstrip(".").lower()
+    if extension == "ndjson":
+        extension = "jsonl"
+    if extension not in formats:
+        raise ValueError(f"Formato di '{path}' non riconosciuto, specificarne uno tra {formats}")
+    return extension
+
+
+def read_records(path: str, input_format: str, text_field: str = "title",
+                 id_field: str = "id", skip: int = 0) -> Iterator[Tuple[object, Optional[str]]]:
+    """
+    Legge i record di input uno alla volta
+
+    Le righe JSONL possono essere stringhe o oggetti (gli altri valori JSON
+    sono record senza testo); per i CSV si usa l'intestazione. Senza id il
+    record prende la sua posizione (da 1).
+
+    Args:
+        skip: Numero di record iniziali da saltare (ripresa da checkpoint)
+
+    Yields:
+        Coppie (id, testo); il testo è None se il campo manca
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        if input_format == "csv":
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+
+        for index, row in enumerate(rows):
+            if index < skip:
+                continue
+            if isinstance(row, str):
+                yield index + 1, row
+            elif isinstance(row, dict):
+                yield row.get(id_field, index + 1), row.get(text_field)
+            else:
+                # Numeri, array e null non contengono un testo
+                yield index + 1, None
+
+
+class ResultWriter:
+    """
+    Scrive i risultati in modo incrementale
+
+    Il formato "json" produce lo stesso array di classification_results.json,
+    chiuso solo a fine job; "jsonl" scrive un oggetto per riga. In ripresa il
+    file viene troncato all'ultima posizione salvata nel checkpoint, scartando
+    i risultati scritti dopo.
+    """
+
+    def __init__(self, path: str, output_format: str, resume_offset: Optional[int] = None,
+                 written: int = 0):
+        self.output_format = output_format
+        self.written = written
+
+        if resume_offset is None:
+            self.file = open(path, "wb")
+            if output_format == "json":
+                self.file.write(b"[\n")
+        else:
+            self.file = open(path, "r+b")
+            self.file.truncate(resume_offset)
+            self.file.seek(resume_offset)
+
+    def write(self, records: list):
+        """Aggiunge un blocco di risultati"""
+        parts = []
+        for record in records:
+            if self.output_format == "json":
+                dumped = json.dumps(record, ensure_ascii=False, indent=2)
+                parts.append((",\n" if self.written else "") + "  " + dumped.replace("\n", "\n  "))
+            else:
+                parts.append(json.dumps(record, ensure_ascii=False) + "\n")
+            self.written += 1
+        self.file.write("".join(parts).encode("utf-8"))
+
+    def sync(self) -> int:
+        """Porta i dati su disco e restituisce la posizione corrente (per il checkpoint)"""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return self.file.tell()
+
+    def close(self, complete: bool = True):
+        """Chiude il file, terminando l'array JSON se il job è completo"""
+        if complete and self.output_format == "json":
+            self.file.write(b"\n]\n")
+        self.file.close()
+
+
+def load_checkpoint(path: str) -> Optional[dict]:
+    """Legge un checkpoint, o None se assente"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_checkpoint(path: str, state: dict):
+    """Salva il checkpoint in modo atomico"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def classify_file(classifier, input_path: str, output_path: str,
+                  input_format: Optional[str] = None, output_format: Optional[str] = None,
+                  text_field: str = "title", id_field: str = "id", chunk_size: int = 1024,
+                  checkpoint_path: Optional[str] = None, resume: bool = True) -> dict:
+    """
+    Classifica un file di testi scrivendo i risultati in modo incrementale
+
+    Args:
+        classifier: AITextClassifier addestrato
+        input_path: File JSONL o CSV da classificare
+        output_path: File dei risultati
+        input_format: "jsonl" o "csv" (default: dall'estensione)
+        output_format: "json" o "jsonl" (default: dall'estensione)
+        text_field: Campo contenente il testo da classificare
+        id_field: Campo contenente l'identificativo del record
+        chunk_size: Testi letti e classificati per blocco
+        checkpoint_path: File di checkpoint (default: output_path + ".checkpoint")
+        resume: Se True riprende da un checkpoint esistente
+
+    Returns:
+        Statistiche del job (record classificati, ripresi, secondi)
+
+    Raises:
+        ValueError: Se il checkpoint non corrisponde a questo job
+    """
+    input_format = input_format or detect_format(input_path, INPUT_FORMATS)
+    output_format = output_format or detect_format(output_path, OUTPUT_FORMATS)
+    checkpoint_path = checkpoint_path or output_path + ".checkpoint"
+    job = {
+        "input": os.path.abspath(input_path),
+        "output_format": output_format,
+        "text_field": text_field,
+        "model_version": classifier.model_manager.model_version,
+    }
+
+    state = load_checkpoint(checkpoint_path) if resume else None
+    if state is not None:
+        if any(state.get(key) != value for key, value in job.items()):
+            raise ValueError(
+                f"Il checkpoint {checkpoint_path} appartiene a un altro job o a un'altra "
+                "versione del modello: rilanciare con --restart"
+            )
+        print(f"Ripresa da checkpoint: {state['records']} record già classificati")
+        writer = ResultWriter(output_path, output_format, state["output_offset"], state["records"])
+    else:
+        state = dict(job, records=0)
+        writer = ResultWriter(output_path, output_format)
+
+    resumed = state["records"]
+    start = time.perf_counter()
+    completed = False
+    try:
+        records = read_records(input_path, input_format, text_field, id_field, skip=resumed)
+        while True:
+            chunk = [record for _, record in zip(range(chunk_size), records)]
+            if not chunk:
+                break
+
+            results = classifier.classify_batch([text for _, text in chunk], return_confidence=True)
+            writer.write([
+                {
+                    "id": record_id,
+                    "title": text,
+                    "category": category,
+                    "confidence": confidence,
+                    "confidence_level": confidence_level(confidence),
+                }
+                for (record_id, text), (category, confidence) in zip(chunk, results)
+            ])
+
+            state["records"] += len(chunk)
+            state["output_offset"] = writer.sync()
+            save_checkpoint(checkpoint_path, state)
+
+            elapsed = time.perf_counter() - start
+            print(f"{state['records']} record classificati "
+                  f"({(state['records'] - resumed) / elapsed:.1f} testi/s)")
+        completed = True
+    finally:
+        writer.close(complete=completed)
+
+    # Job completo: il checkpoint non serve più
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return {
+        "records": state["records"],
+        "resumed": resumed,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def cmd_classify_file(args) -> int:
+    """Esegue il comando classify-file"""
+    # Import locale: torch e transformers servono solo ai comandi di inferenza
+    from .core.classifier import get_shared_classifier
+
+    classifier = get_shared_classifier(auto_train=False)
+    if not classifier.is_trained:
+        print("Modello non addestrato: eseguire prima il training")
+        return 1
+
+    if args.workers > 0:
+        # Fork dei worker prima di qualsiasi inferenza nel processo principale
+        classifier.use_worker_pool(args.workers, args.threads_per_worker)
+    try:
+        stats = classify_file(
+            classifier, args.input, args.output,
+            input_format=args.input_format,
+            output_format=args.output_format,
+            text_field=args.text_field,
+            id_field=args.id_field,
+            chunk_size=args.chunk_size,
+            checkpoint_path=args.checkpoint,
+            resume=not args.restart,
+        )
+    except ValueError as e:
+        print(f"Errore: {e}")
+        return 1
+    finally:
+        classifier.close_worker_pool()
+
+    print(f"Completato: {stats['records']} record in {args.output} "
+          f"({stats['records'] - stats['resumed']} in {stats['seconds']:.1f} s)")
+    return 0
+
+
+def cmd_distill(args) -> int:
+    """Esegue il comando distill"""
+    from .core.distillation import distill_model
+    from .data.training_data import ALL_TRAINING_DATA
+
+    unlabeled = []
+    if args.unlabeled:
+        try:
+            input_format = args.input_format or detect_format(args.unlabeled, INPUT_FORMATS)
+        except ValueError as e:
+            print(f"Errore: {e}")
+            return 1
+        unlabeled = [
+            text for _, text in read_records(args.unlabeled, input_format, text_field=args.text_field)
+            if isinstance(text, str) and text.strip()
+        ]
+
+    try:
+        report = distill_model(
+            ALL_TRAINING_DATA, unlabeled,
+            output_dir=args.output,
+            num_layers=args.layers,
+            prune=False if args.no_prune else None,
+            num_epochs=args.epochs,
+        )
+    except ValueError as e:
+        print(f"Errore: {e}")
+        return 1
+
+    teacher, student = report["teacher"], report["student"]
+    print(f"\n{'':<10}{'layer':>7}{'vocab':>9}{'MB':>8}{'ms/testo':>10}{'accuratezza':>13}")
+    for name, metrics, layers, vocab in (
+        ("teacher", teacher, teacher["n_layers"], teacher["vocab_size"]),
+        ("studente", student, report["num_layers"], report["vocab_size"]),
+    ):
+        accuracy = f"{metrics['accuracy']:.1%}" if metrics["accuracy"] is not None else "-"
+        print(f"{name:<10}{layers:>7}{vocab:>9}{metrics['size_mb']:>8.1f}"
+              f"{metrics['ms_per_text']:>10.2f}{accuracy:>13}")
+    if report["agreement"] is not None:
+        print(f"Accordo studente/teacher su {report['eval_texts']} testi: {report['agreement']:.1%}")
+    print("Per usarlo impostare MODEL_PATHS['trained_model'] e MODEL_PATHS['tokenizer'] "
+          "alla cartella dello studente")
+    return 0
+
+
+def cmd_publish_model(args) -> int:
+    """Esegue il comando publish-model"""
+    from .core.versions import publish_version
+
+    try:
+        version = publish_version(
+            model_path=args.model,
+            tokenizer_path=args.tokenizer or args.model,
+            version=args.name,
+            activate=args.activate,
+        )
+    except ValueError as e:
+        print(f"Errore: {e}")
+        return 1
+
+    print(f"Versione pubblicata: {version}" + (" (attiva)" if args.activate else ""))
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Costruisce il parser dei comandi"""
+    parser = argparse.ArgumentParser(prog="ai-classification", description="AI Classification")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    classify = subparsers.add_parser(
+        "classify-file", help="Classifica offline un file JSONL/CSV con checkpoint"
+    )
+    classify.add_argument("input", help="File di input (.jsonl o .csv)")
+    classify.add_argument("output", help="File dei risultati (.json o .jsonl)")
+    classify.add_argument("--input-format", choices=INPUT_FORMATS)
+    classify.add_argument("--output-format", choices=OUTPUT_FORMATS)
+    classify.add_argument("--text-field", default="title", help="Campo con il testo (default: title)")
+    classify.add_argument("--id-field", default="id", help="Campo con l'identificativo (default: id)")
+    classify.add_argument("--chunk-size", type=int, default=1024, help="Testi per blocco e checkpoint")
+    classify.add_argument("--workers", type=int, default=0, help="Processi di inferenza (0 = in-process)")
+    classify.add_argument("--threads-per-worker", type=int, default=1)
+    classify.add_argument("--checkpoint", help="File di checkpoint (default: <output>.checkpoint)")
+    classify.add_argument("--restart", action="store_true", help="Ignora il checkpoint e ricomincia")
+    classify.set_defaults(func=cmd_classify_file)
+
+    distill = subparsers.add_parser(
+        "distill", help="Distilla il modello addestrato in uno studente più piccolo"
+    )
+    distill.add_argument("--output", help="Cartella dello studente (default: MODEL_PATHS['distilled_model'])")
+    distill.add_argument("--layers", type=int, help="Layer dello studente (default: DISTILLATION_CONFIG)")
+    distill.add_argument("--epochs", type=int, help="Epoche di training (default: DISTILLATION_CONFIG)")
+    distill.add_argument("--no-prune", action="store_true", help="Mantiene il vocabolario completo")
+    distill.add_argument("--unlabeled", help="Testi non etichettati aggiuntivi (.jsonl o .csv)")
+    distill.add_argument("--input-format", choices=INPUT_FORMATS)
+    distill.add_argument("--text-field", default="title", help="Campo con il testo (default: title)")
+    distill.set_defaults(func=cmd_distill)
+
+    publish = subparsers.add_parser(
+        "publish-model", help="Pubblica il modello in una cartella versionata per il server"
+    )
+    publish.add_argument("--model", help="Cartella del modello (default: MODEL_PATHS['trained_model'])")
+    publish.add_argument("--tokenizer", help="Cartella del tokenizer (default: quella del modello, "
+                                             "o MODEL_PATHS['tokenizer'] senza --model)")
+    publish.add_argument("--name", help="Nome della versione (default: data e ora)")
+    publish.add_argument("--activate", action="store_true",
+                         help="Rende attiva la versione (il server la carica a caldo)")
+    publish.set_defaults(func=cmd_publish_model)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
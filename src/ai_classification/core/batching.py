@@ -0,0 +1,67 @@
+"""
+Pianificazione dei batch per l'inferenza con bucketing per lunghezza
+"""
+from typing import List, Optional, Sequence
+
+
+def plan_token_batches(lengths: Sequence[int],
+                       max_tokens: Optional[int] = None,
+                       max_batch_size: Optional[int] = None) -> List[List[int]]:
+    """
+    Raggruppa i testi in batch ordinati per lunghezza in token
+
+    I testi vengono ordinati per numero di token e accumulati in un batch
+    finché il costo con padding (numero di testi * lunghezza massima del
+    batch) resta entro max_tokens. In questo modo i titoli brevi non vengono
+    paddati alla lunghezza di un articolo lungo.
+
+    Args:
+        lengths: Numero di token di ciascun testo
+        max_tokens: Budget di token (padding incluso) per batch.
+                    Se None, i batch hanno dimensione fissa e ordine originale
+        max_batch_size: Numero massimo di testi per batch (None = illimitato)
+
+    Returns:
+        Lista di batch, ciascuno come lista di indici nei testi originali
+    """
+    if max_batch_size is not None and max_batch_size < 1:
+        raise ValueError("max_batch_size deve essere almeno 1")
+
+    if max_tokens is None:
+        size = max_batch_size or max(len(lengths), 1)
+        indices = list(range(len(lengths)))
+        return [indices[start:start + size] for start in range(0, len(indices), size)]
+
+    if max_tokens < 1:
+        raise ValueError("max_tokens deve essere almeno 1")
+
+    # Ordinamento stabile per lunghezza: testi simili finiscono nello stesso batch
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+
+    batches = []
+    current = []
+    current_max = 0
+    for i in order:
+        length = max(int(lengths[i]), 1)
+        new_max = max(current_max, length)
+        too_many_tokens = (len(current) + 1) * new_max > max_tokens
+        too_many_items = max_batch_size is not None and len(current) >= max_batch_size
+
+        if current and (too_many_tokens or too_many_items):
+            batches.append(current)
+            current = []
+            new_max = length
+
+        # Un testo più lungo del budget forma comunque un batch da solo
+        current.append(i)
+        current_max = new_max
+
+    if current:
+        batches.append(current)
+
+    return batches
+
+
+def padded_token_count(lengths: Sequence[int], batches: List[List[int]]) -> int:
+    """Restituisce il numero di token elaborati (padding incluso) per un piano di batch"""
+    return sum(len(batch) * max(lengths[i] for i in batch) for batch in batches if batch)
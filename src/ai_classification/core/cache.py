@@ -0,0 +1,93 @@
+"""
+Cache delle predizioni con eviction LRU e scadenza TTL
+"""
+import hashlib
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+def normalize_text(text: str) -> str:
+    """Normalizza un testo per la chiave di cache (Unicode NFC, spazi compattati)"""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class PredictionCache:
+    """
+    Cache in-process delle predizioni del classificatore
+
+    La chiave è l'hash del testo normalizzato e della versione del modello:
+    le voci calcolate con un modello precedente non vengono mai restituite.
+    Le voci più vecchie di ttl_seconds scadono e, oltre max_size voci, viene
+    eliminata quella usata meno di recente. Thread-safe.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: Optional[float] = 3600):
+        """
+        Args:
+            max_size: Numero massimo di voci in cache
+            ttl_seconds: Durata di una voce in secondi (None = nessuna scadenza)
+        """
+        if max_size < 1:
+            raise ValueError("max_size deve essere almeno 1")
+
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(text: str, model_version: str) -> str:
+        """Calcola la chiave di cache per un testo e una versione del modello"""
+        payload = f"{model_version}\0{normalize_text(text)}".encode("utf-8")
+        return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Restituisce il valore associato alla chiave, o None se assente o scaduto"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, stored_at = entry
+                if self.ttl_seconds is None or time.monotonic() - stored_at < self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: Any):
+        """Inserisce un valore eliminando la voce usata meno di recente se piena"""
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Svuota la cache (ad esempio dopo il salvataggio di un nuovo modello)"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_stats(self) -> dict:
+        """Restituisce contatori di hit/miss e occupazione della cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
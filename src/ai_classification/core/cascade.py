@@ -0,0 +1,227 @@
+"""
+Cascata a uscita anticipata per l'inferenza torch
+
+Il primo stadio esegue solo gli embedding e i primi N layer transformer del
+modello addestrato, seguiti da una testa di classificazione dedicata. I testi
+con confidenza sotto la soglia proseguono dagli stati nascosti del layer N con
+i soli layer rimanenti e la testa del modello completo; gli altri ricevono
+subito il risultato del primo stadio.
+
+I layer del primo stadio sono gli stessi moduli del modello completo (nessuna
+copia dei pesi): l'unico parametro aggiuntivo è la testa, addestrata sulle
+rappresentazioni congelate del token [CLS] dopo il layer N.
+"""
+import copy
+import threading
+import time
+
+import torch
+from torch import nn
+from transformers import AutoModel
+
+
+class EarlyExitHead(nn.Module):
+    """Testa di classificazione con la stessa struttura di quella di DistilBERT"""
+
+    def __init__(self, dim: int, num_labels: int, dropout: float = 0.2):
+        super().__init__()
+        self.pre_classifier = nn.Linear(dim, dim)
+        self.classifier = nn.Linear(dim, num_labels)
+        self.dropout = nn.Dropout(dropout)
+
+    def forward(self, features):
+        hidden = torch.relu(self.pre_classifier(features))
+        return self.classifier(self.dropout(hidden))
+
+
+class _PassThroughEmbeddings(nn.Module):
+    """Sostituisce gli embedding del secondo stadio: riceve già gli stati nascosti"""
+
+    def forward(self, input_ids=None, inputs_embeds=None, *args, **kwargs):
+        return inputs_embeds
+
+
+class EarlyExitCascade:
+    """
+    Primo stadio leggero (primi N layer + testa) davanti al modello completo
+
+    Le statistiche (testi, escalation, tempo per stadio) sono cumulative e
+    protette da lock: predict_probabilities può essere chiamato da più thread.
+    """
+
+    def __init__(self, model, exit_layer: int, threshold: float = 0.9):
+        """
+        Args:
+            model: Modello DistilBertForSequenceClassification addestrato
+            exit_layer: Numero di layer transformer eseguiti dal primo stadio
+            threshold: Confidenza minima per non passare al modello completo
+        """
+        config = model.config
+        if not hasattr(model, "distilbert"):
+            raise ValueError(f"Cascata supportata solo per DistilBERT, non per {config.model_type}")
+        if not 0 < exit_layer < config.n_layers:
+            raise ValueError(f"exit_layer deve essere compreso fra 1 e {config.n_layers - 1}")
+
+        self.exit_layer = exit_layer
+        self.threshold = threshold
+        layers = model.distilbert.transformer.layer
+        self.encoder = self._build_encoder(model, layers[:exit_layer], model.distilbert.embeddings)
+        # Secondo stadio: layer rimanenti applicati agli stati nascosti del primo
+        self.remaining = self._build_encoder(model, layers[exit_layer:], _PassThroughEmbeddings())
+        self.head = EarlyExitHead(config.dim, config.num_labels, config.seq_classif_dropout)
+        # Partenza dalla testa del modello completo: stessa struttura, pesi già sensati
+        self.head.pre_classifier.load_state_dict(self._float_state(model.pre_classifier))
+        self.head.classifier.load_state_dict(self._float_state(model.classifier))
+        self.head.to(next(self.encoder.parameters(), torch.empty(0)).device)
+        self.head.eval()
+
+        self._lock = threading.Lock()
+        self.total = 0
+        self.escalated = 0
+        self.batches = 0
+        self.early_seconds = 0.0
+        self.full_seconds = 0.0
+
+    @staticmethod
+    def _build_encoder(model, layers, embeddings):
+        """DistilBertModel con i layer indicati, condivisi con il modello completo"""
+        config = copy.deepcopy(model.config)
+        config.n_layers = len(layers)
+        # Struttura vuota sul device "meta": i moduli reali vengono dal modello completo
+        with torch.device("meta"):
+            encoder = AutoModel.from_config(config)
+        encoder.embeddings = embeddings
+        encoder.transformer.layer = nn.ModuleList(layers)
+        encoder.eval()
+        return encoder
+
+    @staticmethod
+    def _float_state(module) -> dict:
+        """Pesi fp32 di un layer lineare (anche se quantizzato int8)"""
+        weight = module.weight() if callable(module.weight) else module.weight
+        bias = module.bias() if callable(module.bias) else module.bias
+        if weight.is_quantized:
+            weight = weight.dequantize()
+        return {"weight": weight.detach().float(), "bias": bias.detach().float()}
+
+    def hidden_states(self, inputs: dict) -> torch.Tensor:
+        """Stati nascosti di tutti i token dopo il layer di uscita"""
+        with torch.no_grad():
+            return self.encoder(
+                input_ids=inputs["input_ids"], attention_mask=inputs["attention_mask"]
+            ).last_hidden_state
+
+    def features(self, inputs: dict) -> torch.Tensor:
+        """Rappresentazione del token [CLS] dopo il layer di uscita"""
+        return self.hidden_states(inputs)[:, 0].float()
+
+    def early_probabilities(self, inputs: dict) -> torch.Tensor:
+        """Probabilità softmax del solo primo stadio"""
+        features = self.features(inputs)
+        with torch.no_grad():
+            return torch.softmax(self.head(features), dim=-1)
+
+    def predict_probabilities(self, inputs: dict, model) -> torch.Tensor:
+        """
+        Probabilità della cascata per un batch già tokenizzato e sul device
+
+        Le righe sotto soglia sono sostituite con le probabilità del modello
+        completo: i loro stati nascosti dopo il layer di uscita proseguono nei
+        soli layer rimanenti e nella testa di classificazione di model, senza
+        ripetere embedding e primi layer.
+        """
+        start = time.perf_counter()
+        hidden = self.hidden_states(inputs)
+        with torch.no_grad():
+            probabilities = torch.softmax(self.head(hidden[:, 0].float()), dim=-1)
+        escalate = (probabilities.max(dim=-1).values < self.threshold).nonzero().squeeze(-1)
+        early_done = time.perf_counter()
+
+        if len(escalate):
+            attention_mask = inputs["attention_mask"][escalate]
+            # Padding ridotto alla lunghezza massima delle sole righe escalate
+            length = int(attention_mask.sum(dim=-1).max())
+            with torch.no_grad():
+                hidden = self.remaining(
+                    inputs_embeds=hidden[escalate, :length], attention_mask=attention_mask[:, :length]
+                ).last_hidden_state
+                logits = self._classify(model, hidden[:, 0])
+            probabilities[escalate] = torch.softmax(logits.float(), dim=-1)
+        full_done = time.perf_counter()
+
+        with self._lock:
+            self.total += len(probabilities)
+            self.escalated += len(escalate)
+            self.batches += 1
+            self.early_seconds += early_done - start
+            self.full_seconds += full_done - early_done
+        return probabilities
+
+    @staticmethod
+    def _classify(model, pooled: torch.Tensor) -> torch.Tensor:
+        """Testa di classificazione del modello completo sul token [CLS]"""
+        hidden = torch.relu(model.pre_classifier(pooled))
+        return model.classifier(model.dropout(hidden))
+
+    def train_head(self, features: torch.Tensor, labels: torch.Tensor, epochs: int = 20,
+                   learning_rate: float = 1e-3, batch_size: int = 32):
+        """
+        Addestra la testa su feature precalcolate con features()
+
+        L'encoder resta congelato: ogni epoca costa solo due layer lineari.
+        """
+        device = next(self.head.parameters()).device
+        features, labels = features.to(device), labels.to(device)
+        optimizer = torch.optim.AdamW(self.head.parameters(), lr=learning_rate)
+        generator = torch.Generator().manual_seed(42)
+
+        self.head.train()
+        for _ in range(epochs):
+            for batch in torch.randperm(len(labels), generator=generator).split(batch_size):
+                batch = batch.to(device)
+                loss = nn.functional.cross_entropy(self.head(features[batch]), labels[batch])
+                optimizer.zero_grad()
+                loss.backward()
+                optimizer.step()
+        self.head.eval()
+
+    def save(self, path: str, model_version: str):
+        """Salva la testa con il layer di uscita e la versione del modello da cui deriva"""
+        torch.save({
+            "model_version": model_version,
+            "exit_layer": self.exit_layer,
+            "head": {k: v.cpu() for k, v in self.head.state_dict().items()},
+        }, path)
+        print(f"Testa della cascata salvata in: {path}")
+
+    @staticmethod
+    def read_artifact(path: str) -> dict:
+        """Legge un file salvato con save()"""
+        return torch.load(path, map_location="cpu", weights_only=True)
+
+    def load_head(self, artifact: dict):
+        """Carica i pesi della testa da un artefatto letto con read_artifact()"""
+        self.head.load_state_dict(artifact["head"])
+        self.head.eval()
+
+    def reset_stats(self):
+        """Azzera le statistiche cumulative"""
+        with self._lock:
+            self.total = self.escalated = self.batches = 0
+            self.early_seconds = self.full_seconds = 0.0
+
+    def get_stats(self) -> dict:
+        """Tasso di escalation e latenza media per stadio"""
+        with self._lock:
+            batches = self.batches or 1
+            return {
+                "exit_layer": self.exit_layer,
+                "threshold": self.threshold,
+                "total": self.total,
+                "escalated": self.escalated,
+                "escalation_rate": self.escalated / self.total if self.total else 0.0,
+                "early_ms_per_batch": self.early_seconds * 1000 / batches,
+                "full_ms_per_batch": self.full_seconds * 1000 / batches,
+                "ms_per_text": (self.early_seconds + self.full_seconds) * 1000 / self.total
+                if self.total else 0.0,
+            }
@@ -3,10 +3,13 @@ Classificatore AI per testi - Modulo principale
 """
 import os
 import sys
-from typing import Tuple, Optional
+from typing import List, Tuple, Optional
 from .model_utils import ModelManager
-from ..data.training_data import ALL_TRAINING_DATA
-from .config import CATEGORIES
+from .cache import PredictionCache
+from .prefilter import HashedNgramFilter
+from .registry import ClassifierRegistry
+from .results import Prediction, FALLBACK_PREDICTION
+from .config import CATEGORIES, CATEGORY_IDS, CACHE_CONFIG, INFERENCE_CONFIG, PREFILTER_CONFIG, MODEL_PATHS
 
 class AITextClassifier:
     """
@@ -23,16 +26,29 @@ class AITextClassifier:
     - ALTRO (per testi non AI)
     """
     
-    def __init__(self, auto_train: bool = True):
+    def __init__(self, auto_train: bool = True, model_paths: Optional[dict] = None):
         """
         Inizializza il classificatore
         
         Args:
             auto_train: Se True, addestra automaticamente il modello se non esiste
+            model_paths: Percorsi del modello (default: MODEL_PATHS), ad esempio
+                         quelli di una versione in MODEL_PATHS["versions_dir"]
         """
-        self.model_manager = ModelManager()
+        self.model_manager = ModelManager(model_paths)
+        self.paths = self.model_manager.paths
+        # Esegue le predizioni: il ModelManager stesso o un InferenceWorkerPool
+        self.predictor = self.model_manager
         self.is_trained = False
         
+        # Cache delle predizioni per i testi ripetuti
+        self.cache = None
+        if CACHE_CONFIG["enabled"]:
+            self.cache = PredictionCache(
+                max_size=CACHE_CONFIG["max_size"],
+                ttl_seconds=CACHE_CONFIG["ttl_seconds"]
+            )
+        
         # Carica o crea il modello
         model_exists = self.model_manager.load_or_create_model()
         
@@ -41,6 +57,11 @@ class AITextClassifier:
             self.train()
         
         self.is_trained = model_exists or auto_train
+        
+        # Pre-filtro opzionale: i testi chiaramente ALTRO non passano dal modello
+        self.prefilter = None
+        if PREFILTER_CONFIG["enabled"]:
+            self._load_prefilter()
     
     def classify(self, text: str, return_confidence: bool = False) -> str | Tuple[str, float]:
         """
@@ -62,20 +83,11 @@ class AITextClassifier:
         if not self.is_trained:
             raise ValueError("Il modello non è stato addestrato. Chiamare train() prima di classify()")
         
-        try:
-            # Predizione
-            predicted_class, confidence = self.model_manager.predict(text.strip())
-            category = CATEGORIES[predicted_class]
-            
-            if return_confidence:
-                return category, confidence
-            else:
-                return category
-                
-        except Exception as e:
-            print(f"Errore durante la classificazione: {e}")
-            # Fallback per errori
-            return ("ALTRO", 0.0) if return_confidence else "ALTRO"
+        prediction = self.predict_records([text.strip()])[0]
+        if return_confidence:
+            return prediction.category, prediction.confidence
+        else:
+            return prediction.category
     
     def classify_batch(self, texts: list[str], return_confidence: bool = False) -> list:
         """
@@ -88,18 +100,124 @@ class AITextClassifier:
         Returns:
             Lista delle categorie predette (opzionalmente con confidenze)
         """
-        results = []
-        for text in texts:
-            try:
-                result = self.classify(text, return_confidence)
-                results.append(result)
-            except Exception as e:
-                print(f"Errore nel classificare '{text[:50]}...': {e}")
-                fallback = ("ALTRO", 0.0) if return_confidence else "ALTRO"
-                results.append(fallback)
+        predictions = self.predict_records(texts)
+        if return_confidence:
+            return [(p.category, p.confidence) for p in predictions]
+        return [p.category for p in predictions]
+    
+    def predict_records(self, texts: list, return_probabilities: bool = False,
+                        top_k: Optional[int] = None) -> List[Prediction]:
+        """
+        Classifica una lista di testi restituendo record Prediction
+        
+        Ogni record contiene indice e nome della categoria e la confidenza
+        (più le probabilità per classe o le k classi migliori se richieste).
+        I testi non validi e gli errori di inferenza producono il record di
+        ripiego ALTRO. Con il pre-filtro attivo i testi sicuramente ALTRO
+        ricevono il risultato senza passare dal modello (non quando sono
+        richieste probabilità o top-k, che necessitano del modello).
+        
+        Args:
+            texts: Lista di testi da classificare
+            return_probabilities: Se True, include le probabilità per classe
+            top_k: Se indicato, include le k classi più probabili con le probabilità
+            
+        Returns:
+            Lista di Prediction allineata a texts
+        """
+        results = [FALLBACK_PREDICTION] * len(texts)
+        
+        # Scarta i testi non validi mantenendo la posizione originale
+        valid_indices = []
+        valid_texts = []
+        for i, text in enumerate(texts):
+            if not isinstance(text, str) or not text.strip():
+                print(f"Errore nel classificare '{str(text)[:50]}...': Il testo non può essere vuoto")
+                continue
+            valid_indices.append(i)
+            valid_texts.append(text.strip())
+        
+        if not valid_texts:
+            return results
+        
+        if not self.is_trained:
+            print("Errore nella classificazione batch: il modello non è stato addestrato")
+            return results
+        
+        if self.prefilter is not None and not return_probabilities and not top_k:
+            altro_mask, altro_probabilities = self.prefilter.filter(valid_texts)
+            if altro_mask.any():
+                for i, is_altro, probability in zip(valid_indices, altro_mask, altro_probabilities):
+                    if is_altro:
+                        results[i] = Prediction(CATEGORY_IDS["ALTRO"], "ALTRO", float(probability))
+                valid_indices = [i for i, is_altro in zip(valid_indices, altro_mask) if not is_altro]
+                valid_texts = [t for t, is_altro in zip(valid_texts, altro_mask) if not is_altro]
+                if not valid_texts:
+                    return results
+        
+        try:
+            predictions = self._predict_cached(valid_texts, return_probabilities, top_k)
+        except Exception as e:
+            # Fallback: classificazione testo per testo per isolare gli errori
+            print(f"Errore nella predizione batch, fallback per singolo testo: {e}")
+            for i, text in zip(valid_indices, valid_texts):
+                results[i] = self._predict_single(text, return_probabilities, top_k)
+            return results
+        
+        for i, prediction in zip(valid_indices, predictions):
+            results[i] = prediction
         
         return results
     
+    def _predict_single(self, text: str, return_probabilities: bool = False,
+                        top_k: Optional[int] = None) -> Prediction:
+        """Predice un singolo testo già validato, con ripiego su ALTRO in caso di errore"""
+        try:
+            return self._predict_cached([text], return_probabilities, top_k)[0]
+        except Exception as e:
+            print(f"Errore durante la classificazione: {e}")
+            return FALLBACK_PREDICTION
+    
+    def _predict_cached(self, texts: list, return_probabilities: bool = False,
+                        top_k: Optional[int] = None) -> List[Prediction]:
+        """
+        Predice i testi usando la cache per quelli già visti
+        
+        Solo i testi non presenti in cache passano dal modello; le nuove
+        predizioni vengono poi memorizzate con la versione corrente del modello.
+        Le richieste con probabilità per classe o top-k non usano la cache.
+        """
+        if self.cache is None or return_probabilities or top_k:
+            return self._predict_uncached(texts, return_probabilities, top_k)
+        
+        model_version = self.model_manager.model_version
+        keys = [self.cache.make_key(text, model_version) for text in texts]
+        cached = [self.cache.get(key) for key in keys]
+        
+        missing = [i for i, entry in enumerate(cached) if entry is None]
+        if missing:
+            predictions = self._predict_uncached([texts[i] for i in missing])
+            for i, prediction in zip(missing, predictions):
+                cached[i] = prediction
+                self.cache.put(keys[i], prediction)
+        
+        return cached
+    
+    def _predict_uncached(self, texts: list, return_probabilities: bool = False,
+                          top_k: Optional[int] = None) -> List[Prediction]:
+        """Esegue il modello e converte gli array risultanti in record Prediction"""
+        outputs = iter(self.predictor.predict_batch(
+            texts, return_probabilities=return_probabilities, top_k=top_k
+        ))
+        predicted_classes, confidences = next(outputs), next(outputs)
+        probabilities = next(outputs) if return_probabilities else [None] * len(texts)
+        tops = zip(next(outputs), next(outputs)) if top_k else [None] * len(texts)
+        
+        return [
+            Prediction.from_class(int(c), float(conf), probs, top)
+            for c, conf, probs, top in zip(predicted_classes, confidences, probabilities, tops)
+        ]
+    
     def train(self, custom_data: Optional[list] = None):
         """
         Addestra il modello
@@ -108,7 +226,12 @@ class AITextClassifier:
             custom_data: Dati personalizzati nel formato [(testo, categoria_id), ...]
                         Se None, usa i dati predefiniti
         """
-        training_data = custom_data if custom_data is not None else ALL_TRAINING_DATA
+        if custom_data is not None:
+            training_data = custom_data
+        else:
+            # Import locale: i dati di training non servono per l'inferenza
+            from ..data.training_data import ALL_TRAINING_DATA
+            training_data = ALL_TRAINING_DATA
         
         print(f"Training con {len(training_data)} esempi...")
         print("Categorie:", {v: k for k, v in CATEGORIES.items()})
@@ -116,6 +239,12 @@ class AITextClassifier:
         try:
             self.model_manager.train_model(training_data)  
             self.is_trained = True
+            if PREFILTER_CONFIG["enabled"]:
+                self.train_prefilter(training_data)
+            
+            # Le predizioni in cache appartengono al modello precedente
+            if self.cache is not None:
+                self.cache.clear()
             print("Training completato con successo!")
             
         except Exception as e:
@@ -123,6 +252,68 @@ class AITextClassifier:
             self.is_trained = False
             raise e
     
+    def _load_prefilter(self):
+        """Carica il pre-filtro salvato, addestrandolo se manca"""
+        try:
+            if os.path.exists(self.paths["prefilter"]):
+                self.prefilter = HashedNgramFilter.load(
+                    self.paths["prefilter"], threshold=PREFILTER_CONFIG["threshold"]
+                )
+            else:
+                print("Pre-filtro non trovato. Avvio training del pre-filtro...")
+                self.train_prefilter()
+        except Exception as e:
+            # Il pre-filtro è solo un'ottimizzazione: senza, tutto passa dal modello
+            print(f"Pre-filtro non disponibile, disattivato: {e}")
+            self.prefilter = None
+    
+    def train_prefilter(self, training_data: Optional[list] = None) -> HashedNgramFilter:
+        """
+        Addestra e salva il pre-filtro ALTRO / non ALTRO
+        
+        Args:
+            training_data: Dati nel formato [(testo, categoria_id), ...]
+                           Se None, usa i dati predefiniti
+        """
+        if training_data is None:
+            from ..data.training_data import ALL_TRAINING_DATA
+            training_data = ALL_TRAINING_DATA
+        
+        prefilter = HashedNgramFilter(
+            num_buckets=PREFILTER_CONFIG["num_buckets"],
+            ngram_range=PREFILTER_CONFIG["ngram_range"],
+            threshold=PREFILTER_CONFIG["threshold"]
+        )
+        prefilter.train(
+            [text for text, _ in training_data],
+            [category == CATEGORY_IDS["ALTRO"] for _, category in training_data],
+            epochs=PREFILTER_CONFIG["epochs"],
+            learning_rate=PREFILTER_CONFIG["learning_rate"]
+        )
+        os.makedirs(os.path.dirname(self.paths["prefilter"]), exist_ok=True)
+        prefilter.save(self.paths["prefilter"])
+        self.prefilter = prefilter
+        return prefilter
+    
+    def use_worker_pool(self, num_workers: int, threads_per_worker: int = 1):
+        """
+        Distribuisce le predizioni su più processi che condividono i pesi del modello
+        
+        Args:
+            num_workers: Numero di processi worker
+            threads_per_worker: Thread torch per ciascun worker
+        """
+        from .worker_pool import InferenceWorkerPool
+        
+        self.close_worker_pool()
+        self.predictor = InferenceWorkerPool(self.model_manager, num_workers, threads_per_worker)
+    
+    def close_worker_pool(self):
+        """Termina l'eventuale pool di processi e torna all'inferenza in-process"""
+        if self.predictor is not self.model_manager:
+            self.predictor.close()
+            self.predictor = self.model_manager
+    
     def get_categories(self) -> dict:
         """Restituisce il dizionario delle categorie disponibili"""
         return CATEGORIES.copy()
@@ -133,7 +324,11 @@ class AITextClassifier:
             "categories": self.get_categories(),
             "is_trained": self.is_trained,
             "device": str(self.model_manager.device),
-            "memory_usage": self.model_manager.get_memory_usage()
+            "memory_usage": self.model_manager.get_memory_usage(),
+            "model_version": self.model_manager.model_version,
+            "cache": self.cache.get_stats() if self.cache is not None else None,
+            "prefilter": self.prefilter.get_stats() if self.prefilter is not None else None,
+            "cascade": self.model_manager.cascade.get_stats() if self.model_manager.cascade is not None else None
         }
         return info
     
@@ -142,6 +337,22 @@ class AITextClassifier:
         self.model_manager.cleanup()
         print("Memoria GPU pulita")
 
+# Classificatori condivisi dalle funzioni di utility e dagli script
+_shared_classifiers = ClassifierRegistry(idle_timeout=INFERENCE_CONFIG["shared_idle_timeout"])
+
+def get_shared_classifier(auto_train: bool = True) -> AITextClassifier:
+    """
+    Restituisce il classificatore condiviso per il modello e il device configurati
+    
+    Il modello viene caricato alla prima chiamata; le successive riusano la
+    stessa istanza (anche da thread diversi).
+    
+    Args:
+        auto_train: Passato ad AITextClassifier se l'istanza va creata
+    """
+    key = (os.path.abspath(MODEL_PATHS["trained_model"]), str(ModelManager.default_device()))
+    return _shared_classifiers.get(key, lambda: AITextClassifier(auto_train=auto_train))
+
 # Funzioni di utility per uso esterno
 def quick_classify(text: str) -> str:
     """
@@ -153,8 +364,7 @@ def quick_classify(text: str) -> str:
     Returns:
         Categoria predetta
     """
-    classifier = AITextClassifier()
-    return classifier.classify(text)
+    return get_shared_classifier().classify(text)
 
 def classify_with_confidence(text: str) -> Tuple[str, float]:
     """
@@ -166,5 +376,4 @@ def classify_with_confidence(text: str) -> Tuple[str, float]:
     Returns:
         Tupla (categoria, confidenza)
     """
-    classifier = AITextClassifier()
-    return classifier.classify(text, return_confidence=True)
\ No newline at end of file
+    return get_shared_classifier().classify(text, return_confidence=True)
\ No newline at end of file
@@ -14,6 +14,10 @@ CATEGORIES = {
     7: "AI Medica"
 }
 
+# Tabelle di lookup precalcolate per il percorso di inferenza
+CATEGORY_NAMES = tuple(CATEGORIES[i] for i in range(len(CATEGORIES)))  # id -> nome
+CATEGORY_IDS = {name: class_id for class_id, name in CATEGORIES.items()}  # nome -> id
+
 # Configurazioni del modello
 MODEL_CONFIG = {
     "base_model": "distilbert-base-multilingual-cased",  # Modello più semplice
@@ -26,6 +30,84 @@ MODEL_CONFIG = {
     "gradient_accumulation_steps": 2
 }
 
+# Configurazioni di inferenza
+INFERENCE_CONFIG = {
+    "batch_size": 32,  # Numero massimo di testi per forward pass in predict_batch
+    "length_bucketing": True,  # Raggruppa i testi per lunghezza per ridurre il padding
+    "max_tokens_per_batch": 4096,  # Budget di token (padding incluso) per forward pass
+    "quantization": None,  # None (fp32) oppure "dynamic_int8" per inferenza quantizzata su CPU
+    "backend": "torch",  # "torch" oppure "onnx" (ONNX Runtime, richiede pip install .[onnx])
+    "use_snapshot": True,  # Avvio rapido da snapshot safetensors + tokenizer.json
+    "mmap_weights": True,  # Pesi dello snapshot mappati dal file (condivisi fra processi via page cache)
+    "shared_idle_timeout": None,  # Secondi dopo cui il classificatore condiviso inattivo viene rilasciato (None = mai)
+    "stage_metrics": True  # Istogrammi di latenza per fase (tokenize, forward, softmax...) esposti su /metrics
+}
+
+# Cache delle predizioni
+CACHE_CONFIG = {
+    "enabled": True,  # Evita il forward pass per testi già classificati
+    "max_size": 10000,  # Numero massimo di testi in cache (eviction LRU)
+    "ttl_seconds": 3600  # Durata di una voce in secondi (None = nessuna scadenza)
+}
+
+# Pre-filtro per i testi chiaramente non AI (ALTRO), prima del transformer
+PREFILTER_CONFIG = {
+    "enabled": False,  # Regressione logistica su n-grammi di caratteri hashati
+    "threshold": 0.95,  # Probabilità ALTRO minima per saltare il modello
+    "num_buckets": 2 ** 18,  # Dimensione del vettore di feature hashate
+    "ngram_range": (3, 5),  # Lunghezze degli n-grammi di caratteri
+    "epochs": 100,  # Iterazioni di training (discesa del gradiente a batch completo)
+    "learning_rate": 2.0
+}
+
+# Cascata a uscita anticipata (solo backend torch): primi N layer + testa dedicata,
+# il modello completo solo per i testi con confidenza sotto soglia
+CASCADE_CONFIG = {
+    "enabled": False,
+    "exit_layer": 2,  # Layer transformer eseguiti dal primo stadio (DistilBERT ne ha 6)
+    "threshold": 0.9,  # Confidenza minima del primo stadio per non passare al modello completo
+    "epochs": 20,  # Epoche di training della testa (encoder congelato)
+    "learning_rate": 1e-3,
+    "batch_size": 32
+}
+
+# Distillazione in un modello studente più piccolo (comando "ai-classification distill")
+DISTILLATION_CONFIG = {
+    "num_layers": 3,  # Layer transformer dello studente, inizializzati da layer equidistanti del teacher
+    "prune_vocabulary": True,  # Vocabolario ridotto ai token del corpus (più i caratteri latini)
+    "temperature": 2.0,  # Ammorbidisce le distribuzioni del teacher
+    "alpha": 0.5,  # Peso della loss sul teacher rispetto a quella sulle etichette
+    "num_epochs": 5,
+    "learning_rate": 5e-5,
+    "batch_size": 16,
+    "eval_fraction": 0.2  # Quota dei dati etichettati esclusa dal training, per il report
+}
+
+# Configurazioni del server API
+SERVER_CONFIG = {
+    "microbatch_enabled": True,  # Unisce le richieste /predict concorrenti in un unico batch
+    "microbatch_max_size": 32,  # Numero massimo di richieste per batch
+    "microbatch_max_wait_ms": 5,  # Attesa massima prima di eseguire un batch incompleto
+    "inference_threads": 1,  # Thread dedicati all'inferenza (fuori dall'event loop)
+    "max_pending_requests": 64,  # Oltre questa soglia le richieste ricevono subito 503
+    "worker_processes": 0,  # Processi di inferenza con pesi condivisi (0 = in-process)
+    "threads_per_worker": 1,  # Thread torch per ciascun processo di inferenza
+    "stream_batch_size": 64,  # Testi per batch interno di /predict_stream
+    "model_watch_interval": 0,  # Secondi fra i controlli di versions_dir/CURRENT (0 = solo endpoint admin)
+    "reload_drain_timeout": 30,  # Attesa massima delle richieste in corso sulla versione precedente
+    "admin_token": None  # Richiesto nell'header X-Admin-Token degli endpoint /admin (None = solo da localhost)
+}
+
+# Profilazione su richiesta di ModelManager.predict_batch (vedi core/profiling.py;
+# le variabili d'ambiente AI_CLASSIFICATION_PROFILE* hanno la precedenza)
+PROFILING_CONFIG = {
+    "mode": None,  # None (disattivata), "cprofile" oppure "torch"
+    "next_calls": 0,  # Profila le prossime N chiamate
+    "sample_rate": 0.0,  # Profila questa frazione delle chiamate
+    "max_profiles": 100,  # Profili scritti dopo cui la profilazione si disattiva
+    "output_dir": "./profiles"
+}
+
 # Configurazioni hardware
 DEVICE_CONFIG = {
     "device": "cuda",
@@ -37,7 +119,14 @@ DEVICE_CONFIG = {
 MODEL_PATHS = {
     "model_dir": "./models",
     "trained_model": "./models/ai_classifier_model",
-    "tokenizer": "./models/ai_classifier_tokenizer"
+    "tokenizer": "./models/ai_classifier_tokenizer",
+    "quantized_model": "./models/ai_classifier_model_int8.pt",
+    "onnx_model": "./models/ai_classifier_model.onnx",
+    "snapshot": "./models/ai_classifier_snapshot",
+    "prefilter": "./models/ai_classifier_prefilter.npz",
+    "cascade_head": "./models/ai_classifier_cascade_head.pt",
+    "distilled_model": "./models/ai_classifier_distilled",
+    "versions_dir": "./models/versions"  # Versioni pubblicate per il server (ricaricamento a caldo)
 }
 
 # Configurazioni di training
@@ -46,5 +135,6 @@ TRAINING_CONFIG = {
     "shuffle_seed": 42,    # Seed per riproducibilità del shuffle
     "drop_last_batch": False,  # Non elimina l'ultimo batch se incompleto
     "pin_memory": False,   # Disabilita pin_memory per ridurre uso RAM
-    "dataloader_num_workers": 0  # Numero di worker per dataloader (0 = main thread)
+    "dataloader_num_workers": 0,  # Numero di worker per dataloader (0 = main thread)
+    "group_by_length": True  # Batch di training con testi di lunghezza simile (padding dinamico)
 }
@@ -0,0 +1,295 @@
+"""
+Distillazione del modello addestrato in uno studente più piccolo
+
+Il teacher è il modello salvato da train_model. Lo studente ha meno layer
+transformer (inizializzati da layer equidistanti del teacher) e, se richiesto,
+un vocabolario ridotto ai token che compaiono nel corpus: la matrice degli
+embedding del modello multilingue è la parte più grande dei pesi.
+
+Lo studente viene salvato con il suo tokenizer nello stesso formato del
+modello addestrato: puntando MODEL_PATHS["trained_model"] e
+MODEL_PATHS["tokenizer"] alla sua cartella, ModelManager lo carica al posto
+del teacher.
+"""
+import copy
+import json
+import os
+import random
+import time
+from typing import List, Optional, Sequence
+
+import numpy as np
+import torch
+from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+from .batching import plan_token_batches
+from .config import DISTILLATION_CONFIG, INFERENCE_CONFIG, MODEL_CONFIG, MODEL_PATHS
+
+
+def prune_vocabulary(tokenizer, texts: Sequence[str]) -> List[int]:
+    """
+    Id del vocabolario da conservare per un corpus
+
+    Si conservano i token usati dal corpus, tutti gli id fino all'ultimo token
+    speciale (così gli id speciali non cambiano) e i caratteri latini singoli,
+    anche come continuazione "##": ogni parola in alfabeto latino resta
+    rappresentabile senza [UNK]. Per i testi del corpus la tokenizzazione
+    WordPiece è identica a quella del vocabolario completo.
+
+    Returns:
+        Id del vocabolario originale in ordine crescente
+    """
+    keep = set(range(max(tokenizer.all_special_ids) + 1))
+    for ids in tokenizer(list(texts), add_special_tokens=False)["input_ids"]:
+        keep.update(ids)
+    for token, token_id in tokenizer.get_vocab().items():
+        char = token[2:] if token.startswith("##") else token
+        if len(char) == 1 and ord(char) < 0x250:
+            keep.add(token_id)
+    return sorted(keep)
+
+
+def save_pruned_tokenizer(tokenizer, kept_ids: Sequence[int], output_dir: str):
+    """
+    Salva il tokenizer con il solo vocabolario indicato
+
+    Il nuovo id di ogni token è la sua posizione in kept_ids. Si modifica il
+    vocabolario WordPiece di tokenizer.json (e vocab.txt, se presente): il
+    resto della configurazione resta quello del tokenizer originale.
+    """
+    vocab = tokenizer.convert_ids_to_tokens(list(kept_ids))
+    tokenizer.save_pretrained(output_dir)
+
+    tokenizer_file = os.path.join(output_dir, "tokenizer.json")
+    with open(tokenizer_file, encoding="utf-8") as f:
+        backend = json.load(f)
+    if backend["model"]["type"] != "WordPiece":
+        raise ValueError(f"Riduzione del vocabolario non supportata per {backend['model']['type']}")
+    backend["model"]["vocab"] = {token: new_id for new_id, token in enumerate(vocab)}
+    with open(tokenizer_file, "w", encoding="utf-8") as f:
+        json.dump(backend, f, ensure_ascii=False)
+
+    vocab_file = os.path.join(output_dir, "vocab.txt")
+    if os.path.exists(vocab_file):
+        with open(vocab_file, "w", encoding="utf-8") as f:
+            f.write("\n".join(vocab) + "\n")
+
+
+def build_student(teacher, num_layers: int, kept_ids: Optional[Sequence[int]] = None):
+    """
+    Crea lo studente copiando i pesi del teacher
+
+    Args:
+        teacher: Modello DistilBertForSequenceClassification addestrato
+        num_layers: Layer dello studente, presi equidistanti dal teacher
+        kept_ids: Righe della matrice degli embedding da conservare (None = tutte)
+    """
+    config = copy.deepcopy(teacher.config)
+    if not 0 < num_layers <= config.n_layers:
+        raise ValueError(f"num_layers deve essere compreso fra 1 e {config.n_layers}")
+    selected = [int(i) for i in np.linspace(0, config.n_layers - 1, num_layers).round()]
+    config.n_layers = num_layers
+    if kept_ids is not None:
+        config.vocab_size = len(kept_ids)
+
+    state = {}
+    layer_prefix = "distilbert.transformer.layer."
+    for name, value in teacher.state_dict().items():
+        if name.startswith(layer_prefix):
+            index, rest = name[len(layer_prefix):].split(".", 1)
+            if int(index) not in selected:
+                continue
+            name = f"{layer_prefix}{selected.index(int(index))}.{rest}"
+        elif name == "distilbert.embeddings.word_embeddings.weight" and kept_ids is not None:
+            value = value[torch.as_tensor(kept_ids)]
+        state[name] = value.detach().clone()
+
+    student = AutoModelForSequenceClassification.from_config(config)
+    student.load_state_dict(state)
+    return student
+
+
+def predict_probabilities(model, tokenizer, texts: Sequence[str], device) -> np.ndarray:
+    """Probabilità per classe con il bucketing per lunghezza di ModelManager.predict_batch"""
+    encodings = tokenizer(list(texts), truncation=True, max_length=MODEL_CONFIG["max_length"])
+    lengths = [len(ids) for ids in encodings["input_ids"]]
+    probabilities = np.empty((len(texts), model.config.num_labels), dtype=np.float32)
+    model.eval()
+    for batch_indices in plan_token_batches(
+        lengths, max_tokens=INFERENCE_CONFIG["max_tokens_per_batch"],
+        max_batch_size=INFERENCE_CONFIG["batch_size"]
+    ):
+        inputs = tokenizer.pad(
+            {k: [encodings[k][i] for i in batch_indices] for k in encodings.keys()},
+            padding=True, return_tensors="pt"
+        )
+        with torch.no_grad():
+            logits = model(**{k: v.to(device) for k, v in inputs.items()}).logits
+        probabilities[batch_indices] = torch.softmax(logits.float(), dim=-1).cpu().numpy()
+    return probabilities
+
+
+def train_student(student, tokenizer, texts: Sequence[str], teacher_probabilities: np.ndarray,
+                  labels: Sequence[Optional[int]], device, num_epochs: int = 5,
+                  learning_rate: float = 5e-5, batch_size: int = 16,
+                  temperature: float = 2.0, alpha: float = 0.5):
+    """
+    Addestra lo studente sulle distribuzioni del teacher e sulle etichette
+
+    La loss è alpha * KL(teacher || studente) a temperatura T (scalata per T²)
+    più (1 - alpha) * cross-entropy sulle etichette; i testi non etichettati
+    (etichetta None) contribuiscono solo al primo termine.
+    """
+    encodings = tokenizer(list(texts), truncation=True, max_length=MODEL_CONFIG["max_length"])
+    teacher_log = torch.log(torch.as_tensor(teacher_probabilities).clamp_min(1e-8))
+    targets = torch.tensor([-100 if label is None else label for label in labels])
+
+    steps = num_epochs * ((len(texts) + batch_size - 1) // batch_size)
+    optimizer = torch.optim.AdamW(student.parameters(), lr=learning_rate)
+    scheduler = torch.optim.lr_scheduler.LambdaLR(optimizer, lambda step: 1 - step / max(steps, 1))
+    generator = torch.Generator().manual_seed(42)
+
+    student.to(device)
+    student.train()
+    for epoch in range(num_epochs):
+        total_loss = 0.0
+        for batch in torch.randperm(len(texts), generator=generator).split(batch_size):
+            inputs = tokenizer.pad(
+                {k: [encodings[k][i] for i in batch.tolist()] for k in encodings.keys()},
+                padding=True, return_tensors="pt"
+            )
+            logits = student(**{k: v.to(device) for k, v in inputs.items()}).logits
+            soft_loss = torch.nn.functional.kl_div(
+                torch.log_softmax(logits / temperature, dim=-1),
+                torch.log_softmax(teacher_log[batch].to(device) / temperature, dim=-1),
+                log_target=True, reduction="batchmean"
+            ) * temperature ** 2
+            loss = alpha * soft_loss
+            batch_targets = targets[batch].to(device)
+            if (batch_targets >= 0).any():
+                loss = loss + (1 - alpha) * torch.nn.functional.cross_entropy(
+                    logits, batch_targets, ignore_index=-100
+                )
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            scheduler.step()
+            total_loss += loss.item() * len(batch)
+        print(f"Epoca {epoch + 1}/{num_epochs}: loss {total_loss / len(texts):.4f}")
+    student.eval()
+
+
+def _directory_size_mb(path: str) -> float:
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path) for name in names
+    ) / 1024 ** 2
+
+
+def _measure(model, tokenizer, texts, labels, device, repeats: int = 3) -> dict:
+    """Accuratezza, ms per testo e numero di parametri di un modello"""
+    probabilities = predict_probabilities(model, tokenizer, texts, device)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        predict_probabilities(model, tokenizer, texts, device)
+    ms_per_text = (time.perf_counter() - start) * 1000 / (len(texts) * repeats) if texts else 0.0
+    predictions = probabilities.argmax(axis=-1)
+    return {
+        "parameters": sum(p.numel() for p in model.parameters()),
+        "accuracy": float((predictions == np.asarray(labels)).mean()) if len(texts) else None,
+        "ms_per_text": ms_per_text,
+        "predictions": predictions,
+    }
+
+
+def distill_model(training_data, unlabeled_texts: Sequence[str] = (), output_dir: Optional[str] = None,
+                  num_layers: Optional[int] = None, prune: Optional[bool] = None,
+                  num_epochs: Optional[int] = None, device=None) -> dict:
+    """
+    Distilla il modello addestrato in MODEL_PATHS["trained_model"]
+
+    Una quota dei dati etichettati (DISTILLATION_CONFIG["eval_fraction"]) è
+    esclusa dal training dello studente e usata per il report; gli altri
+    testi, etichettati e non, sono classificati una volta dal teacher.
+
+    Args:
+        training_data: Dati nel formato [(testo, categoria_id), ...]
+        unlabeled_texts: Testi aggiuntivi senza etichetta
+        output_dir: Cartella dello studente (default: MODEL_PATHS["distilled_model"])
+        num_layers: Layer dello studente (default: DISTILLATION_CONFIG["num_layers"])
+        prune: Riduce il vocabolario (default: DISTILLATION_CONFIG["prune_vocabulary"])
+        num_epochs: Epoche di training (default: DISTILLATION_CONFIG["num_epochs"])
+        device: Device di training (default: cuda se disponibile)
+
+    Returns:
+        Report con dimensione, latenza e accuratezza di teacher e studente,
+        salvato anche in <output_dir>/distillation_report.json
+    """
+    output_dir = output_dir or MODEL_PATHS["distilled_model"]
+    num_layers = num_layers or DISTILLATION_CONFIG["num_layers"]
+    prune = DISTILLATION_CONFIG["prune_vocabulary"] if prune is None else prune
+    num_epochs = num_epochs or DISTILLATION_CONFIG["num_epochs"]
+    device = torch.device(device or ("cuda" if torch.cuda.is_available() else "cpu"))
+    if not os.path.exists(MODEL_PATHS["trained_model"]):
+        raise ValueError("Modello addestrato non trovato: eseguire prima il training.")
+
+    print("Caricamento del teacher...")
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_PATHS["tokenizer"])
+    teacher = AutoModelForSequenceClassification.from_pretrained(MODEL_PATHS["trained_model"]).to(device)
+
+    data = list(training_data)
+    random.Random(42).shuffle(data)
+    n_eval = int(len(data) * DISTILLATION_CONFIG["eval_fraction"])
+    eval_data, train_data = data[:n_eval], data[n_eval:]
+    texts = [text for text, _ in train_data] + list(unlabeled_texts)
+    labels = [label for _, label in train_data] + [None] * len(unlabeled_texts)
+
+    print(f"Predizioni del teacher su {len(texts)} testi ({len(unlabeled_texts)} non etichettati)...")
+    teacher_probabilities = predict_probabilities(teacher, tokenizer, texts, device)
+
+    kept_ids = None
+    os.makedirs(output_dir, exist_ok=True)
+    if prune:
+        kept_ids = prune_vocabulary(tokenizer, texts + [text for text, _ in eval_data])
+        save_pruned_tokenizer(tokenizer, kept_ids, output_dir)
+        print(f"Vocabolario ridotto da {len(tokenizer)} a {len(kept_ids)} token")
+    else:
+        tokenizer.save_pretrained(output_dir)
+    student_tokenizer = AutoTokenizer.from_pretrained(output_dir)
+
+    student = build_student(teacher, num_layers, kept_ids)
+    print(f"Training dello studente ({num_layers} layer) per {num_epochs} epoche...")
+    train_student(
+        student, student_tokenizer, texts, teacher_probabilities, labels, device,
+        num_epochs=num_epochs,
+        learning_rate=DISTILLATION_CONFIG["learning_rate"],
+        batch_size=DISTILLATION_CONFIG["batch_size"],
+        temperature=DISTILLATION_CONFIG["temperature"],
+        alpha=DISTILLATION_CONFIG["alpha"]
+    )
+    student.save_pretrained(output_dir)
+
+    # Il report usa lo studente riletto dal disco, come lo caricherebbe ModelManager
+    student = AutoModelForSequenceClassification.from_pretrained(output_dir).to(device)
+    student_tokenizer = AutoTokenizer.from_pretrained(output_dir)
+    eval_texts = [text for text, _ in eval_data]
+    eval_labels = [label for _, label in eval_data]
+    teacher_metrics = _measure(teacher, tokenizer, eval_texts, eval_labels, device)
+    student_metrics = _measure(student, student_tokenizer, eval_texts, eval_labels, device)
+    agreement = teacher_metrics.pop("predictions") == student_metrics.pop("predictions")
+
+    report = {
+        "num_layers": num_layers,
+        "vocab_size": student.config.vocab_size,
+        "train_texts": len(texts),
+        "unlabeled_texts": len(unlabeled_texts),
+        "eval_texts": n_eval,
+        "teacher": dict(teacher_metrics, size_mb=_directory_size_mb(MODEL_PATHS["trained_model"]),
+                        n_layers=teacher.config.n_layers, vocab_size=teacher.config.vocab_size),
+        "student": dict(student_metrics, size_mb=_directory_size_mb(output_dir)),
+        "agreement": float(agreement.mean()) if n_eval else None,
+    }
+    with open(os.path.join(output_dir, "distillation_report.json"), "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Studente salvato in: {output_dir}")
+    return report
@@ -0,0 +1,235 @@
+"""
+Metriche di latenza per fase nel formato testuale di Prometheus
+
+Istogrammi a bucket fissi senza dipendenze esterne: un'osservazione costa
+una ricerca binaria e un incremento sotto lock, quindi la strumentazione
+può restare attiva in produzione. Le metriche sono globali al processo;
+con il pool di worker (worker_processes > 0) le fasi del modello sono
+eseguite nei processi figli e non compaiono qui.
+"""
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+from .config import INFERENCE_CONFIG
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Bucket in secondi: da 0.5 ms (softmax, tokenizzazione di pochi testi) a 10 s
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Testi per forward pass
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+# Token per forward pass, padding incluso
+BATCH_TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+
+# Attivabile/disattivabile a runtime (ad esempio per misurare l'overhead)
+enabled = INFERENCE_CONFIG["stage_metrics"]
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """Contatore monotono, opzionalmente con etichette"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, labels: Tuple[str, ...] = ()):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels: Tuple[str, ...] = ()) -> float:
+        with self._lock:
+            return self._values.get(labels, 0)
+
+    def render(self) -> str:
+        with self._lock:
+            values = sorted(self._values.items())
+        return format_metric(
+            self.name, "counter", self.documentation,
+            [(dict(zip(self.labelnames, labels)), value) for labels, value in values]
+        )
+
+
+class Histogram:
+    """Istogramma cumulativo a bucket fissi, opzionalmente con etichette"""
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float],
+                 labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self.labelnames = tuple(labelnames)
+        # Per combinazione di etichette: [conteggi per bucket (+Inf in coda), somma]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: Tuple[str, ...] = ()):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def snapshot(self, labels: Tuple[str, ...] = ()) -> Tuple[int, float]:
+        """Numero di osservazioni e somma per una combinazione di etichette"""
+        with self._lock:
+            series = self._series.get(labels)
+            return (sum(series[0]), series[1]) if series is not None else (0, 0.0)
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> str:
+        with self._lock:
+            series = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._series.items())
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total) in series:
+            label_dict = dict(zip(self.labelnames, labels))
+            lines.extend(_histogram_lines(self.name, label_dict, self.buckets, counts, total))
+        return "\n".join(lines) + "\n"
+
+
+def _histogram_lines(name: str, labels: dict, buckets: Sequence[float], counts: Sequence[int],
+                     total: float) -> list:
+    lines = []
+    cumulative = 0
+    for bound, count in zip(tuple(buckets) + (float("inf"),), counts):
+        cumulative += count
+        lines.append(f"{name}_bucket{_format_labels({**labels, 'le': _format_value(bound)})} {cumulative}")
+    lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+    lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+    return lines
+
+
+def format_metric(name: str, metric_type: str, documentation: str,
+                  samples: Iterable[Tuple[Dict[str, str], float]]) -> str:
+    """Formatta una metrica (counter o gauge) con i suoi campioni"""
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {metric_type}"]
+    lines.extend(f"{name}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples)
+    return "\n".join(lines) + "\n"
+
+
+def format_distribution(name: str, documentation: str, distribution: Dict[int, int],
+                        buckets: Sequence[float]) -> str:
+    """
+    Formatta come istogramma una distribuzione già raccolta {valore: occorrenze}
+
+    Serve per le statistiche tenute altrove (ad esempio le dimensioni dei
+    batch del coalescer): il costo è solo al momento della lettura.
+    """
+    buckets = tuple(sorted(buckets))
+    counts = [0] * (len(buckets) + 1)
+    total = 0
+    for value, occurrences in distribution.items():
+        counts[bisect.bisect_left(buckets, value)] += occurrences
+        total += value * occurrences
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} histogram"]
+    lines.extend(_histogram_lines(name, {}, buckets, counts, total))
+    return "\n".join(lines) + "\n"
+
+
+# Metriche del percorso di inferenza
+STAGE_SECONDS = Histogram(
+    "ai_classification_stage_duration_seconds",
+    "Durata delle fasi di inferenza (parse, tokenize, pad, forward, softmax, serialize)",
+    LATENCY_BUCKETS, labelnames=("stage",)
+)
+BATCH_SIZE = Histogram(
+    "ai_classification_forward_batch_size",
+    "Testi per forward pass del modello",
+    BATCH_SIZE_BUCKETS
+)
+BATCH_TOKENS = Histogram(
+    "ai_classification_forward_batch_tokens",
+    "Token per forward pass del modello, padding incluso",
+    BATCH_TOKEN_BUCKETS
+)
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """Misura la durata del blocco come fase di inferenza"""
+    if not enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, (stage,))
+
+
+def observe_batch(size: int, padded_tokens: int):
+    """Registra dimensione e token di un forward pass"""
+    if enabled:
+        BATCH_SIZE.observe(size)
+        BATCH_TOKENS.observe(padded_tokens)
+
+
+def process_rss_bytes() -> Optional[int]:
+    """Memoria residente del processo (picco se /proc non è disponibile)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is not None:
+        # ru_maxrss è in KB su Linux e in byte su macOS
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss if os.uname().sysname == "Darwin" else maxrss * 1024
+    return None
+
+
+def process_metrics() -> str:
+    """Metriche standard process_* di Prometheus (memoria, CPU, thread)"""
+    times = os.times()
+    parts = [
+        format_metric("process_cpu_seconds_total", "counter", "Tempo CPU utente e di sistema del processo",
+                      [({}, times.user + times.system)]),
+        format_metric("process_threads", "gauge", "Thread attivi dell'interprete",
+                      [({}, threading.active_count())]),
+    ]
+    rss = process_rss_bytes()
+    if rss is not None:
+        parts.insert(0, format_metric("process_resident_memory_bytes", "gauge",
+                                      "Memoria residente del processo", [({}, rss)]))
+    return "".join(parts)
+
+
+def render_metrics(*extra: str) -> str:
+    """Tutte le metriche del processo più quelle aggiuntive già formattate"""
+    return "".join(
+        [STAGE_SECONDS.render(), BATCH_SIZE.render(), BATCH_TOKENS.render(), *extra, process_metrics()]
+    )
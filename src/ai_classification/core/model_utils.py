@@ -2,27 +2,55 @@
 Utilities per la gestione dei modelli AI
 """
 import os
-import torch
+import sys
 import gc
-from transformers import (
-    AutoTokenizer, 
-    AutoModelForSequenceClassification,
-    TrainingArguments,
-    Trainer,
-    EarlyStoppingCallback
-)
-from datasets import Dataset
-from sklearn.metrics import accuracy_score, precision_recall_fscore_support
 import numpy as np
-from .config import MODEL_CONFIG, DEVICE_CONFIG, MODEL_PATHS, CATEGORIES, TRAINING_CONFIG
+from .config import (
+    MODEL_CONFIG, DEVICE_CONFIG, MODEL_PATHS, CATEGORIES, TRAINING_CONFIG, INFERENCE_CONFIG, CASCADE_CONFIG
+)
+from .batching import padded_token_count, plan_token_batches
+from .metrics import observe_batch, process_rss_bytes, stage_timer
+from .profiling import get_profiler
+from .results import top_k_probabilities
+from .onnx_backend import FastTokenizer, OnnxBackend, export_onnx, read_onnx_version
+
+# Le dipendenze di training (Trainer, datasets, sklearn) sono importate solo
+# in train_model: il percorso di inferenza non le carica mai. torch e
+# transformers sono importati solo nei percorsi del backend torch, così il
+# backend ONNX serve le richieste senza caricarli.
 
 class ModelManager:
     """Gestisce caricamento, training e salvataggio dei modelli"""
     
-    def __init__(self):
-        self.device = torch.device(DEVICE_CONFIG["device"] if torch.cuda.is_available() else "cpu")
+    def __init__(self, paths=None):
+        """
+        Args:
+            paths: Percorsi di modello e artefatti derivati, con le stesse
+                   chiavi di MODEL_PATHS (default: MODEL_PATHS), ad esempio
+                   quelli di una versione (vedi versions.version_paths)
+        """
+        self.paths = MODEL_PATHS if paths is None else paths
+        # Backend di inferenza: "torch" oppure "onnx" (ONNX Runtime su CPU)
+        self.backend = INFERENCE_CONFIG["backend"]
+        self.device = self.default_device(self.backend)
         self.model = None
         self.tokenizer = None
+        # Identifica i pesi caricati (usata ad esempio come parte delle chiavi di cache)
+        self.model_version = None
+        # Modalità di quantizzazione per l'inferenza (None = fp32)
+        self.quantization = INFERENCE_CONFIG["quantization"]
+        self.onnx_backend = None
+        # True se i pesi sono viste in sola lettura su un file mappato in memoria
+        self.weights_mmapped = False
+        # Cascata a uscita anticipata (None = sempre modello completo)
+        self.cascade = None
+        # Profilazione su richiesta delle chiamate a predict_batch (condivisa dal processo)
+        self.profiler = get_profiler()
+        
+        if self.backend == "onnx":
+            return
+        
+        import torch
         
         # Ottimizzazioni per GPU con memoria limitata
         if torch.cuda.is_available():
@@ -31,23 +59,53 @@ class ModelManager:
             if DEVICE_CONFIG["mixed_precision"]:
                 torch.backends.cudnn.benchmark = True
     
+    @staticmethod
+    def default_device(backend=None):
+        """
+        Device configurato, o la CPU se CUDA non è disponibile
+        
+        Con il backend ONNX (solo CPU) restituisce "cpu" senza importare torch.
+        """
+        if (backend or INFERENCE_CONFIG["backend"]) == "onnx":
+            return "cpu"
+        import torch
+        
+        return torch.device(DEVICE_CONFIG["device"] if torch.cuda.is_available() else "cpu")
+    
     def load_or_create_model(self):
         """Carica un modello esistente o ne crea uno nuovo"""
         try:
             # Prova a caricare un modello già addestrato
-            if os.path.exists(MODEL_PATHS["trained_model"]):
-                print("Caricamento modello addestrato...")
-                self.model = AutoModelForSequenceClassification.from_pretrained(
-                    MODEL_PATHS["trained_model"]
-                )
-                self.tokenizer = AutoTokenizer.from_pretrained(
-                    MODEL_PATHS["tokenizer"]
-                )
+            if os.path.exists(self.paths["trained_model"]):
+                self.model_version = self._saved_model_version()
+                
+                if self.backend == "onnx":
+                    self._load_onnx_backend()
+                else:
+                    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+                    
+                    use_int8 = self.quantization == "dynamic_int8" and self.device.type == "cpu"
+                    if not use_int8 and INFERENCE_CONFIG["use_snapshot"]:
+                        self._load_from_snapshot()
+                    else:
+                        self.tokenizer = AutoTokenizer.from_pretrained(
+                            self.paths["tokenizer"]
+                        )
+                        if use_int8:
+                            self._load_quantized_model()
+                        else:
+                            print("Caricamento modello addestrato...")
+                            self.model = AutoModelForSequenceClassification.from_pretrained(
+                                self.paths["trained_model"]
+                            )
             else:
                 print("Creazione nuovo modello...")
                 self._create_new_model()
                 
-            self.model.to(self.device)
+            if self.model is not None:
+                self.model.to(self.device)
+            if CASCADE_CONFIG["enabled"] and self.model_version.startswith("trained:"):
+                self._load_cascade()
             return True
             
         except Exception as e:
@@ -56,9 +114,130 @@ class ModelManager:
             self._create_new_model()
             return False
     
+    def _load_from_snapshot(self):
+        """
+        Carica modello e tokenizer dallo snapshot, creandolo se manca o se è obsoleto
+        
+        Il primo avvio dopo un training passa da from_pretrained e scrive lo
+        snapshot; gli avvii successivi leggono direttamente i pesi safetensors.
+        Con INFERENCE_CONFIG["mmap_weights"] i pesi sono mappati dal file e
+        condivisi tramite page cache fra repliche e worker sullo stesso host.
+        """
+        from transformers import AutoTokenizer, AutoModelForSequenceClassification
+        from .snapshot import load_snapshot, read_snapshot_version, save_snapshot
+        
+        snapshot_path = self.paths["snapshot"]
+        
+        if read_snapshot_version(snapshot_path) == self.model_version:
+            try:
+                print("Caricamento snapshot del modello...")
+                mmap_weights = INFERENCE_CONFIG["mmap_weights"]
+                self.model, self.tokenizer = load_snapshot(snapshot_path, self.device, mmap_weights)
+                self.weights_mmapped = mmap_weights and self.device.type == "cpu"
+                return
+            except Exception as e:
+                print(f"Snapshot non utilizzabile ({e}), caricamento standard...")
+        
+        print("Caricamento modello addestrato...")
+        self.tokenizer = AutoTokenizer.from_pretrained(self.paths["tokenizer"])
+        self.model = AutoModelForSequenceClassification.from_pretrained(self.paths["trained_model"])
+        save_snapshot(self.model, self.tokenizer, snapshot_path, self.model_version)
+    
+    def _load_quantized_model(self):
+        """
+        Carica il modello quantizzato int8, creandolo se manca o se è obsoleto
+        
+        La quantizzazione dinamica converte in int8 i pesi dei layer lineari
+        (le attivazioni sono quantizzate a runtime). L'artefatto viene salvato
+        accanto al modello addestrato insieme alla versione da cui deriva, così
+        gli avvii successivi non ripetono la quantizzazione.
+        """
+        import torch
+        from transformers import AutoModelForSequenceClassification
+        
+        quantized_path = self.paths["quantized_model"]
+        source_version = self.model_version
+        # Le predizioni int8 differiscono da quelle fp32: versione distinta
+        self.model_version = f"{source_version}:int8"
+        
+        if os.path.exists(quantized_path):
+            try:
+                artifact = torch.load(quantized_path, map_location="cpu", weights_only=False)
+            except Exception as e:
+                print(f"Modello quantizzato non leggibile ({e}), nuova quantizzazione...")
+                artifact = {}
+            if artifact.get("model_version") == source_version:
+                print("Caricamento modello quantizzato int8...")
+                self.model = artifact["model"]
+                return
+            if artifact:
+                print("Modello quantizzato obsoleto, nuova quantizzazione...")
+        
+        print("Quantizzazione dinamica int8 del modello addestrato...")
+        model = AutoModelForSequenceClassification.from_pretrained(self.paths["trained_model"])
+        model.eval()
+        self.model = torch.ao.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+        
+        # L'artefatto è solo una cache: se non può essere scritto il modello
+        # quantizzato resta in uso e il prossimo avvio ripete la quantizzazione.
+        # Scrittura atomica: un file incompleto non sostituisce quello valido.
+        tmp_path = f"{quantized_path}.tmp"
+        try:
+            torch.save({"model_version": source_version, "model": self.model}, tmp_path)
+            os.replace(tmp_path, quantized_path)
+            print(f"Modello quantizzato salvato in: {quantized_path}")
+        except Exception as e:
+            print(f"Modello quantizzato non salvato: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    
+    def _load_onnx_backend(self):
+        """
+        Prepara il backend ONNX Runtime, esportando il modello se necessario
+        
+        L'esportazione avviene una sola volta per versione del modello; agli
+        avvii successivi torch non viene importato affatto: il tokenizer è
+        letto con FastTokenizer da tokenizer.json.
+        """
+        onnx_path = self.paths["onnx_model"]
+        try:
+            self.tokenizer = FastTokenizer.from_pretrained(self.paths["tokenizer"])
+        except FileNotFoundError:
+            # Tokenizer salvato senza tokenizer.json: serve transformers
+            from transformers import AutoTokenizer
+            
+            print("tokenizer.json non presente, caricamento del tokenizer con transformers...")
+            self.tokenizer = AutoTokenizer.from_pretrained(self.paths["tokenizer"])
+        
+        if read_onnx_version(onnx_path) != self.model_version:
+            print("Esportazione del modello addestrato in ONNX...")
+            self.export_onnx_model()
+        
+        print("Caricamento modello ONNX...")
+        self.onnx_backend = OnnxBackend(onnx_path)
+        self.model = None
+    
+    def export_onnx_model(self):
+        """Esporta il modello addestrato in self.paths["onnx_model"]"""
+        if self.model is None:
+            from transformers import AutoModelForSequenceClassification
+            
+            model = AutoModelForSequenceClassification.from_pretrained(self.paths["trained_model"])
+            export_onnx(model, self.tokenizer, self.paths["onnx_model"], self.model_version)
+        else:
+            # L'esportazione avviene su CPU: il modello torna poi sul suo device
+            export_onnx(self.model, self.tokenizer, self.paths["onnx_model"], self.model_version)
+            self.model.to(self.device)
+    
     def _create_new_model(self):
         """Crea un nuovo modello da zero"""
+        import torch
+        from transformers import AutoTokenizer, AutoModelForSequenceClassification
+        
         print(f"Inizializzazione modello base: {MODEL_CONFIG['base_model']}")
+        self.model_version = f"base:{MODEL_CONFIG['base_model']}"
         
         self.tokenizer = AutoTokenizer.from_pretrained(
             MODEL_CONFIG["base_model"]
@@ -75,6 +254,15 @@ class ModelManager:
     
     def train_model(self, training_data):
         """Addestra il modello sui dati forniti con shuffle automatico"""
+        from transformers import (
+            TrainingArguments,
+            Trainer,
+            EarlyStoppingCallback,
+            DataCollatorWithPadding
+        )
+        from datasets import Dataset
+        import torch
+        
         print("Preparazione dati di training...")
         
         # Importa random per shuffle manuale
@@ -93,20 +281,19 @@ class ModelManager:
         texts = [item[0] for item in training_data_shuffled]
         labels = [item[1] for item in training_data_shuffled]
         
-        # Tokenizzazione
+        # Tokenizzazione senza padding: il padding avviene per batch nel collator
         encodings = self.tokenizer(
             texts,
             truncation=True,
-            padding=True,
-            max_length=MODEL_CONFIG["max_length"],
-            return_tensors="pt"
+            max_length=MODEL_CONFIG["max_length"]
         )
         
         # Crea dataset
         dataset = Dataset.from_dict({
             'input_ids': encodings['input_ids'],
             'attention_mask': encodings['attention_mask'],
-            'labels': labels
+            'labels': labels,
+            'length': [len(ids) for ids in encodings['input_ids']]
         })
           # Split train/validation con shuffle
         dataset = dataset.train_test_split(test_size=0.2, seed=42, shuffle=True)
@@ -121,7 +308,7 @@ class ModelManager:
             print(f"Dataset di training shuffled con seed {TRAINING_CONFIG['shuffle_seed']}")
           # Configurazione training con shuffle abilitato
         training_args = TrainingArguments(
-            output_dir=MODEL_PATHS["model_dir"],
+            output_dir=self.paths["model_dir"],
             num_train_epochs=MODEL_CONFIG["num_epochs"],
             per_device_train_batch_size=MODEL_CONFIG["batch_size"],
             per_device_eval_batch_size=MODEL_CONFIG["batch_size"],
@@ -141,6 +328,8 @@ class ModelManager:
             dataloader_drop_last=TRAINING_CONFIG["drop_last_batch"],  # Non elimina l'ultimo batch anche se incompleto
             dataloader_pin_memory=TRAINING_CONFIG["pin_memory"],  # Riduce uso memoria
             dataloader_num_workers=TRAINING_CONFIG["dataloader_num_workers"],  # Worker per dataloader
+            group_by_length=TRAINING_CONFIG["group_by_length"],  # Raggruppa testi di lunghezza simile
+            length_column_name="length",
         )
           # Trainer con shuffle abilitato
         trainer = Trainer(
@@ -150,7 +339,7 @@ class ModelManager:
             eval_dataset=dataset["test"],
             compute_metrics=self._compute_metrics,
             callbacks=[EarlyStoppingCallback(early_stopping_patience=3)],
-            data_collator=None,  # Usa il collator di default che supporta shuffle
+            data_collator=DataCollatorWithPadding(self.tokenizer),  # Padding dinamico per batch
         )
         
         # Training
@@ -162,6 +351,10 @@ class ModelManager:
             # Salva il modello
             self.save_model()
             
+            # La testa della cascata dipende dai pesi appena salvati
+            if CASCADE_CONFIG["enabled"]:
+                self.train_cascade(training_data_shuffled)
+            
         except Exception as e:
             print(f"Errore durante il training: {e}")
             # Pulizia memoria GPU
@@ -172,6 +365,8 @@ class ModelManager:
     
     def _compute_metrics(self, eval_pred):
         """Calcola metriche di valutazione"""
+        from sklearn.metrics import accuracy_score, precision_recall_fscore_support
+        
         predictions, labels = eval_pred
         predictions = np.argmax(predictions, axis=1)
         
@@ -189,50 +384,295 @@ class ModelManager:
     
     def save_model(self):
         """Salva il modello addestrato"""
-        os.makedirs(MODEL_PATHS["model_dir"], exist_ok=True)
+        os.makedirs(self.paths["model_dir"], exist_ok=True)
         
-        self.model.save_pretrained(MODEL_PATHS["trained_model"])
-        self.tokenizer.save_pretrained(MODEL_PATHS["tokenizer"])
+        self.model.save_pretrained(self.paths["trained_model"])
+        self.tokenizer.save_pretrained(self.paths["tokenizer"])
+        self.model_version = self._saved_model_version()
+        # L'esportazione ONNX e la testa della cascata si riferiscono ai pesi precedenti
+        self.onnx_backend = None
+        self.cascade = None
         
-        print(f"Modello salvato in: {MODEL_PATHS['trained_model']}")
+        print(f"Modello salvato in: {self.paths['trained_model']}")
+    
+    def _load_cascade(self):
+        """Attiva la cascata se la testa salvata corrisponde al modello caricato"""
+        from .cascade import EarlyExitCascade
+        
+        cascade_path = self.paths["cascade_head"]
+        try:
+            if self.model is None:
+                print("Cascata disponibile solo con il backend torch, disattivata")
+                return
+            if not os.path.exists(cascade_path):
+                print("Testa della cascata non trovata, disattivata (eseguire train_cascade)")
+                return
+            artifact = EarlyExitCascade.read_artifact(cascade_path)
+            if (artifact.get("model_version") != self._saved_model_version()
+                    or artifact.get("exit_layer") != CASCADE_CONFIG["exit_layer"]):
+                print("Testa della cascata obsoleta, disattivata (eseguire train_cascade)")
+                return
+            cascade = EarlyExitCascade(self.model, CASCADE_CONFIG["exit_layer"], CASCADE_CONFIG["threshold"])
+            cascade.load_head(artifact)
+            self._enable_cascade(cascade)
+            print(f"Cascata attiva: uscita dopo il layer {cascade.exit_layer}, soglia {cascade.threshold}")
+        except Exception as e:
+            # La cascata è solo un'ottimizzazione: senza, tutto passa dal modello completo
+            print(f"Cascata non disponibile, disattivata: {e}")
+            self.cascade = None
+    
+    def _enable_cascade(self, cascade):
+        """Usa la cascata per le predizioni successive"""
+        # Le predizioni della cascata differiscono da quelle del modello completo: versione distinta
+        base_version = self.model_version.split(":cascade")[0]
+        self.model_version = f"{base_version}:cascade{cascade.exit_layer}@{cascade.threshold}"
+        self.cascade = cascade
+    
+    def train_cascade(self, training_data, eval_fraction=0.2):
+        """
+        Addestra e salva la testa del primo stadio della cascata, poi la attiva
+        
+        L'encoder del primo stadio (embedding e primi CASCADE_CONFIG["exit_layer"]
+        layer del modello addestrato) resta congelato: le feature [CLS] sono
+        calcolate una sola volta e la testa è addestrata su di esse. Una quota
+        dei dati è esclusa dal training della testa per misurare accuratezza
+        del primo stadio, tasso di escalation e accuratezza della cascata.
+        
+        Args:
+            training_data: Dati nel formato [(testo, categoria_id), ...]
+            eval_fraction: Quota dei dati usata solo per la valutazione
+            
+        Returns:
+            Dizionario con le metriche sulla quota di valutazione
+        """
+        import random
+        import torch
+        from .cascade import EarlyExitCascade
+        
+        if self.model is None or not os.path.exists(self.paths["trained_model"]):
+            raise ValueError("La cascata richiede un modello torch addestrato e salvato.")
+        
+        self.cascade = None
+        self.model.eval()
+        cascade = EarlyExitCascade(self.model, CASCADE_CONFIG["exit_layer"], CASCADE_CONFIG["threshold"])
+        
+        data = list(training_data)
+        random.Random(TRAINING_CONFIG["shuffle_seed"]).shuffle(data)
+        n_eval = int(len(data) * eval_fraction)
+        eval_data, train_data = data[:n_eval], data[n_eval:]
+        
+        print(f"Training della testa della cascata su {len(train_data)} esempi "
+              f"(uscita dopo il layer {cascade.exit_layer})...")
+        cascade.train_head(
+            self._cascade_features(cascade, [text for text, _ in train_data]),
+            torch.tensor([label for _, label in train_data]),
+            epochs=CASCADE_CONFIG["epochs"],
+            learning_rate=CASCADE_CONFIG["learning_rate"],
+            batch_size=CASCADE_CONFIG["batch_size"]
+        )
+        
+        report = {"exit_layer": cascade.exit_layer, "threshold": cascade.threshold, "eval_examples": n_eval}
+        if eval_data:
+            eval_texts = [text for text, _ in eval_data]
+            labels = np.array([label for _, label in eval_data])
+            with torch.no_grad():
+                early = torch.softmax(cascade.head(self._cascade_features(cascade, eval_texts)), dim=-1)
+            early = early.cpu().numpy()
+            full_classes, _ = self.predict_batch(eval_texts)
+            early_classes = early.argmax(axis=-1)
+            escalate = early.max(axis=-1) < cascade.threshold
+            report.update({
+                "early_accuracy": float((early_classes == labels).mean()),
+                "full_accuracy": float((full_classes == labels).mean()),
+                "cascade_accuracy": float((np.where(escalate, full_classes, early_classes) == labels).mean()),
+                "escalation_rate": float(escalate.mean()),
+            })
+            print(f"Cascata su {n_eval} esempi di valutazione: primo stadio {report['early_accuracy']:.1%}, "
+                  f"modello completo {report['full_accuracy']:.1%}, cascata {report['cascade_accuracy']:.1%}, "
+                  f"escalation {report['escalation_rate']:.1%}")
+        
+        cascade.save(self.paths["cascade_head"], self._saved_model_version())
+        self._enable_cascade(cascade)
+        return report
+    
+    def _cascade_features(self, cascade, texts):
+        """Feature [CLS] del primo stadio per una lista di testi, in batch per lunghezza"""
+        import torch
+        
+        encodings = self.tokenizer(list(texts), truncation=True, max_length=MODEL_CONFIG["max_length"])
+        lengths = [len(ids) for ids in encodings["input_ids"]]
+        features = torch.empty((len(texts), cascade.head.pre_classifier.in_features))
+        for batch_indices in plan_token_batches(
+            lengths, max_tokens=INFERENCE_CONFIG["max_tokens_per_batch"],
+            max_batch_size=INFERENCE_CONFIG["batch_size"]
+        ):
+            inputs = self.tokenizer.pad(
+                {k: [encodings[k][i] for i in batch_indices] for k in encodings.keys()},
+                padding=True, return_tensors="pt"
+            )
+            inputs = {k: v.to(self.device) for k, v in inputs.items()}
+            features[batch_indices] = cascade.features(inputs).cpu()
+        return features
+    
+    def _saved_model_version(self):
+        """Calcola la versione del modello salvato dalla data di modifica dei suoi file"""
+        model_dir = self.paths["trained_model"]
+        mtimes = [
+            os.stat(os.path.join(model_dir, name)).st_mtime_ns
+            for name in os.listdir(model_dir)
+        ]
+        return f"trained:{max(mtimes, default=0)}"
     
     def predict(self, text):
         """Predice la categoria di un testo"""
-        if self.model is None or self.tokenizer is None:
+        predicted_classes, confidences = self.predict_batch([text])
+        return int(predicted_classes[0]), float(confidences[0])
+    
+    def predict_batch(self, texts, batch_size=None, length_bucketing=None, max_tokens_per_batch=None,
+                      return_probabilities=False, top_k=None):
+        """
+        Predice le categorie di una lista di testi con un forward pass per mini-batch
+        
+        Con il bucketing per lunghezza i testi vengono ordinati per numero di token
+        e raggruppati con un budget di token per batch, così il padding resta
+        minimo; i risultati sono poi riportati nell'ordine originale.
+        
+        Args:
+            texts: Lista di testi da classificare
+            batch_size: Numero massimo di testi per forward pass
+                        (default: INFERENCE_CONFIG["batch_size"])
+            length_bucketing: Abilita il bucketing per lunghezza
+                              (default: INFERENCE_CONFIG["length_bucketing"])
+            max_tokens_per_batch: Budget di token per batch con bucketing
+                                  (default: INFERENCE_CONFIG["max_tokens_per_batch"])
+            return_probabilities: Se True restituisce anche le probabilità per classe
+            top_k: Se indicato restituisce anche le k classi più probabili per testo
+            
+        Returns:
+            Tupla (classi predette, confidenze) come array numpy allineati a texts;
+            con return_probabilities si aggiunge la matrice (len(texts), num_labels),
+            con top_k gli array (len(texts), k) di indici e probabilità
+        """
+        with self.profiler.capture(batch_size=len(texts), model_version=self.model_version, backend=self.backend):
+            return self._predict_batch(texts, batch_size, length_bucketing, max_tokens_per_batch,
+                                       return_probabilities, top_k)
+    
+    def _predict_batch(self, texts, batch_size, length_bucketing, max_tokens_per_batch,
+                       return_probabilities, top_k):
+        if self.tokenizer is None or (self.model is None and self.onnx_backend is None):
             raise ValueError("Modello non caricato. Chiamare load_or_create_model() prima.")
         
-        # Tokenizzazione
-        inputs = self.tokenizer(
-            text,
-            return_tensors="pt",
-            truncation=True,
-            padding=True,
-            max_length=MODEL_CONFIG["max_length"]
+        batch_size = batch_size or INFERENCE_CONFIG["batch_size"]
+        if length_bucketing is None:
+            length_bucketing = INFERENCE_CONFIG["length_bucketing"]
+        max_tokens_per_batch = max_tokens_per_batch or INFERENCE_CONFIG["max_tokens_per_batch"]
+        
+        predicted_classes = np.empty(len(texts), dtype=np.int64)
+        confidences = np.empty(len(texts), dtype=np.float32)
+        results = (predicted_classes, confidences)
+        all_probabilities = None
+        if return_probabilities or top_k:
+            all_probabilities = np.empty((len(texts), MODEL_CONFIG["num_labels"]), dtype=np.float32)
+        if return_probabilities:
+            results += (all_probabilities,)
+        if len(texts) == 0:
+            return results + (top_k_probabilities(all_probabilities, top_k) if top_k else ())
+        
+        # Tokenizzazione unica senza padding per conoscere le lunghezze
+        with stage_timer("tokenize"):
+            encodings = self.tokenizer(
+                list(texts),
+                truncation=True,
+                max_length=MODEL_CONFIG["max_length"]
+            )
+        lengths = [len(ids) for ids in encodings["input_ids"]]
+        batches = plan_token_batches(
+            lengths,
+            max_tokens=max_tokens_per_batch if length_bucketing else None,
+            max_batch_size=batch_size
         )
+        capture = self.profiler.current()
+        if capture is not None:
+            # Forma del batch salvata con il profilo
+            capture.annotate(
+                tokens=sum(lengths),
+                max_tokens=max(lengths),
+                padded_tokens=padded_token_count(lengths, batches),
+                forward_passes=len(batches)
+            )
         
-        # Predizione
-        self.model.eval()
-        with torch.no_grad():
-            inputs = {k: v.to(self.device) for k, v in inputs.items()}
-            outputs = self.model(**inputs)
-            predictions = torch.nn.functional.softmax(outputs.logits, dim=-1)
-            predicted_class = torch.argmax(predictions, dim=-1).item()
-            confidence = torch.max(predictions).item()
+        if self.onnx_backend is None:
+            self.model.eval()
         
-        return predicted_class, confidence
+        for batch_indices in batches:
+            observe_batch(len(batch_indices), len(batch_indices) * max(lengths[i] for i in batch_indices))
+            # Padding alla lunghezza massima del solo batch corrente
+            probabilities = self._predict_probabilities(
+                {k: [encodings[k][i] for i in batch_indices] for k in encodings.keys()}
+            )
+            
+            # Riporta i risultati nelle posizioni originali
+            predicted_classes[batch_indices] = probabilities.argmax(axis=-1)
+            confidences[batch_indices] = probabilities.max(axis=-1)
+            if all_probabilities is not None:
+                all_probabilities[batch_indices] = probabilities
+        
+        # Gli array sono stati riempiti sul posto; il top-k è calcolato
+        # in un'unica operazione vettoriale su tutte le probabilità
+        if top_k:
+            results += top_k_probabilities(all_probabilities, top_k)
+        return results
+    
+    def _predict_probabilities(self, encodings):
+        """
+        Esegue il forward pass su un batch tokenizzato con il backend attivo
+        
+        Returns:
+            Probabilità softmax per classe come array numpy (batch, num_labels)
+        """
+        if self.onnx_backend is not None:
+            with stage_timer("pad"):
+                inputs = self.tokenizer.pad(encodings, padding=True, return_tensors="np")
+            with stage_timer("forward"):
+                logits = self.onnx_backend.predict_logits(inputs)
+            with stage_timer("softmax"):
+                return self.onnx_backend.softmax(logits)
+        
+        import torch
+        
+        with stage_timer("pad"):
+            inputs = self.tokenizer.pad(encodings, padding=True, return_tensors="pt")
+            inputs = {k: v.to(self.device) for k, v in inputs.items()}
+        if self.cascade is not None:
+            # I due stadi della cascata includono la propria softmax
+            with stage_timer("forward"):
+                return self.cascade.predict_probabilities(inputs, self.model).cpu().numpy()
+        with torch.no_grad():
+            with stage_timer("forward"):
+                logits = self.model(**inputs).logits
+            # Su GPU il forward è asincrono: l'attesa del kernel ricade nella copia su CPU
+            with stage_timer("softmax"):
+                predictions = torch.nn.functional.softmax(logits, dim=-1)
+                return predictions.float().cpu().numpy()
     
     def get_memory_usage(self):
-        """Restituisce l'uso della memoria GPU"""
-        if torch.cuda.is_available():
+        """Restituisce l'uso della memoria GPU e la memoria residente del processo"""
+        rss = process_rss_bytes()
+        process = {"process_rss": rss / 1024**3 if rss is not None else None}  # GB
+        # Senza torch importato (backend ONNX) non c'è memoria GPU da riportare
+        torch = sys.modules.get("torch")
+        if torch is not None and torch.cuda.is_available():
             return {
                 'allocated': torch.cuda.memory_allocated() / 1024**3,  # GB
                 'cached': torch.cuda.memory_reserved() / 1024**3,      # GB
-                'max_memory': torch.cuda.max_memory_allocated() / 1024**3  # GB
+                'max_memory': torch.cuda.max_memory_allocated() / 1024**3,  # GB
+                **process
             }
-        return {"gpu": "non disponibile"}
+        return {"gpu": "non disponibile", **process}
     
     def cleanup(self):
         """Pulisce la memoria GPU"""
-        if torch.cuda.is_available():
+        torch = sys.modules.get("torch")
+        if torch is not None and torch.cuda.is_available():
             torch.cuda.empty_cache()
         gc.collect()
@@ -0,0 +1,207 @@
+"""
+Backend di inferenza ONNX Runtime per il classificatore
+
+Il percorso di inferenza ONNX (OnnxBackend e FastTokenizer) non importa
+torch né transformers: solo l'esportazione del modello richiede torch.
+"""
+import json
+import os
+
+import numpy as np
+
+# Nomi di input/output del grafo esportato
+ONNX_INPUT_NAMES = ["input_ids", "attention_mask"]
+ONNX_OUTPUT_NAMES = ["logits"]
+
+
+def export_onnx(model, tokenizer, path: str, model_version: str, opset_version: int = 14):
+    """
+    Esporta il classificatore fine-tuned in formato ONNX con assi dinamici
+
+    Batch e lunghezza della sequenza sono dinamici, quindi lo stesso grafo
+    serve i batch del bucketing per lunghezza. La versione del modello di
+    origine viene salvata accanto al file per riconoscere esportazioni obsolete.
+    """
+    import torch
+
+    model = model.to("cpu").eval()
+    sample = tokenizer.pad(tokenizer(["esempio di testo", "un secondo esempio più lungo"]),
+                           padding=True, return_tensors="np")
+    dynamic_axes = {
+        "input_ids": {0: "batch", 1: "sequence"},
+        "attention_mask": {0: "batch", 1: "sequence"},
+        "logits": {0: "batch"},
+    }
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (torch.from_numpy(sample["input_ids"]), torch.from_numpy(sample["attention_mask"])),
+            path,
+            input_names=ONNX_INPUT_NAMES,
+            output_names=ONNX_OUTPUT_NAMES,
+            dynamic_axes=dynamic_axes,
+            opset_version=opset_version,
+            do_constant_folding=True,
+        )
+
+    with open(onnx_version_path(path), "w", encoding="utf-8") as f:
+        f.write(model_version)
+    print(f"Modello ONNX esportato in: {path}")
+
+
+def onnx_version_path(path: str) -> str:
+    """Percorso del file con la versione del modello da cui deriva l'esportazione"""
+    return path + ".version"
+
+
+def read_onnx_version(path: str):
+    """Restituisce la versione del modello esportato, o None se assente"""
+    try:
+        with open(onnx_version_path(path), encoding="utf-8") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+class OnnxBackend:
+    """
+    Esegue il forward pass del classificatore con ONNX Runtime su CPU
+
+    Non importa torch: riceve input già tokenizzati come array numpy e
+    restituisce le probabilità softmax per classe.
+    """
+
+    def __init__(self, path: str, num_threads: int = 0):
+        """
+        Args:
+            path: Percorso del modello ONNX
+            num_threads: Thread intra-op di ONNX Runtime (0 = default)
+        """
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+
+        self.path = path
+        self.session = ort.InferenceSession(
+            path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+
+    def predict_probabilities(self, inputs) -> np.ndarray:
+        """
+        Calcola le probabilità per classe di un batch già paddato
+
+        Args:
+            inputs: Mapping con input_ids e attention_mask (array numpy)
+
+        Returns:
+            Array float32 di forma (batch, num_labels)
+        """
+        return self.softmax(self.predict_logits(inputs))
+
+    def predict_logits(self, inputs) -> np.ndarray:
+        """Esegue la sessione ONNX e restituisce i logit (batch, num_labels)"""
+        feed = {name: np.asarray(inputs[name], dtype=np.int64) for name in ONNX_INPUT_NAMES}
+        return self.session.run(ONNX_OUTPUT_NAMES, feed)[0]
+
+    @staticmethod
+    def softmax(logits: np.ndarray) -> np.ndarray:
+        """Softmax numericamente stabile, in float32"""
+        logits = logits - logits.max(axis=-1, keepdims=True)
+        exp = np.exp(logits)
+        return (exp / exp.sum(axis=-1, keepdims=True)).astype(np.float32)
+
+
+class FastTokenizer:
+    """
+    Tokenizer del backend ONNX, letto dal tokenizer.json salvato con il modello
+
+    Usa direttamente la libreria tokenizers: AutoTokenizer importa torch
+    tramite transformers. Espone il sottoinsieme dell'interfaccia dei
+    tokenizer di transformers usato dall'inferenza (chiamata senza padding
+    e pad in array numpy) con gli stessi risultati del tokenizer fast.
+    """
+
+    model_input_names = ["input_ids", "attention_mask"]
+
+    def __init__(self, tokenizer, pad_token_id: int = 0, padding_side: str = "right"):
+        """
+        Args:
+            tokenizer: Istanza di tokenizers.Tokenizer
+            pad_token_id: Id del token di padding
+            padding_side: "right" oppure "left"
+        """
+        self.tokenizer = tokenizer
+        self.tokenizer.no_padding()
+        self.tokenizer.no_truncation()
+        self.pad_token_id = pad_token_id
+        self.padding_side = padding_side
+        self._max_length = None
+
+    @classmethod
+    def from_pretrained(cls, path: str) -> "FastTokenizer":
+        """Carica il tokenizer da una cartella scritta da save_pretrained"""
+        from tokenizers import Tokenizer
+
+        tokenizer_file = os.path.join(path, "tokenizer.json")
+        if not os.path.exists(tokenizer_file):
+            raise FileNotFoundError(f"tokenizer.json non trovato in {path}")
+        tokenizer = Tokenizer.from_file(tokenizer_file)
+
+        config = {}
+        config_file = os.path.join(path, "tokenizer_config.json")
+        if os.path.exists(config_file):
+            with open(config_file, encoding="utf-8") as f:
+                config = json.load(f)
+        pad_token = config.get("pad_token") or "[PAD]"
+        if isinstance(pad_token, dict):
+            pad_token = pad_token["content"]
+        pad_token_id = tokenizer.token_to_id(pad_token)
+        return cls(tokenizer, 0 if pad_token_id is None else pad_token_id,
+                   config.get("padding_side", "right"))
+
+    def __call__(self, texts, truncation: bool = False, max_length: int = None):
+        """
+        Tokenizza una lista di testi senza padding
+
+        Returns:
+            Dizionario con input_ids e attention_mask (liste di liste)
+        """
+        max_length = max_length if truncation else None
+        if max_length != self._max_length:
+            if max_length is None:
+                self.tokenizer.no_truncation()
+            else:
+                self.tokenizer.enable_truncation(max_length)
+            self._max_length = max_length
+        encodings = self.tokenizer.encode_batch(list(texts))
+        return {
+            "input_ids": [encoding.ids for encoding in encodings],
+            "attention_mask": [encoding.attention_mask for encoding in encodings],
+        }
+
+    def pad(self, encodings, padding=True, return_tensors: str = "np"):
+        """
+        Padding alla lunghezza massima del batch
+
+        Returns:
+            Dizionario con input_ids e attention_mask come array numpy int64
+        """
+        if return_tensors != "np":
+            raise ValueError("FastTokenizer restituisce solo array numpy (return_tensors='np')")
+        ids = encodings["input_ids"]
+        length = max((len(row) for row in ids), default=0)
+        input_ids = np.full((len(ids), length), self.pad_token_id, dtype=np.int64)
+        attention_mask = np.zeros((len(ids), length), dtype=np.int64)
+        for i, row in enumerate(ids):
+            if self.padding_side == "left":
+                input_ids[i, length - len(row):] = row
+                attention_mask[i, length - len(row):] = encodings["attention_mask"][i]
+            else:
+                input_ids[i, :len(row)] = row
+                attention_mask[i, :len(row)] = encodings["attention_mask"][i]
+        return {"input_ids": input_ids, "attention_mask": attention_mask}
@@ -0,0 +1,158 @@
+"""
+Pre-filtro leggero per i testi chiaramente non AI (categoria ALTRO)
+
+Una regressione logistica binaria (ALTRO / non ALTRO) su n-grammi di
+caratteri mappati con hashing in un vettore di dimensione fissa. Il costo è
+di qualche decina di microsecondi per testo, contro un forward pass del
+transformer: i testi con probabilità ALTRO sopra la soglia ricevono subito
+il risultato, gli altri proseguono verso il modello.
+
+Dipende solo da numpy; il modello è un file .npz di pochi MB.
+"""
+import threading
+import zlib
+from typing import List, Optional
+
+import numpy as np
+
+from .cache import normalize_text
+
+
+class HashedNgramFilter:
+    """
+    Classificatore lineare ALTRO / non ALTRO su n-grammi di caratteri hashati
+
+    Le feature di un testo sono gli n-grammi di caratteri (minuscoli, con
+    spazi ai bordi) mappati in num_buckets posizioni con CRC32, con valore
+    1/sqrt(numero di n-grammi). Il training usa discesa del gradiente a
+    batch completo con regolarizzazione L2.
+    """
+
+    def __init__(self, num_buckets: int = 2 ** 18, ngram_range: tuple = (3, 5),
+                 threshold: float = 0.95):
+        """
+        Args:
+            num_buckets: Dimensione del vettore di feature (potenza di 2)
+            ngram_range: Lunghezza minima e massima degli n-grammi
+            threshold: Probabilità ALTRO oltre la quale il testo non va al modello
+        """
+        if num_buckets & (num_buckets - 1):
+            raise ValueError("num_buckets deve essere una potenza di 2")
+
+        self.num_buckets = num_buckets
+        self.ngram_range = tuple(ngram_range)
+        self.threshold = threshold
+        self.weights = np.zeros(num_buckets, dtype=np.float32)
+        self.bias = 0.0
+        self.is_trained = False
+
+        self._lock = threading.Lock()
+        self.total = 0
+        self.short_circuited = 0
+
+    def _features(self, text: str) -> np.ndarray:
+        """Indici (unici) degli n-grammi hashati di un testo"""
+        text = f" {normalize_text(text).lower()} "
+        low, high = self.ngram_range
+        mask = self.num_buckets - 1
+        buckets = {
+            zlib.crc32(text[i:i + n].encode("utf-8")) & mask
+            for n in range(low, high + 1)
+            for i in range(len(text) - n + 1)
+        }
+        return np.fromiter(buckets, dtype=np.int64, count=len(buckets))
+
+    def _sparse_batch(self, texts: List[str]):
+        """Rappresentazione sparsa di un batch: (indici, riga di ogni indice, scala per riga)"""
+        features = [self._features(text) for text in texts]
+        lengths = np.array([len(f) for f in features], dtype=np.int64)
+        columns = np.concatenate(features) if features else np.empty(0, dtype=np.int64)
+        rows = np.repeat(np.arange(len(texts)), lengths)
+        scale = 1.0 / np.sqrt(np.maximum(lengths, 1))
+        return columns, rows, scale
+
+    def _logits(self, columns, rows, scale) -> np.ndarray:
+        sums = np.bincount(rows, weights=self.weights[columns], minlength=len(scale))
+        return sums * scale + self.bias
+
+    def predict_proba(self, texts: List[str]) -> np.ndarray:
+        """Probabilità che ogni testo appartenga alla categoria ALTRO"""
+        if not self.is_trained:
+            return np.zeros(len(texts), dtype=np.float32)
+        logits = self._logits(*self._sparse_batch(texts))
+        return (1.0 / (1.0 + np.exp(-logits))).astype(np.float32)
+
+    def filter(self, texts: List[str], threshold: Optional[float] = None):
+        """
+        Individua i testi da classificare direttamente come ALTRO
+
+        Returns:
+            Tupla (maschera booleana dei testi filtrati, probabilità ALTRO)
+        """
+        threshold = self.threshold if threshold is None else threshold
+        probabilities = self.predict_proba(texts)
+        mask = probabilities >= threshold
+        with self._lock:
+            self.total += len(texts)
+            self.short_circuited += int(mask.sum())
+        return mask, probabilities
+
+    def train(self, texts: List[str], is_altro: List[bool], epochs: int = 100,
+              learning_rate: float = 2.0, l2: float = 1e-4):
+        """
+        Addestra il filtro
+
+        Args:
+            texts: Testi di training
+            is_altro: True per i testi della categoria ALTRO
+            epochs: Iterazioni di discesa del gradiente
+            learning_rate: Passo del gradiente
+            l2: Coefficiente di regolarizzazione
+        """
+        columns, rows, scale = self._sparse_batch(texts)
+        targets = np.asarray(is_altro, dtype=np.float64)
+        values = scale[rows]
+        n = len(texts)
+
+        weights = np.zeros(self.num_buckets, dtype=np.float64)
+        bias = 0.0
+        for _ in range(epochs):
+            logits = np.bincount(rows, weights=weights[columns], minlength=n) * scale + bias
+            errors = 1.0 / (1.0 + np.exp(-logits)) - targets
+            gradient = np.bincount(columns, weights=errors[rows] * values, minlength=self.num_buckets) / n
+            weights -= learning_rate * (gradient + l2 * weights)
+            bias -= learning_rate * errors.mean()
+
+        self.weights = weights.astype(np.float32)
+        self.bias = float(bias)
+        self.is_trained = True
+
+    def save(self, path: str):
+        """Salva pesi e parametri in un file .npz"""
+        np.savez_compressed(
+            path,
+            weights=self.weights,
+            bias=np.float32(self.bias),
+            ngram_range=np.array(self.ngram_range)
+        )
+        print(f"Pre-filtro salvato in: {path}")
+
+    @classmethod
+    def load(cls, path: str, threshold: float = 0.95) -> "HashedNgramFilter":
+        """Carica un filtro salvato con save()"""
+        with np.load(path) as data:
+            prefilter = cls(len(data["weights"]), tuple(int(n) for n in data["ngram_range"]), threshold)
+            prefilter.weights = data["weights"].astype(np.float32)
+            prefilter.bias = float(data["bias"])
+        prefilter.is_trained = True
+        return prefilter
+
+    def get_stats(self) -> dict:
+        """Frazione di testi risolti dal filtro senza passare dal modello"""
+        with self._lock:
+            return {
+                "threshold": self.threshold,
+                "total": self.total,
+                "short_circuited": self.short_circuited,
+                "short_circuit_rate": self.short_circuited / self.total if self.total else 0.0,
+            }
@@ -0,0 +1,251 @@
+"""
+Profilazione su richiesta delle chiamate di inferenza
+
+Il profiler è disattivato per default e costa un solo controllo per
+chiamata. Una volta armato (endpoint /admin/profile del server, variabili
+d'ambiente o codice) profila le prossime N chiamate a
+ModelManager.predict_batch oppure una frazione campionata, con cProfile o
+con torch.profiler. Ogni profilo è scritto in output_dir insieme a un file
+JSON con numero di testi, token e durata, per correlare la forma del batch
+con il costo.
+
+Variabili d'ambiente (lette alla creazione del profiler del processo):
+    AI_CLASSIFICATION_PROFILE              "cprofile" o "torch"
+    AI_CLASSIFICATION_PROFILE_NEXT         numero di chiamate da profilare
+    AI_CLASSIFICATION_PROFILE_SAMPLE_RATE  frazione di chiamate da profilare
+    AI_CLASSIFICATION_PROFILE_DIR          cartella dei profili
+"""
+import cProfile
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Optional
+
+from .config import PROFILING_CONFIG
+
+PROFILE_MODES = ("cprofile", "torch")
+
+# Estensione del file di profilo per modalità
+PROFILE_EXTENSIONS = {"cprofile": ".prof", "torch": ".trace.json"}
+
+
+class ProfileCapture:
+    """Profilo di una singola chiamata, con le informazioni sulla forma del batch"""
+
+    def __init__(self, mode: str, info: dict):
+        self.mode = mode
+        self.info = dict(info)
+
+    def annotate(self, **info):
+        """Aggiunge informazioni al profilo (ad esempio i token dopo la tokenizzazione)"""
+        self.info.update(info)
+
+
+class RequestProfiler:
+    """
+    Profila le prossime N chiamate o una frazione campionata
+
+    Un solo profilo alla volta: cProfile e torch.profiler non supportano
+    sessioni concorrenti, quindi le chiamate campionate mentre un altro
+    thread sta profilando vengono eseguite senza profilo.
+    """
+
+    def __init__(self, output_dir: Optional[str] = None, max_profiles: Optional[int] = None):
+        """
+        Args:
+            output_dir: Cartella dei profili (default: PROFILING_CONFIG["output_dir"])
+            max_profiles: Profili scritti dopo cui il profiler si disarma
+                          (default: PROFILING_CONFIG["max_profiles"])
+        """
+        self.output_dir = output_dir or PROFILING_CONFIG["output_dir"]
+        self.max_profiles = max_profiles or PROFILING_CONFIG["max_profiles"]
+        self.mode = None
+        self.remaining = 0
+        self.sample_rate = 0.0
+        self.written = 0
+        self.skipped = 0
+        self.last_profile = None
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+        self._busy = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def armed(self) -> bool:
+        return self.mode is not None
+
+    def arm(self, mode: str = "cprofile", next_calls: int = 0, sample_rate: float = 0.0):
+        """
+        Attiva la profilazione
+
+        Args:
+            mode: "cprofile" oppure "torch"
+            next_calls: Numero di prossime chiamate da profilare
+            sample_rate: Frazione delle chiamate successive da profilare (0-1)
+        """
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Modalità di profilazione non valida: {mode} (attese: {', '.join(PROFILE_MODES)})")
+        if next_calls < 0 or not 0.0 <= sample_rate <= 1.0:
+            raise ValueError("next_calls deve essere >= 0 e sample_rate compreso fra 0 e 1")
+        if next_calls == 0 and sample_rate == 0.0:
+            raise ValueError("Indicare next_calls o sample_rate")
+        with self._lock:
+            self.remaining = next_calls
+            self.sample_rate = sample_rate
+            self.written = 0
+            self.mode = mode
+
+    def disarm(self):
+        """Disattiva la profilazione (i profili in corso vengono completati)"""
+        with self._lock:
+            self.mode = None
+            self.remaining = 0
+            self.sample_rate = 0.0
+
+    def _should_profile(self) -> Optional[str]:
+        with self._lock:
+            mode = self.mode
+            if mode is None:
+                return None
+            if self.remaining > 0:
+                self.remaining -= 1
+                if self.remaining == 0 and self.sample_rate == 0.0:
+                    self.mode = None
+                return mode
+            if self.sample_rate and random.random() < self.sample_rate:
+                return mode
+            return None
+
+    @contextmanager
+    def capture(self, **info):
+        """
+        Profila il blocco se la chiamata è selezionata
+
+        Args:
+            info: Informazioni salvate con il profilo (ad esempio batch_size)
+
+        Yields:
+            Il ProfileCapture attivo oppure None
+        """
+        # Percorso senza profilazione: un solo controllo di attributo
+        mode = self._should_profile() if self.mode is not None else None
+        if mode is None or not self._busy.acquire(blocking=False):
+            if mode is not None:
+                with self._lock:
+                    self.skipped += 1
+            yield None
+            return
+
+        capture = ProfileCapture(mode, info)
+        self._local.capture = capture
+        start = time.perf_counter()
+        try:
+            if mode == "torch":
+                import torch
+
+                activities = [torch.profiler.ProfilerActivity.CPU]
+                if torch.cuda.is_available():
+                    activities.append(torch.profiler.ProfilerActivity.CUDA)
+                with torch.profiler.profile(activities=activities, record_shapes=True) as profile:
+                    yield capture
+            else:
+                profile = cProfile.Profile()
+                profile.enable()
+                try:
+                    yield capture
+                finally:
+                    profile.disable()
+            capture.info["duration_ms"] = (time.perf_counter() - start) * 1000
+            self._write(capture, profile)
+        finally:
+            self._local.capture = None
+            self._busy.release()
+
+    def current(self) -> Optional[ProfileCapture]:
+        """Profilo in corso nel thread corrente, o None"""
+        return getattr(self._local, "capture", None)
+
+    def _write(self, capture: ProfileCapture, profile):
+        os.makedirs(self.output_dir, exist_ok=True)
+        info = capture.info
+        name = (
+            f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(self._counter):04d}"
+            f"-b{info.get('batch_size', 0)}-t{info.get('tokens', 0)}"
+        )
+        path = os.path.join(self.output_dir, name + PROFILE_EXTENSIONS[capture.mode])
+        if capture.mode == "torch":
+            profile.export_chrome_trace(path)
+        else:
+            profile.dump_stats(path)
+
+        with open(os.path.join(self.output_dir, name + ".json"), "w", encoding="utf-8") as f:
+            json.dump({"mode": capture.mode, "profile": os.path.basename(path),
+                       "timestamp": time.time(), **info}, f, indent=2)
+
+        with self._lock:
+            self.written += 1
+            self.last_profile = path
+            if self.written >= self.max_profiles:
+                self.mode = None
+                self.remaining = 0
+                self.sample_rate = 0.0
+
+    def list_profiles(self) -> List[dict]:
+        """Metadati dei profili presenti in output_dir, dal più recente"""
+        if not os.path.isdir(self.output_dir):
+            return []
+        profiles = []
+        for name in sorted(os.listdir(self.output_dir), reverse=True):
+            if not name.endswith(".json") or name.endswith(".trace.json"):
+                continue
+            try:
+                with open(os.path.join(self.output_dir, name), encoding="utf-8") as f:
+                    profiles.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return profiles
+
+    def get_status(self) -> dict:
+        """Stato del profiler"""
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "remaining": self.remaining,
+                "sample_rate": self.sample_rate,
+                "written": self.written,
+                "skipped": self.skipped,
+                "max_profiles": self.max_profiles,
+                "output_dir": self.output_dir,
+                "last_profile": self.last_profile,
+            }
+
+
+_profiler = None
+_profiler_lock = threading.Lock()
+
+
+def get_profiler() -> RequestProfiler:
+    """
+    Profiler condiviso dal processo (sopravvive al ricaricamento del modello)
+
+    Alla creazione viene armato da PROFILING_CONFIG o dalle variabili
+    d'ambiente AI_CLASSIFICATION_PROFILE*.
+    """
+    global _profiler
+    with _profiler_lock:
+        if _profiler is None:
+            profiler = RequestProfiler(os.environ.get("AI_CLASSIFICATION_PROFILE_DIR"))
+            mode = os.environ.get("AI_CLASSIFICATION_PROFILE", PROFILING_CONFIG["mode"])
+            if mode:
+                profiler.arm(
+                    mode,
+                    next_calls=int(os.environ.get("AI_CLASSIFICATION_PROFILE_NEXT", PROFILING_CONFIG["next_calls"])),
+                    sample_rate=float(os.environ.get("AI_CLASSIFICATION_PROFILE_SAMPLE_RATE",
+                                                     PROFILING_CONFIG["sample_rate"]))
+                )
+            _profiler = profiler
+        return _profiler
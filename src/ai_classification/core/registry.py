@@ -0,0 +1,130 @@
+"""
+Registro dei classificatori condivisi nel processo
+
+Caricare tokenizer e pesi costa secondi: le funzioni di utilità e gli script
+ottengono il classificatore dal registro, che lo crea alla prima richiesta e
+poi restituisce sempre la stessa istanza per la stessa chiave (percorso del
+modello e device). Con un timeout di inattività le istanze non usate da
+troppo tempo vengono rilasciate per liberare memoria e ricaricate alla
+richiesta successiva.
+"""
+import threading
+import time
+from typing import Callable, Hashable, Optional
+
+
+class ClassifierRegistry:
+    """
+    Istanze caricate pigramente, una per chiave. Thread-safe.
+
+    Il caricamento di una chiave avviene una sola volta anche con richieste
+    concorrenti, senza bloccare le richieste per le altre chiavi.
+    """
+
+    def __init__(self, idle_timeout: Optional[float] = None):
+        """
+        Args:
+            idle_timeout: Secondi di inattività dopo cui un'istanza viene
+                          rilasciata (None = mai)
+        """
+        self.idle_timeout = idle_timeout
+        self._entries = {}  # chiave -> [istanza, ultimo uso (monotonic)]
+        self._load_locks = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._reaper = None
+
+        self.loads = 0
+        self.hits = 0
+        self.unloads = 0
+
+    def get(self, key: Hashable, factory: Callable[[], object]):
+        """
+        Restituisce l'istanza per la chiave, creandola con factory() se manca
+
+        Args:
+            key: Identifica l'istanza (ad esempio percorso del modello e device)
+            factory: Crea l'istanza; chiamata al più una volta per caricamento
+        """
+        instance = self._lookup(key)
+        if instance is not None:
+            return instance
+
+        with self._lock:
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        with load_lock:
+            # Un altro thread potrebbe averla caricata nel frattempo
+            instance = self._lookup(key)
+            if instance is not None:
+                return instance
+            instance = factory()
+            with self._lock:
+                self._entries[key] = [instance, time.monotonic()]
+                self.loads += 1
+                self._start_reaper()
+        return instance
+
+    def _lookup(self, key: Hashable):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            entry[1] = time.monotonic()
+            self.hits += 1
+            return entry[0]
+
+    def unload(self, key: Optional[Hashable] = None):
+        """Rilascia l'istanza di una chiave, o tutte se key è None"""
+        with self._lock:
+            keys = list(self._entries) if key is None else [key]
+            released = [self._entries.pop(k)[0] for k in keys if k in self._entries]
+            self.unloads += len(released)
+        for instance in released:
+            self._release(instance)
+
+    def unload_idle(self):
+        """Rilascia le istanze inattive da più di idle_timeout secondi"""
+        if self.idle_timeout is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            idle = [k for k, (_, last_used) in self._entries.items() if now - last_used > self.idle_timeout]
+            released = [self._entries.pop(k)[0] for k in idle]
+            self.unloads += len(released)
+        for instance in released:
+            print("Classificatore inattivo rilasciato")
+            self._release(instance)
+
+    @staticmethod
+    def _release(instance):
+        """Termina i worker e libera la memoria; chi ha ancora un riferimento può continuare a usarla"""
+        instance.close_worker_pool()
+        instance.cleanup()
+
+    def _start_reaper(self):
+        """Avvia (una volta) il thread che rilascia le istanze inattive"""
+        if self.idle_timeout is None or self._reaper is not None:
+            return
+        self._reaper = threading.Thread(target=self._reap, name="classifier-registry-reaper", daemon=True)
+        self._reaper.start()
+
+    def _reap(self):
+        interval = max(self.idle_timeout / 2, 0.1)
+        while not self._stop.wait(interval):
+            self.unload_idle()
+
+    def close(self):
+        """Ferma il thread di rilascio e rilascia tutte le istanze"""
+        self._stop.set()
+        self.unload()
+
+    def get_stats(self) -> dict:
+        """Istanze caricate e numero di caricamenti, riusi e rilasci"""
+        with self._lock:
+            return {
+                "loaded": len(self._entries),
+                "loads": self.loads,
+                "hits": self.hits,
+                "unloads": self.unloads,
+                "idle_timeout": self.idle_timeout,
+            }
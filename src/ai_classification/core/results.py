@@ -0,0 +1,67 @@
+"""
+Record compatto dei risultati di classificazione
+"""
+from typing import NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .config import CATEGORY_IDS, CATEGORY_NAMES
+
+
+def top_k_probabilities(probabilities: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Le k classi più probabili per ogni riga, in ordine decrescente
+
+    Operazione vettoriale sull'intera matrice (n, num_labels): nessun ciclo
+    Python per testo.
+
+    Returns:
+        Tupla (indici int64, probabilità float32) di forma (n, k)
+    """
+    k = min(k, probabilities.shape[-1])
+    indices = np.argpartition(-probabilities, k - 1, axis=-1)[:, :k]
+    values = np.take_along_axis(probabilities, indices, axis=-1)
+    order = np.argsort(-values, axis=-1, kind="stable")
+    return (
+        np.take_along_axis(indices, order, axis=-1).astype(np.int64),
+        np.take_along_axis(values, order, axis=-1).astype(np.float32),
+    )
+
+
+class Prediction(NamedTuple):
+    """
+    Risultato della classificazione di un testo
+
+    Contiene sia l'indice sia il nome della categoria, così i livelli
+    successivi (API, script) non devono ricavare l'uno dall'altro.
+    """
+    class_id: int
+    category: str
+    confidence: float
+    probabilities: Optional[Sequence[float]] = None  # Probabilità per classe, se richieste
+    top_k: Optional[Tuple[Sequence[int], Sequence[float]]] = None  # (indici, probabilità) delle k classi migliori
+
+    @classmethod
+    def from_class(cls, class_id: int, confidence: float, probabilities=None, top_k=None) -> "Prediction":
+        """Crea il record da indice di classe e confidenza"""
+        return cls(class_id, CATEGORY_NAMES[class_id], confidence, probabilities, top_k)
+
+    def to_dict(self) -> dict:
+        """Rappresentazione JSON usata dalle risposte dell'API"""
+        result = {
+            "prediction": self.class_id,
+            "category": self.category,
+            "confidence": self.confidence,
+        }
+        if self.probabilities is not None:
+            result["probabilities"] = [float(p) for p in self.probabilities]
+        if self.top_k is not None:
+            result["top_k"] = [
+                {"prediction": int(i), "category": CATEGORY_NAMES[i], "probability": float(p)}
+                for i, p in zip(*self.top_k)
+            ]
+        return result
+
+
+# Risultato di ripiego per testi non validi o errori di inferenza
+FALLBACK_PREDICTION = Prediction(CATEGORY_IDS["ALTRO"], "ALTRO", 0.0)
@@ -0,0 +1,162 @@
+"""
+Snapshot del modello per avvii rapidi del server
+
+Uno snapshot contiene la configurazione del modello, i pesi in formato
+safetensors (letti tramite memory map) e il tokenizer fast serializzato in
+tokenizer.json. Il caricamento evita la risoluzione di from_pretrained,
+l'inizializzazione casuale dei pesi e la conversione del tokenizer.
+
+Il modulo importa solo le dipendenze di inferenza.
+"""
+import json
+import math
+import os
+import struct
+
+import torch
+from safetensors.torch import load_file, save_file
+from transformers import AutoConfig, AutoModelForSequenceClassification, AutoTokenizer
+
+SNAPSHOT_WEIGHTS = "model.safetensors"
+SNAPSHOT_VERSION = "version"
+
+# Tipi di dato safetensors supportati dal caricamento via mmap
+SAFETENSORS_DTYPES = {
+    "F64": torch.float64,
+    "F32": torch.float32,
+    "F16": torch.float16,
+    "BF16": torch.bfloat16,
+    "I64": torch.int64,
+    "I32": torch.int32,
+    "I16": torch.int16,
+    "I8": torch.int8,
+    "U8": torch.uint8,
+    "BOOL": torch.bool,
+}
+
+
+def read_snapshot_version(path: str):
+    """Restituisce la versione del modello salvata nello snapshot, o None se assente"""
+    try:
+        with open(os.path.join(path, SNAPSHOT_VERSION), encoding="utf-8") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def save_snapshot(model, tokenizer, path: str, model_version: str):
+    """
+    Salva modello e tokenizer in formato snapshot
+
+    Oltre ai parametri vengono salvati anche i buffer non persistenti (ad
+    esempio position_ids), così il modello può essere ricostruito senza
+    alcuna inizializzazione.
+    """
+    os.makedirs(path, exist_ok=True)
+
+    tensors = {name: tensor for name, tensor in model.state_dict().items()}
+    for name, buffer in model.named_buffers():
+        tensors.setdefault(name, buffer)
+    tensors = {name: tensor.detach().to("cpu").contiguous() for name, tensor in tensors.items()}
+
+    save_file(tensors, os.path.join(path, SNAPSHOT_WEIGHTS))
+    model.config.save_pretrained(path)
+    tokenizer.save_pretrained(path)
+
+    # Il file di versione viene scritto per ultimo: uno snapshot incompleto resta obsoleto
+    with open(os.path.join(path, SNAPSHOT_VERSION), "w", encoding="utf-8") as f:
+        f.write(model_version)
+    print(f"Snapshot del modello salvato in: {path}")
+
+
+def mmap_load_safetensors(path: str) -> dict:
+    """
+    Mappa in memoria un file safetensors senza copiarne i dati
+
+    L'intero file viene mappato con MAP_PRIVATE e ogni tensore è una vista
+    sulla mappatura: le pagine restano nella page cache del sistema e sono
+    condivise da tutti i processi dello stesso host che caricano il file,
+    finché nessuno le modifica. I pesi vanno quindi trattati in sola lettura.
+
+    Returns:
+        Dizionario nome -> tensore CPU
+
+    Raises:
+        ValueError: Se l'header non è valido (tipo non supportato, offset
+                    fuori dal file o incoerenti con la forma del tensore)
+    """
+    file_size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        header_size = struct.unpack("<Q", f.read(8))[0]
+        if 8 + header_size > file_size:
+            raise ValueError(f"{path}: header safetensors più lungo del file")
+        header = json.loads(f.read(header_size))
+    header.pop("__metadata__", None)
+
+    data_start = 8 + header_size
+    data_size = file_size - data_start
+    storage = torch.UntypedStorage.from_file(path, shared=False, nbytes=file_size)
+    raw = torch.empty(0, dtype=torch.uint8).set_(storage)
+
+    tensors = {}
+    for name, info in header.items():
+        dtype = SAFETENSORS_DTYPES.get(info["dtype"])
+        if dtype is None:
+            raise ValueError(f"{path}: tipo {info['dtype']!r} non supportato per il tensore {name}")
+        begin, end = info["data_offsets"]
+        expected = math.prod(info["shape"]) * torch.empty(0, dtype=dtype).element_size()
+        if not 0 <= begin <= end <= data_size or end - begin != expected:
+            raise ValueError(
+                f"{path}: offset {begin}-{end} non validi per il tensore {name} "
+                f"({info['dtype']} {info['shape']}, {expected} byte, dati di {data_size} byte)"
+            )
+        data = raw[data_start + begin:data_start + end]
+        if (data_start + begin) % torch.empty(0, dtype=dtype).element_size():
+            # Offset non allineato al tipo: unica copia necessaria
+            data = data.clone()
+        tensors[name] = data.view(dtype).reshape(info["shape"])
+    return tensors
+
+
+def load_snapshot(path: str, device=None, mmap_weights: bool = True):
+    """
+    Carica modello e tokenizer da uno snapshot
+
+    Il modello viene creato sul device "meta" (nessuna allocazione né
+    inizializzazione) e i tensori letti dal file safetensors vengono
+    assegnati direttamente ai moduli. Con mmap_weights su CPU i parametri
+    restano viste sul file mappato (nessuna copia in memoria privata).
+
+    Returns:
+        Tupla (modello, tokenizer)
+    """
+    config = AutoConfig.from_pretrained(path)
+    with torch.device("meta"):
+        model = AutoModelForSequenceClassification.from_config(config)
+
+    weights_path = os.path.join(path, SNAPSHOT_WEIGHTS)
+    device = torch.device(device or "cpu")
+    if mmap_weights and device.type == "cpu":
+        tensors = mmap_load_safetensors(weights_path)
+    else:
+        tensors = load_file(weights_path, device=str(device))
+    model.load_state_dict(tensors, strict=False, assign=True)
+
+    # Buffer non persistenti: non fanno parte dello state_dict
+    for name, _ in list(model.named_buffers()):
+        module_name, _, buffer_name = name.rpartition(".")
+        module = model.get_submodule(module_name) if module_name else model
+        if module._buffers[buffer_name].is_meta and name in tensors:
+            module._buffers[buffer_name] = tensors[name]
+
+    missing = [
+        name for name, tensor in list(model.named_parameters()) + list(model.named_buffers())
+        if tensor.is_meta
+    ]
+    if missing:
+        raise ValueError(f"Snapshot incompleto, tensori mancanti: {missing[:5]}")
+
+    # tokenizer.json presente: nessuna conversione dal tokenizer lento
+    tokenizer = AutoTokenizer.from_pretrained(path, use_fast=True)
+    model.eval()
+    return model, tokenizer
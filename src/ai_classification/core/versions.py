@@ -0,0 +1,134 @@
+"""
+Cartelle di modello versionate per il ricaricamento a caldo del server
+
+    models/versions/
+        CURRENT                  nome della versione attiva
+        20261016-153000/
+            model/               modello e tokenizer (save_pretrained)
+            snapshot/, ...       artefatti derivati di questa versione
+
+Ogni versione ha i propri artefatti derivati (snapshot, int8, ONNX, testa
+della cascata, pre-filtro): mentre il server carica una versione nuova, i
+file mappati in memoria di quella attiva non vengono mai riscritti.
+"""
+import os
+import shutil
+import time
+from typing import List, Optional
+
+from .config import MODEL_PATHS
+
+CURRENT_FILE = "CURRENT"
+
+
+def version_paths(version_dir: str) -> dict:
+    """Percorsi di una versione, con le stesse chiavi di MODEL_PATHS"""
+    model_dir = os.path.join(version_dir, "model")
+    return {
+        "model_dir": version_dir,
+        "trained_model": model_dir,
+        "tokenizer": model_dir,
+        "quantized_model": os.path.join(version_dir, "model_int8.pt"),
+        "onnx_model": os.path.join(version_dir, "model.onnx"),
+        "snapshot": os.path.join(version_dir, "snapshot"),
+        "prefilter": os.path.join(version_dir, "prefilter.npz"),
+        "cascade_head": os.path.join(version_dir, "cascade_head.pt"),
+        "distilled_model": os.path.join(version_dir, "distilled"),
+        "versions_dir": os.path.dirname(version_dir),
+    }
+
+
+def _check_name(version: str):
+    if not version or version.startswith(".") or os.sep in version or (os.altsep and os.altsep in version):
+        raise ValueError(f"Nome di versione non valido: {version!r}")
+
+
+def version_dir(version: str, versions_dir: Optional[str] = None) -> str:
+    """
+    Cartella di una versione pubblicata
+
+    Raises:
+        ValueError: Se il nome non è valido o la versione non esiste
+    """
+    _check_name(version)
+    path = os.path.join(versions_dir or MODEL_PATHS["versions_dir"], version)
+    if not os.path.isdir(os.path.join(path, "model")):
+        raise ValueError(f"Versione del modello non trovata: {version}")
+    return path
+
+
+def list_versions(versions_dir: Optional[str] = None) -> List[str]:
+    """Versioni pubblicate, in ordine di nome"""
+    versions_dir = versions_dir or MODEL_PATHS["versions_dir"]
+    if not os.path.isdir(versions_dir):
+        return []
+    return sorted(
+        name for name in os.listdir(versions_dir)
+        if not name.startswith(".") and os.path.isdir(os.path.join(versions_dir, name, "model"))
+    )
+
+
+def read_current_version(versions_dir: Optional[str] = None) -> Optional[str]:
+    """Nome della versione attiva, o None se non ne è stata attivata nessuna"""
+    path = os.path.join(versions_dir or MODEL_PATHS["versions_dir"], CURRENT_FILE)
+    try:
+        with open(path, encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def set_current_version(version: str, versions_dir: Optional[str] = None):
+    """Rende attiva una versione pubblicata (scrittura atomica di CURRENT)"""
+    versions_dir = versions_dir or MODEL_PATHS["versions_dir"]
+    version_dir(version, versions_dir)
+    path = os.path.join(versions_dir, CURRENT_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(version + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def publish_version(model_path: Optional[str] = None, tokenizer_path: Optional[str] = None,
+                    version: Optional[str] = None, versions_dir: Optional[str] = None,
+                    activate: bool = False) -> str:
+    """
+    Copia modello e tokenizer in una nuova cartella versionata
+
+    La copia avviene in una cartella temporanea rinominata alla fine: un
+    server che osserva versions_dir non vede mai una versione incompleta.
+
+    Args:
+        model_path: Modello da pubblicare (default: MODEL_PATHS["trained_model"])
+        tokenizer_path: Tokenizer (default: MODEL_PATHS["tokenizer"])
+        version: Nome della versione (default: data e ora correnti)
+        versions_dir: Cartella delle versioni (default: MODEL_PATHS["versions_dir"])
+        activate: Se True la versione diventa anche quella attiva
+
+    Returns:
+        Nome della versione pubblicata
+    """
+    model_path = model_path or MODEL_PATHS["trained_model"]
+    tokenizer_path = tokenizer_path or MODEL_PATHS["tokenizer"]
+    versions_dir = versions_dir or MODEL_PATHS["versions_dir"]
+    version = version or time.strftime("%Y%m%d-%H%M%S")
+    _check_name(version)
+
+    if not os.path.isdir(model_path):
+        raise ValueError(f"Modello non trovato: {model_path}")
+    target = os.path.join(versions_dir, version)
+    if os.path.exists(target):
+        raise ValueError(f"La versione {version} esiste già")
+
+    staging = os.path.join(versions_dir, f".{version}.tmp")
+    shutil.rmtree(staging, ignore_errors=True)
+    shutil.copytree(model_path, os.path.join(staging, "model"))
+    if os.path.abspath(tokenizer_path) != os.path.abspath(model_path):
+        shutil.copytree(tokenizer_path, os.path.join(staging, "model"), dirs_exist_ok=True)
+    os.rename(staging, target)
+
+    if activate:
+        set_current_version(version, versions_dir)
+    return version
@@ -0,0 +1,140 @@
+"""
+Pool di processi per l'inferenza con pesi del modello condivisi
+"""
+import math
+import multiprocessing
+import os
+from functools import partial
+
+import numpy as np
+import torch
+
+# ModelManager usato dai processi worker. Con start method "fork" viene
+# ereditato dal processo padre già caricato: i pesi, spostati in memoria
+# condivisa, non vengono duplicati nei figli.
+_worker_manager = None
+
+
+def _init_worker(num_threads, paths=None, quantization=None, backend="torch"):
+    """
+    Inizializza un processo worker
+
+    Args:
+        num_threads: Thread torch del worker
+        paths: Percorsi del modello del processo padre (solo con "spawn")
+        quantization: Quantizzazione del processo padre (solo con "spawn")
+        backend: Backend di inferenza del processo padre (solo con "spawn")
+    """
+    global _worker_manager
+
+    # I thread del tokenizer Rust non sopravvivono al fork
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+    torch.set_num_threads(num_threads)
+
+    if _worker_manager is None:
+        # Start method "spawn": il worker deve caricare il modello da solo,
+        # con le stesse impostazioni del processo padre (ad esempio la
+        # versione attiva in hot reload invece di MODEL_PATHS)
+        from .model_utils import ModelManager
+        manager = ModelManager(paths)
+        manager.quantization = quantization
+        manager.backend = backend
+        manager.load_or_create_model()
+        _worker_manager = manager
+
+
+def _predict_chunk(texts, return_probabilities=False, top_k=None):
+    """Esegue predict_batch su una porzione di testi nel processo worker"""
+    return _worker_manager.predict_batch(texts, return_probabilities=return_probabilities, top_k=top_k)
+
+
+class InferenceWorkerPool:
+    """
+    Distribuisce l'inferenza su più processi che condividono un'unica copia dei pesi
+
+    Il modello viene caricato una sola volta nel processo padre; i tensori
+    vengono spostati in memoria condivisa e i worker sono creati con fork
+    dopo il caricamento, così ogni processo legge gli stessi pesi in sola
+    lettura. Espone predict/predict_batch come ModelManager, quindi può
+    sostituirlo come predictor di AITextClassifier.
+
+    Il pool va creato prima di avviare altri thread (event loop, executor)
+    e prima di eseguire inferenza nel processo padre.
+    """
+
+    def __init__(self, model_manager, num_workers: int, threads_per_worker: int = 1):
+        """
+        Args:
+            model_manager: ModelManager con il modello già caricato
+            num_workers: Numero di processi worker
+            threads_per_worker: Thread torch per ciascun worker
+        """
+        global _worker_manager
+
+        if num_workers < 1:
+            raise ValueError("num_workers deve essere almeno 1")
+        if model_manager.onnx_backend is not None:
+            raise ValueError("Il pool di processi supporta solo il backend torch")
+        if model_manager.model is None:
+            raise ValueError("Modello non caricato. Chiamare load_or_create_model() prima.")
+
+        self.model_manager = model_manager
+        self.num_workers = num_workers
+
+        if "fork" in multiprocessing.get_all_start_methods():
+            # Pesi in memoria condivisa, ereditati dai worker senza copie.
+            # I pesi mappati da file sono già condivisi: spostarli li copierebbe.
+            if not model_manager.weights_mmapped:
+                model_manager.model.share_memory()
+            _worker_manager = model_manager
+            context = multiprocessing.get_context("fork")
+        else:
+            print("Fork non disponibile: ogni worker caricherà una propria copia del modello")
+            context = multiprocessing.get_context("spawn")
+
+        self._pool = context.Pool(
+            num_workers,
+            initializer=_init_worker,
+            initargs=(threads_per_worker, model_manager.paths,
+                      model_manager.quantization, model_manager.backend)
+        )
+
+    @property
+    def device(self):
+        return self.model_manager.device
+
+    def predict(self, text):
+        """Predice la categoria di un testo"""
+        predicted_classes, confidences = self.predict_batch([text])
+        return int(predicted_classes[0]), float(confidences[0])
+
+    def predict_batch(self, texts, batch_size=None, return_probabilities=False, top_k=None):
+        """
+        Suddivide i testi tra i worker e ricompone i risultati nell'ordine originale
+
+        Returns:
+            Tupla (classi predette, confidenze) come array numpy allineati a texts;
+            con return_probabilities e top_k gli stessi array aggiuntivi di
+            ModelManager.predict_batch
+        """
+        texts = list(texts)
+        if not texts:
+            return self.model_manager.predict_batch(
+                [], return_probabilities=return_probabilities, top_k=top_k
+            )
+
+        chunk_size = math.ceil(len(texts) / self.num_workers)
+        if batch_size:
+            chunk_size = min(chunk_size, batch_size)
+        chunks = [texts[start:start + chunk_size] for start in range(0, len(texts), chunk_size)]
+
+        results = self._pool.map(
+            partial(_predict_chunk, return_probabilities=return_probabilities, top_k=top_k), chunks
+        )
+        # Concatena ciascun array restituito (classi, confidenze[, probabilità][, top-k])
+        return tuple(np.concatenate(arrays) for arrays in zip(*results))
+
+    def close(self):
+        """Termina i processi worker"""
+        self._pool.close()
+        self._pool.join()
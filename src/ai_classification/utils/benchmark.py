@@ -0,0 +1,193 @@
+"""
+Supporto per la suite di benchmark dell'inferenza (scripts/benchmark_suite.py)
+
+Dataset deterministici generati da ALL_TRAINING_DATA, statistiche di
+latenza, memoria di picco e confronto fra un risultato e una baseline
+salvata in JSON. Ogni metrica indica se il valore migliore è il più basso
+(latenze, tempi, memoria) o il più alto (throughput).
+"""
+import json
+import os
+import platform
+import random
+import time
+from typing import Dict, List, Optional, Sequence
+
+# Soglia di default per segnalare una regressione (variazione relativa)
+DEFAULT_THRESHOLD = 0.10
+
+# Versione del formato del file dei risultati
+RESULTS_FORMAT = 1
+
+
+def build_texts(size: int, long_ratio: float = 0.0, seed: int = 42) -> List[str]:
+    """
+    Testi deterministici: esempi brevi di ALL_TRAINING_DATA e una quota di testi lunghi
+
+    I testi lunghi concatenano 40 esempi (come un articolo) e vengono
+    troncati a max_length dal tokenizer.
+    """
+    from ..data.training_data import ALL_TRAINING_DATA
+
+    rng = random.Random(seed)
+    examples = [text for text, _ in ALL_TRAINING_DATA]
+    texts = []
+    for _ in range(size):
+        if rng.random() < long_ratio:
+            texts.append(". ".join(rng.choices(examples, k=40)))
+        else:
+            texts.append(rng.choice(examples))
+    return texts
+
+
+def metric(value: float, unit: str, better: str) -> dict:
+    """Una metrica del benchmark ("better" è "lower" oppure "higher")"""
+    if better not in ("lower", "higher"):
+        raise ValueError(f"better deve essere 'lower' o 'higher', non {better!r}")
+    return {"value": float(value), "unit": unit, "better": better}
+
+
+def latency_stats(samples_s: Sequence[float]) -> Dict[str, float]:
+    """Media e percentili in millisecondi di una serie di durate in secondi"""
+    ordered = sorted(s * 1000 for s in samples_s)
+    if not ordered:
+        raise ValueError("Nessun campione di latenza")
+
+    def percentile(q: float) -> float:
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+    return {
+        "mean": sum(ordered) / len(ordered),
+        "p50": percentile(0.50),
+        "p95": percentile(0.95),
+        "p99": percentile(0.99),
+    }
+
+
+def time_call(fn, repeats: int) -> float:
+    """Mediana del tempo di esecuzione di fn() in secondi su più ripetizioni"""
+    durations = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+    return sorted(durations)[len(durations) // 2]
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Memoria residente di picco del processo in MB (None se non misurabile)"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss è in KB su Linux e in byte su macOS
+    return maxrss / 1024 ** 2 if platform.system() == "Darwin" else maxrss / 1024
+
+
+def environment_info() -> dict:
+    """Informazioni sull'ambiente che influenzano i tempi, salvate con i risultati"""
+    import torch
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "torch": torch.__version__,
+        "torch_threads": torch.get_num_threads(),
+        "cuda": torch.cuda.get_device_name(0) if torch.cuda.is_available() else None,
+    }
+
+
+def save_results(results: dict, path: str):
+    """Scrive i risultati in JSON (crea la cartella se necessario)"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+
+
+def load_results(path: str) -> dict:
+    """Legge un file di risultati scritto da save_results"""
+    with open(path, encoding="utf-8") as f:
+        results = json.load(f)
+    if results.get("format") != RESULTS_FORMAT:
+        raise ValueError(f"Formato dei risultati non supportato in {path}: {results.get('format')}")
+    return results
+
+
+def compare_results(baseline: dict, current: dict, threshold: float = DEFAULT_THRESHOLD) -> List[dict]:
+    """
+    Confronta le metriche con la baseline
+
+    Una metrica è una regressione se peggiora di più di threshold (variazione
+    relativa) nella direzione indicata da "better", un miglioramento se
+    migliora di più di threshold.
+
+    Returns:
+        Una riga per metrica con name, baseline, current, change, unit e
+        status ("regression", "improvement", "ok", "new" o "missing")
+    """
+    rows = []
+    base_metrics = baseline["metrics"]
+    current_metrics = current["metrics"]
+    for name in sorted(set(base_metrics) | set(current_metrics)):
+        base = base_metrics.get(name)
+        cur = current_metrics.get(name)
+        row = {
+            "name": name,
+            "baseline": base["value"] if base else None,
+            "current": cur["value"] if cur else None,
+            "unit": (cur or base)["unit"],
+            "change": None,
+        }
+        if base is None:
+            row["status"] = "new"
+        elif cur is None:
+            row["status"] = "missing"
+        elif base["value"] == 0:
+            row["status"] = "ok"
+        else:
+            change = (cur["value"] - base["value"]) / base["value"]
+            row["change"] = change
+            worse = change if cur["better"] == "lower" else -change
+            if worse > threshold:
+                row["status"] = "regression"
+            elif worse < -threshold:
+                row["status"] = "improvement"
+            else:
+                row["status"] = "ok"
+        rows.append(row)
+    return rows
+
+
+def environment_differences(baseline: dict, current: dict) -> List[str]:
+    """Campi dell'ambiente diversi fra baseline e risultato corrente"""
+    base_env = baseline.get("environment", {})
+    current_env = current.get("environment", {})
+    return [
+        f"{key}: {base_env.get(key)} -> {current_env.get(key)}"
+        for key in sorted(set(base_env) | set(current_env))
+        if base_env.get(key) != current_env.get(key)
+    ]
+
+
+def format_comparison(rows: List[dict]) -> str:
+    """Tabella testuale del confronto"""
+    def value(v):
+        return "-" if v is None else f"{v:.3f}" if abs(v) < 100 else f"{v:.0f}"
+
+    labels = {"regression": "REGRESSIONE", "improvement": "migliorato", "ok": "ok",
+              "new": "nuova", "missing": "mancante"}
+    width = max((len(row["name"]) for row in rows), default=10)
+    lines = [f"{'metrica':{width}}  {'baseline':>10}  {'attuale':>10}  {'var.':>8}  esito"]
+    for row in rows:
+        change = "-" if row["change"] is None else f"{row['change']:+.1%}"
+        lines.append(
+            f"{row['name']:{width}}  {value(row['baseline']):>10}  {value(row['current']):>10}  "
+            f"{change:>8}  {labels[row['status']]}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,52 @@
+"""
+Test dell'autorizzazione degli endpoint /admin
+"""
+import unittest
+import sys
+import os
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from src.ai_classification.api.server import require_admin
+from src.ai_classification.core.config import SERVER_CONFIG
+
+
+def request_from(host):
+    return Request({"type": "http", "method": "GET", "path": "/admin/models", "headers": [],
+                    "client": (host, 40000)})
+
+
+class TestRequireAdmin(unittest.TestCase):
+    """Senza token solo localhost, con token l'header è obbligatorio"""
+
+    def setUp(self):
+        self.previous = SERVER_CONFIG["admin_token"]
+
+    def tearDown(self):
+        SERVER_CONFIG["admin_token"] = self.previous
+
+    def assertForbidden(self, host, token=None):
+        with self.assertRaises(HTTPException) as ctx:
+            require_admin(request_from(host), token)
+        self.assertEqual(ctx.exception.status_code, 403)
+
+    def test_without_token_only_loopback(self):
+        SERVER_CONFIG["admin_token"] = None
+        require_admin(request_from("127.0.0.1"), None)
+        require_admin(request_from("::1"), None)
+        self.assertForbidden("10.0.0.7")
+        self.assertForbidden("testclient")
+
+    def test_with_token(self):
+        SERVER_CONFIG["admin_token"] = "segreto"
+        require_admin(request_from("10.0.0.7"), "segreto")
+        self.assertForbidden("10.0.0.7", "sbagliato")
+        self.assertForbidden("127.0.0.1")
+
+
+if __name__ == "__main__":
+    unittest.main()
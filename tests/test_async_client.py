@@ -0,0 +1,91 @@
+"""
+Test del client asincrono con un trasporto httpx simulato
+"""
+import importlib.util
+import json
+import unittest
+import sys
+import os
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+HAS_HTTPX = importlib.util.find_spec("httpx") is not None
+
+
+@unittest.skipUnless(HAS_HTTPX, "httpx è necessario")
+class TestAsyncAIClassificationClient(unittest.IsolatedAsyncioTestCase):
+    """Test per predict_many, retry e streaming del client asincrono"""
+
+    async def asyncSetUp(self):
+        import httpx
+        from src.ai_classification.api.async_client import AsyncAIClassificationClient
+
+        self.requests = 0
+        self.failures = 0
+        self.timeouts = {}
+
+        def handler(request):
+            self.requests += 1
+            self.timeouts[request.url.path] = request.extensions["timeout"]
+            if self.failures > 0:
+                self.failures -= 1
+                return httpx.Response(503, headers={"Retry-After": "0"}, json={"detail": "coda piena"})
+            if request.url.path == "/health":
+                return httpx.Response(200, json={"status": "healthy"})
+            if request.url.path == "/predict_stream":
+                items = [json.loads(line) for line in request.content.splitlines()]
+                body = "".join(json.dumps({"id": item["id"], "category": "ALTRO"}) + "\n" for item in items)
+                return httpx.Response(200, content=body.encode())
+            texts = json.loads(request.content)
+            return httpx.Response(200, json=[{"text": t, "category": "ALTRO", "confidence": 1.0} for t in texts])
+
+        self.client = AsyncAIClassificationClient(
+            "http://test", backoff_factor=0, timeout=12, health_timeout=2, transport=httpx.MockTransport(handler)
+        )
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+
+    async def test_health_and_batch(self):
+        """Stessa interfaccia del client sincrono"""
+        self.assertTrue(await self.client.is_server_healthy())
+        results = await self.client.predict_batch(["a", "b"])
+        self.assertEqual([r["text"] for r in results], ["a", "b"])
+
+    async def test_iter_predictions_preserves_order(self):
+        """I blocchi concorrenti vengono restituiti nell'ordine dei testi"""
+        texts = [f"testo {i}" for i in range(50)]
+        results = [r async for r in self.client.iter_predictions(texts, chunk_size=6, max_concurrency=3)]
+        self.assertEqual([r["text"] for r in results], texts)
+        self.assertEqual(self.requests, 9)
+
+    async def test_retry_on_503(self):
+        """Le risposte 503 vengono ripetute; oltre i tentativi si ottiene None"""
+        self.failures = 2
+        self.assertEqual(len(await self.client.predict_many(["a", "b"])), 2)
+
+        self.failures = 10
+        self.assertIsNone(await self.client.predict_batch(["a"]))
+
+    async def test_predict_stream_ids(self):
+        """Lo streaming assegna gli id per posizione anche tra richieste diverse"""
+        results = [r async for r in self.client.predict_stream((f"t{i}" for i in range(25)), chunk_size=10)]
+        self.assertEqual([r["id"] for r in results], list(range(25)))
+        self.assertEqual(self.requests, 3)
+
+    async def test_timeout_applied_to_every_request(self):
+        """Il timeout del costruttore vale per tutte le richieste, health_timeout per /health"""
+        await self.client.is_server_healthy()
+        await self.client.predict("a")
+        await self.client.predict_batch(["a"])
+        [r async for r in self.client.predict_stream(["a"])]
+
+        self.assertEqual(set(self.timeouts), {"/health", "/predict", "/predict_batch", "/predict_stream"})
+        for path, timeout in self.timeouts.items():
+            expected = 2 if path == "/health" else 12
+            self.assertEqual(timeout, dict.fromkeys(("connect", "read", "write", "pool"), expected), path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+"""
+Test unitari per la pianificazione dei batch per lunghezza
+"""
+import unittest
+import sys
+import os
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.ai_classification.core.batching import plan_token_batches, padded_token_count
+
+
+class TestPlanTokenBatches(unittest.TestCase):
+    """Test per plan_token_batches"""
+
+    def test_all_indices_once(self):
+        """Ogni testo compare in esattamente un batch"""
+        lengths = [5, 120, 7, 512, 9, 30, 6, 6]
+        batches = plan_token_batches(lengths, max_tokens=256, max_batch_size=3)
+
+        flat = sorted(i for batch in batches for i in batch)
+        self.assertEqual(flat, list(range(len(lengths))))
+
+    def test_token_budget_respected(self):
+        """Il costo con padding di ogni batch resta entro il budget"""
+        lengths = [10, 12, 11, 200, 210, 9, 13, 205]
+        batches = plan_token_batches(lengths, max_tokens=450)
+
+        for batch in batches:
+            self.assertLessEqual(len(batch) * max(lengths[i] for i in batch), 450)
+
+    def test_long_text_gets_own_batch(self):
+        """Un testo più lungo del budget viene comunque elaborato"""
+        lengths = [4, 4, 1000]
+        batches = plan_token_batches(lengths, max_tokens=100)
+
+        self.assertIn([2], batches)
+
+    def test_short_texts_not_padded_to_long(self):
+        """I testi brevi non finiscono nel batch del testo lungo"""
+        lengths = [8, 512, 8, 8]
+        batches = plan_token_batches(lengths, max_tokens=1024)
+
+        self.assertEqual(padded_token_count(lengths, batches), 8 * 3 + 512)
+
+    def test_fixed_batches_without_budget(self):
+        """Senza budget i batch mantengono dimensione fissa e ordine originale"""
+        batches = plan_token_batches([3, 1, 2, 5, 4], max_tokens=None, max_batch_size=2)
+
+        self.assertEqual(batches, [[0, 1], [2, 3], [4]])
+
+    def test_empty_input(self):
+        """Nessun testo produce nessun batch"""
+        self.assertEqual(plan_token_batches([], max_tokens=100), [])
+        self.assertEqual(plan_token_batches([], max_tokens=None), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+"""
+Test del confronto fra risultati di benchmark e baseline
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.ai_classification.utils.benchmark import (
+    RESULTS_FORMAT, compare_results, latency_stats, load_results, metric, save_results
+)
+
+
+def results(**metrics):
+    return {"format": RESULTS_FORMAT, "metrics": metrics}
+
+
+class TestBenchmarkComparison(unittest.TestCase):
+    """Regressioni secondo la direzione di ciascuna metrica"""
+
+    def test_direction_and_threshold(self):
+        baseline = results(
+            latency=metric(10.0, "ms", "lower"),
+            throughput=metric(100.0, "testi/s", "higher"),
+            rss=metric(500.0, "MB", "lower"),
+            startup=metric(2.0, "s", "lower"),
+        )
+        current = results(
+            latency=metric(12.0, "ms", "lower"),         # +20%: peggiore
+            throughput=metric(130.0, "testi/s", "higher"),  # +30%: migliore
+            rss=metric(520.0, "MB", "lower"),            # +4%: entro la soglia
+            startup=metric(2.0, "s", "lower"),
+        )
+        rows = {row["name"]: row for row in compare_results(baseline, current, threshold=0.1)}
+        self.assertEqual(rows["latency"]["status"], "regression")
+        self.assertAlmostEqual(rows["latency"]["change"], 0.2)
+        self.assertEqual(rows["throughput"]["status"], "improvement")
+        self.assertEqual(rows["rss"]["status"], "ok")
+        self.assertEqual(rows["startup"]["status"], "ok")
+
+        # Throughput in calo oltre la soglia
+        current["metrics"]["throughput"] = metric(80.0, "testi/s", "higher")
+        rows = {row["name"]: row for row in compare_results(baseline, current, threshold=0.1)}
+        self.assertEqual(rows["throughput"]["status"], "regression")
+
+    def test_new_and_missing_metrics(self):
+        rows = compare_results(results(old=metric(1, "s", "lower")), results(new=metric(1, "s", "lower")))
+        self.assertEqual({row["name"]: row["status"] for row in rows}, {"new": "new", "old": "missing"})
+
+    def test_latency_stats(self):
+        stats = latency_stats([0.001 * i for i in range(1, 101)])
+        self.assertAlmostEqual(stats["mean"], 50.5)
+        self.assertAlmostEqual(stats["p50"], 51.0)
+        self.assertAlmostEqual(stats["p99"], 100.0)
+        with self.assertRaises(ValueError):
+            metric(1.0, "ms", "faster")
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "benchmarks", "baseline.json")
+            save_results(results(latency=metric(3.5, "ms", "lower")), path)
+            self.assertEqual(load_results(path)["metrics"]["latency"]["value"], 3.5)
+            save_results({"format": 0, "metrics": {}}, path)
+            with self.assertRaises(ValueError):
+                load_results(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
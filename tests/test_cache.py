@@ -0,0 +1,156 @@
+"""
+Test unitari per la cache delle predizioni
+"""
+import time
+import unittest
+import sys
+import os
+from unittest import mock
+
+import numpy as np
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.ai_classification.core.cache import PredictionCache
+from src.ai_classification.core.config import CACHE_CONFIG, MODEL_CONFIG, PREFILTER_CONFIG
+from src.ai_classification.core.results import top_k_probabilities
+
+
+class TestPredictionCache(unittest.TestCase):
+    """Test per PredictionCache"""
+
+    def test_hit_and_miss(self):
+        """Un valore inserito viene restituito e conteggiato come hit"""
+        cache = PredictionCache(max_size=10)
+        key = cache.make_key("GPT-4 genera testo", "v1")
+
+        self.assertIsNone(cache.get(key))
+        cache.put(key, (2, 0.9))
+        self.assertEqual(cache.get(key), (2, 0.9))
+
+        stats = cache.get_stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+    def test_key_normalization(self):
+        """Testi che differiscono solo negli spazi condividono la chiave"""
+        self.assertEqual(
+            PredictionCache.make_key("  Robot   industriali\n", "v1"),
+            PredictionCache.make_key("Robot industriali", "v1")
+        )
+
+    def test_key_depends_on_model_version(self):
+        """Un nuovo modello non riusa le predizioni del precedente"""
+        self.assertNotEqual(
+            PredictionCache.make_key("Robot industriali", "v1"),
+            PredictionCache.make_key("Robot industriali", "v2")
+        )
+
+    def test_lru_eviction(self):
+        """Oltre max_size viene eliminata la voce usata meno di recente"""
+        cache = PredictionCache(max_size=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get_stats()["evictions"], 1)
+
+    def test_ttl_expiry(self):
+        """Le voci scadute non vengono restituite"""
+        cache = PredictionCache(max_size=10, ttl_seconds=0.01)
+        cache.put("a", 1)
+        time.sleep(0.02)
+
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+    def test_clear(self):
+        """clear svuota la cache"""
+        cache = PredictionCache(max_size=10)
+        cache.put("a", 1)
+        cache.clear()
+
+        self.assertIsNone(cache.get("a"))
+
+
+class StubModelManager:
+    """ModelManager senza modello: registra i testi ricevuti da predict_batch"""
+
+    def __init__(self, paths=None):
+        self.paths = paths or {}
+        self.model_version = "stub:1"
+        self.calls = []
+
+    def load_or_create_model(self):
+        return True
+
+    def train_model(self, training_data):
+        pass
+
+    def predict_batch(self, texts, return_probabilities=False, top_k=None):
+        self.calls.append(list(texts))
+        num_labels = MODEL_CONFIG["num_labels"]
+        classes = np.array([len(text) % num_labels for text in texts])
+        probabilities = np.full((len(texts), num_labels), 0.1 / (num_labels - 1))
+        probabilities[np.arange(len(texts)), classes] = 0.9
+        outputs = [classes, probabilities.max(axis=-1)]
+        if return_probabilities:
+            outputs.append(probabilities)
+        if top_k:
+            outputs += list(top_k_probabilities(probabilities, top_k))
+        return tuple(outputs)
+
+
+class TestClassifierCache(unittest.TestCase):
+    """La cache di AITextClassifier davanti al modello"""
+
+    def setUp(self):
+        from src.ai_classification.core import classifier
+
+        for patcher in (
+            mock.patch.object(classifier, "ModelManager", StubModelManager),
+            mock.patch.dict(CACHE_CONFIG, {"enabled": True, "max_size": 100, "ttl_seconds": None}),
+            mock.patch.dict(PREFILTER_CONFIG, {"enabled": False}),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.classifier = classifier.AITextClassifier(auto_train=False)
+        self.model = self.classifier.model_manager
+
+    def test_repeated_texts_skip_the_model(self):
+        """Solo i testi mai visti arrivano al modello, nell'ordine della richiesta"""
+        first = self.classifier.predict_records(["reti neurali", "ricetta"])
+        second = self.classifier.predict_records(["ricetta", "robot industriali", "  reti   neurali "])
+
+        self.assertEqual(self.model.calls, [["reti neurali", "ricetta"], ["robot industriali"]])
+        self.assertEqual(second[0], first[1])
+        self.assertEqual(second[2], first[0])
+        self.assertEqual(self.classifier.cache.get_stats()["hits"], 2)
+
+    def test_probabilities_and_top_k_bypass_the_cache(self):
+        """Le richieste con probabilità o top-k passano sempre dal modello"""
+        self.classifier.predict_records(["reti neurali"])
+        with_probabilities = self.classifier.predict_records(["reti neurali"], return_probabilities=True)
+        with_top_k = self.classifier.predict_records(["reti neurali"], top_k=2)
+
+        self.assertEqual(len(self.model.calls), 3)
+        self.assertEqual(len(with_probabilities[0].probabilities), MODEL_CONFIG["num_labels"])
+        self.assertEqual(len(with_top_k[0].top_k[0]), 2)
+        # Le risposte complete non finiscono in cache
+        self.assertEqual(len(self.classifier.cache), 1)
+
+    def test_train_clears_the_cache(self):
+        """Dopo il training i testi già visti tornano al modello"""
+        self.classifier.predict_records(["reti neurali"])
+        self.classifier.train([("reti neurali", 0)])
+        self.assertEqual(len(self.classifier.cache), 0)
+
+        self.classifier.predict_records(["reti neurali"])
+        self.assertEqual(self.model.calls, [["reti neurali"], ["reti neurali"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+"""
+Test della cascata a uscita anticipata su un DistilBERT minimo non addestrato
+"""
+import importlib.util
+import os
+import sys
+import tempfile
+import unittest
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+HAS_TORCH = all(importlib.util.find_spec(name) is not None for name in ("torch", "transformers"))
+
+
+@unittest.skipUnless(HAS_TORCH, "torch e transformers sono necessari")
+class TestEarlyExitCascade(unittest.TestCase):
+    """Primo stadio condiviso con il modello completo ed escalation sotto soglia"""
+
+    def setUp(self):
+        import torch
+        from transformers import DistilBertConfig, DistilBertForSequenceClassification
+        from src.ai_classification.core.cascade import EarlyExitCascade
+
+        torch.manual_seed(0)
+        config = DistilBertConfig(vocab_size=64, dim=16, hidden_dim=32, n_layers=3, n_heads=2,
+                                  max_position_embeddings=32, num_labels=4)
+        self.model = DistilBertForSequenceClassification(config).eval()
+        self.cascade = EarlyExitCascade(self.model, exit_layer=1)
+        self.inputs = {
+            "input_ids": torch.randint(1, 64, (5, 10)),
+            "attention_mask": torch.ones(5, 10, dtype=torch.long),
+        }
+        self.inputs["attention_mask"][0, 6:] = 0
+
+    def full_probabilities(self):
+        import torch
+        with torch.no_grad():
+            return torch.softmax(self.model(**self.inputs).logits, dim=-1)
+
+    def test_layers_are_shared(self):
+        """Il primo stadio riusa i moduli del modello completo senza copiarli"""
+        self.assertIs(self.cascade.encoder.embeddings, self.model.distilbert.embeddings)
+        self.assertIs(self.cascade.encoder.transformer.layer[0], self.model.distilbert.transformer.layer[0])
+        self.assertEqual(len(self.cascade.encoder.transformer.layer), 1)
+
+    def test_threshold_selects_stage(self):
+        """Soglia 0: solo primo stadio; soglia oltre 1: tutto al modello completo"""
+        import torch
+
+        self.cascade.threshold = 0.0
+        early = self.cascade.predict_probabilities(self.inputs, self.model)
+        self.assertTrue(torch.allclose(early, self.cascade.early_probabilities(self.inputs)))
+        self.assertEqual(self.cascade.get_stats()["escalated"], 0)
+
+        self.cascade.threshold = 1.1
+        full = self.cascade.predict_probabilities(self.inputs, self.model)
+        self.assertTrue(torch.allclose(full, self.full_probabilities(), atol=1e-5))
+
+        stats = self.cascade.get_stats()
+        self.assertEqual(stats["total"], 10)
+        self.assertEqual(stats["escalated"], 5)
+        self.assertAlmostEqual(stats["escalation_rate"], 0.5)
+
+    def test_escalation_reuses_first_stage(self):
+        """Le righe escalate proseguono dal layer di uscita: i primi layer girano una volta"""
+        import torch
+
+        calls = {"first": 0, "last": 0}
+        layers = self.model.distilbert.transformer.layer
+        layers[0].register_forward_hook(lambda *_: calls.__setitem__("first", calls["first"] + 1))
+        layers[-1].register_forward_hook(lambda *_: calls.__setitem__("last", calls["last"] + 1))
+
+        self.cascade.threshold = 1.1
+        probabilities = self.cascade.predict_probabilities(self.inputs, self.model)
+        self.assertEqual(calls, {"first": 1, "last": 1})
+        self.assertTrue(torch.allclose(probabilities, self.full_probabilities(), atol=1e-5))
+
+    def test_train_and_save(self):
+        """La testa impara le etichette e si ricarica identica"""
+        import torch
+        from src.ai_classification.core.cascade import EarlyExitCascade
+
+        features = self.cascade.features(self.inputs)
+        labels = torch.tensor([0, 1, 2, 3, 0])
+        self.cascade.train_head(features, labels, epochs=300, learning_rate=1e-2)
+        with torch.no_grad():
+            predicted = self.cascade.head(features).argmax(dim=-1)
+        self.assertTrue(torch.equal(predicted, labels))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "head.pt")
+            self.cascade.save(path, "trained:1")
+            artifact = EarlyExitCascade.read_artifact(path)
+        self.assertEqual(artifact["model_version"], "trained:1")
+        self.assertEqual(artifact["exit_layer"], 1)
+
+        restored = EarlyExitCascade(self.model, exit_layer=1)
+        restored.load_head(artifact)
+        self.assertTrue(torch.allclose(restored.early_probabilities(self.inputs),
+                                       self.cascade.early_probabilities(self.inputs)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+"""
+Test unitari per il comando classify-file
+"""
+import json
+import os
+import tempfile
+import unittest
+import sys
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.ai_classification.cli import classify_file, confidence_level, read_records
+
+
+class FakeModelManager:
+    model_version = "trained:1"
+
+
+class FakeClassifier:
+    """Classificatore deterministico che può interrompersi dopo un numero di batch"""
+
+    def __init__(self, fail_after=None):
+        self.model_manager = FakeModelManager()
+        self.fail_after = fail_after
+        self.calls = 0
+
+    def classify_batch(self, texts, return_confidence=False):
+        if self.fail_after is not None and self.calls >= self.fail_after:
+            raise KeyboardInterrupt
+        self.calls += 1
+        return [("ALTRO", 0.9) if "ricetta" in text else ("AI Generativa", 0.6) for text in texts]
+
+
+class TestClassifyFile(unittest.TestCase):
+    """Test per la classificazione offline con checkpoint"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.input_path = os.path.join(self.tmp.name, "titoli.jsonl")
+        with open(self.input_path, "w", encoding="utf-8") as f:
+            for i in range(10):
+                title = "ricetta della carbonara" if i % 2 else "GPT genera testo"
+                f.write(json.dumps({"id": f"t{i}", "title": title}) + "\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_json_output_shape(self):
+        """Il formato json è un array come classification_results.json"""
+        output_path = os.path.join(self.tmp.name, "risultati.json")
+        stats = classify_file(FakeClassifier(), self.input_path, output_path, chunk_size=3)
+
+        with open(output_path, encoding="utf-8") as f:
+            results = json.load(f)
+        self.assertEqual(stats["records"], 10)
+        self.assertEqual([r["id"] for r in results], [f"t{i}" for i in range(10)])
+        self.assertEqual(set(results[0]), {"id", "title", "category", "confidence", "confidence_level"})
+        self.assertFalse(os.path.exists(output_path + ".checkpoint"))
+
+    def test_resume_after_interruption(self):
+        """Un job interrotto riprende dall'ultimo blocco completato"""
+        for output_name in ("risultati.json", "risultati.jsonl"):
+            output_path = os.path.join(self.tmp.name, output_name)
+            with self.assertRaises(KeyboardInterrupt):
+                classify_file(FakeClassifier(fail_after=2), self.input_path, output_path, chunk_size=3)
+            self.assertTrue(os.path.exists(output_path + ".checkpoint"))
+
+            classifier = FakeClassifier()
+            stats = classify_file(classifier, self.input_path, output_path, chunk_size=3)
+            self.assertEqual((stats["resumed"], classifier.calls), (6, 2))
+
+            with open(output_path, encoding="utf-8") as f:
+                if output_name.endswith(".jsonl"):
+                    results = [json.loads(line) for line in f]
+                else:
+                    results = json.load(f)
+            self.assertEqual([r["id"] for r in results], [f"t{i}" for i in range(10)])
+
+    def test_checkpoint_from_other_model_rejected(self):
+        """Un checkpoint creato con un'altra versione del modello non viene usato"""
+        output_path = os.path.join(self.tmp.name, "risultati.jsonl")
+        with self.assertRaises(KeyboardInterrupt):
+            classify_file(FakeClassifier(fail_after=1), self.input_path, output_path, chunk_size=3)
+
+        classifier = FakeClassifier()
+        classifier.model_manager.model_version = "trained:2"
+        with self.assertRaises(ValueError):
+            classify_file(classifier, self.input_path, output_path, chunk_size=3)
+
+    def test_read_csv_and_levels(self):
+        """I CSV usano l'intestazione; senza id si usa la posizione"""
+        csv_path = os.path.join(self.tmp.name, "titoli.csv")
+        with open(csv_path, "w", encoding="utf-8") as f:
+            f.write('title\n"Robot, sensori e attuatori"\nAuto a guida autonoma\n')
+        self.assertEqual(list(read_records(csv_path, "csv")),
+                         [(1, "Robot, sensori e attuatori"), (2, "Auto a guida autonoma")])
+        self.assertEqual([confidence_level(c) for c in (0.95, 0.6, 0.2)], ["Alta", "Media", "Bassa"])
+
+    def test_read_jsonl_non_text_values(self):
+        """Righe JSON valide ma senza testo (numeri, array, null) diventano record senza testo"""
+        jsonl_path = os.path.join(self.tmp.name, "misti.jsonl")
+        with open(jsonl_path, "w", encoding="utf-8") as f:
+            f.write('"Robot industriali"\n42\n[1, 2]\nnull\n{"id": "x", "title": "GPT"}\n')
+        self.assertEqual(list(read_records(jsonl_path, "jsonl")),
+                         [(1, "Robot industriali"), (2, None), (3, None), (4, None), ("x", "GPT")])
+
+
+if __name__ == "__main__":
+    unittest.main()
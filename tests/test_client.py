@@ -0,0 +1,147 @@
+"""
+Test del client HTTP contro un server locale minimale
+"""
+import importlib.util
+import json
+import threading
+import time
+import unittest
+import sys
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+HAS_REQUESTS = importlib.util.find_spec("requests") is not None
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    """Simula /predict_batch e /health; le prime richieste possono ricevere 503"""
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        texts = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with self.server.lock:
+            self.server.requests += 1
+            reject = self.server.failures > 0
+            self.server.failures -= 1 if reject else 0
+
+        if reject:
+            body, status = b'{"detail": "coda piena"}', 503
+        else:
+            body = json.dumps([
+                {"text": t, "prediction": 0, "category": "ALTRO", "confidence": 1.0} for t in texts
+            ]).encode()
+            status = 200
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if reject:
+            self.send_header("Retry-After", "0")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        time.sleep(self.server.health_delay)
+        with self.server.lock:
+            self.server.requests += 1
+            reject = self.server.failures > 0
+            self.server.failures -= 1 if reject else 0
+
+        body = b'{"status": "healthy"}'
+        self.send_response(503 if reject else 200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@unittest.skipUnless(HAS_REQUESTS, "requests è necessario")
+class TestAIClassificationClient(unittest.TestCase):
+    """Test per connessioni riusate, predict_many e retry"""
+
+    def setUp(self):
+        from src.ai_classification.api.client import AIClassificationClient
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeHandler)
+        self.server.lock = threading.Lock()
+        self.server.connections = 0
+        self.server.requests = 0
+        self.server.failures = 0
+        self.server.health_delay = 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        self.client = AIClassificationClient(
+            f"http://127.0.0.1:{self.server.server_port}", backoff_factor=0
+        )
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connection_reused(self):
+        """Chiamate successive riusano la stessa connessione keep-alive"""
+        for _ in range(5):
+            self.assertEqual(len(self.client.predict_batch(["a", "b"])), 2)
+        self.assertEqual(self.server.connections, 1)
+
+    def test_predict_many_preserves_order(self):
+        """I blocchi inviati in parallelo vengono ricomposti in ordine"""
+        texts = [f"testo {i}" for i in range(100)]
+        results = self.client.predict_many(texts, chunk_size=7, max_concurrency=4)
+        self.assertEqual([r["text"] for r in results], texts)
+        self.assertEqual(self.server.requests, 15)
+        self.assertLessEqual(self.server.connections, 4)
+
+    def test_retry_on_503(self):
+        """Le risposte 503 vengono ripetute fino al successo"""
+        self.server.failures = 2
+        results = self.client.predict_batch(["a"])
+        self.assertEqual(len(results), 1)
+        self.assertEqual(self.server.requests, 3)
+
+    def test_health_check_not_retried(self):
+        """Il controllo di /health fallisce alla prima risposta 503, senza retry"""
+        self.server.failures = 1
+        self.assertFalse(self.client.is_server_healthy())
+        self.assertEqual(self.server.requests, 1)
+        self.assertTrue(self.client.is_server_healthy())
+
+    def test_health_check_not_retried_with_trailing_slash(self):
+        """Con "/" finale nell'indirizzo /health resta senza retry"""
+        from src.ai_classification.api.client import AIClassificationClient
+
+        client = AIClassificationClient(f"http://127.0.0.1:{self.server.server_port}/", backoff_factor=0)
+        self.server.failures = 1
+        self.assertFalse(client.is_server_healthy())
+        self.assertEqual(self.server.requests, 1)
+        self.assertEqual(len(client.predict_batch(["a"])), 1)
+        client.close()
+
+    def test_health_check_uses_short_timeout(self):
+        """Un server bloccato fa fallire /health dopo health_timeout, non dopo timeout"""
+        from src.ai_classification.api.client import AIClassificationClient
+
+        self.assertEqual(self.client.health_timeout, 5)
+        self.server.health_delay = 1
+        client = AIClassificationClient(f"http://127.0.0.1:{self.server.server_port}", timeout=30,
+                                        health_timeout=0.2)
+        start = time.perf_counter()
+        self.assertFalse(client.is_server_healthy())
+        self.assertLess(time.perf_counter() - start, 1)
+        client.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+Test unitari per il micro-batching delle richieste del server
+"""
+import asyncio
+import unittest
+import sys
+import os
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.ai_classification.api.coalescer import RequestCoalescer
+
+
+class TestRequestCoalescer(unittest.IsolatedAsyncioTestCase):
+    """Test per RequestCoalescer"""
+
+    async def asyncSetUp(self):
+        self.batches = []
+
+        async def run_batch(items):
+            self.batches.append(list(items))
+            return [item.upper() for item in items]
+
+        self.coalescer = RequestCoalescer(run_batch, max_batch_size=4, max_wait_ms=50)
+        self.coalescer.start()
+
+    async def asyncTearDown(self):
+        await self.coalescer.stop()
+
+    async def test_concurrent_requests_share_batch(self):
+        """Le richieste concorrenti vengono eseguite in un unico batch"""
+        results = await asyncio.gather(*(self.coalescer.submit(t) for t in ["a", "b", "c"]))
+
+        self.assertEqual(results, ["A", "B", "C"])
+        self.assertEqual(self.batches, [["a", "b", "c"]])
+
+    async def test_max_batch_size(self):
+        """Un batch non supera max_batch_size"""
+        texts = [f"t{i}" for i in range(10)]
+        results = await asyncio.gather(*(self.coalescer.submit(t) for t in texts))
+
+        self.assertEqual(results, [t.upper() for t in texts])
+        self.assertTrue(all(len(batch) <= 4 for batch in self.batches))
+
+    async def test_single_request_after_timeout(self):
+        """Una richiesta isolata viene eseguita allo scadere della finestra"""
+        result = await asyncio.wait_for(self.coalescer.submit("x"), timeout=1)
+
+        self.assertEqual(result, "X")
+        self.assertEqual(self.batches, [["x"]])
+
+    async def test_errors_propagate_to_callers(self):
+        """Un errore del batch viene restituito a tutti i chiamanti"""
+        async def failing(items):
+            raise RuntimeError("errore modello")
+
+        self.coalescer.run_batch = failing
+        with self.assertRaises(RuntimeError):
+            await self.coalescer.submit("x")
+
+    async def test_stats(self):
+        """Le statistiche registrano distribuzione dei batch e attese"""
+        await asyncio.gather(*(self.coalescer.submit(t) for t in ["a", "b"]))
+        stats = self.coalescer.get_stats()
+
+        self.assertEqual(stats["requests"], 2)
+        self.assertEqual(stats["batch_size_distribution"], {2: 1})
+        self.assertGreaterEqual(stats["queue_wait_ms"]["p99"], 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
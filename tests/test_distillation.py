@@ -0,0 +1,126 @@
+"""
+Test della costruzione dello studente e della riduzione del vocabolario
+"""
+import importlib.util
+import os
+import sys
+import tempfile
+import unittest
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+HAS_TORCH = all(importlib.util.find_spec(name) is not None for name in ("torch", "transformers", "tokenizers"))
+
+WORDS = "reti neurali per il riconoscimento di immagini ricetta della carbonara robot auto guida".split()
+CORPUS = ["reti neurali per il riconoscimento di immagini", "robot per la guida"]
+
+
+def make_tokenizer():
+    """Tokenizer WordPiece minimo: token speciali, parole e lettere singole"""
+    from tokenizers import Tokenizer, models, normalizers, pre_tokenizers, processors
+    from transformers import PreTrainedTokenizerFast
+
+    tokens = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + WORDS
+    tokens += [chr(c) for c in range(97, 123)] + ["##" + chr(c) for c in range(97, 123)]
+    backend = Tokenizer(models.WordPiece({t: i for i, t in enumerate(tokens)}, unk_token="[UNK]"))
+    backend.normalizer = normalizers.BertNormalizer(lowercase=True)
+    backend.pre_tokenizer = pre_tokenizers.BertPreTokenizer()
+    backend.post_processor = processors.TemplateProcessing(
+        single="[CLS] $A [SEP]", special_tokens=[("[CLS]", 2), ("[SEP]", 3)]
+    )
+    return PreTrainedTokenizerFast(
+        tokenizer_object=backend, unk_token="[UNK]", pad_token="[PAD]",
+        cls_token="[CLS]", sep_token="[SEP]", mask_token="[MASK]"
+    )
+
+
+@unittest.skipUnless(HAS_TORCH, "torch, transformers e tokenizers sono necessari")
+class TestDistillation(unittest.TestCase):
+    """Lo studente eredita i pesi del teacher e resta caricabile da disco"""
+
+    def setUp(self):
+        import torch
+        from transformers import DistilBertConfig, DistilBertForSequenceClassification
+
+        torch.manual_seed(0)
+        self.tokenizer = make_tokenizer()
+        config = DistilBertConfig(vocab_size=len(self.tokenizer), dim=16, hidden_dim=32, n_layers=4,
+                                  n_heads=2, max_position_embeddings=64, num_labels=3)
+        self.teacher = DistilBertForSequenceClassification(config).eval()
+
+    def logits(self, model, tokenizer, texts):
+        import torch
+        inputs = tokenizer(texts, padding=True, return_tensors="pt")
+        with torch.no_grad():
+            return model(**inputs).logits
+
+    def test_pruned_tokenizer_keeps_corpus_tokenization(self):
+        """Stessi token sul corpus, id speciali invariati, parole nuove senza [UNK]"""
+        from transformers import AutoTokenizer
+        from src.ai_classification.core.distillation import prune_vocabulary, save_pruned_tokenizer
+
+        kept_ids = prune_vocabulary(self.tokenizer, CORPUS)
+        self.assertLess(len(kept_ids), len(self.tokenizer))
+        self.assertNotIn(self.tokenizer.convert_tokens_to_ids("carbonara"), kept_ids)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            save_pruned_tokenizer(self.tokenizer, kept_ids, tmp)
+            pruned = AutoTokenizer.from_pretrained(tmp)
+
+        self.assertEqual(len(pruned), len(kept_ids))
+        self.assertEqual(pruned.cls_token_id, self.tokenizer.cls_token_id)
+        self.assertEqual(pruned.pad_token_id, self.tokenizer.pad_token_id)
+        for text in CORPUS:
+            self.assertEqual(pruned.tokenize(text), self.tokenizer.tokenize(text))
+        self.assertNotIn("[UNK]", pruned.tokenize("ricetta della carbonara"))
+
+    def test_student_layers_and_vocabulary(self):
+        """Con tutti i layer lo studente a vocabolario ridotto coincide con il teacher sul corpus"""
+        import torch
+        from transformers import AutoTokenizer
+        from src.ai_classification.core.distillation import (
+            build_student, prune_vocabulary, save_pruned_tokenizer
+        )
+
+        kept_ids = prune_vocabulary(self.tokenizer, CORPUS)
+        with tempfile.TemporaryDirectory() as tmp:
+            save_pruned_tokenizer(self.tokenizer, kept_ids, tmp)
+            pruned = AutoTokenizer.from_pretrained(tmp)
+
+        full = build_student(self.teacher, 4, kept_ids).eval()
+        self.assertTrue(torch.allclose(self.logits(full, pruned, CORPUS),
+                                       self.logits(self.teacher, self.tokenizer, CORPUS), atol=1e-5))
+
+        student = build_student(self.teacher, 2, kept_ids)
+        self.assertEqual(student.config.n_layers, 2)
+        self.assertEqual(student.config.vocab_size, len(kept_ids))
+        # Layer equidistanti: il primo e l'ultimo del teacher
+        self.assertTrue(torch.equal(student.distilbert.transformer.layer[1].ffn.lin1.weight,
+                                    self.teacher.distilbert.transformer.layer[3].ffn.lin1.weight))
+
+    def test_train_student_follows_teacher(self):
+        """Il training avvicina lo studente alle distribuzioni del teacher"""
+        import numpy as np
+        from src.ai_classification.core.distillation import (
+            build_student, predict_probabilities, train_student
+        )
+
+        texts = CORPUS + ["ricetta della carbonara", "auto per la guida"]
+        # Distribuzioni nette: quelle del teacher non addestrato sono quasi uniformi
+        teacher_probabilities = np.full((4, 3), 0.05, dtype=np.float32)
+        teacher_probabilities[np.arange(4), [0, 1, 2, 1]] = 0.9
+        student = build_student(self.teacher, 1)
+
+        def distance():
+            student_probabilities = predict_probabilities(student, self.tokenizer, texts, "cpu")
+            return float(abs(student_probabilities - teacher_probabilities).sum())
+
+        before = distance()
+        train_student(student, self.tokenizer, texts, teacher_probabilities, [0, None, None, 1], "cpu",
+                      num_epochs=30, learning_rate=1e-3, batch_size=2, alpha=1.0)
+        self.assertLess(distance(), before)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+"""
+Test unitari per l'esecuzione dell'inferenza fuori dall'event loop
+"""
+import asyncio
+import threading
+import time
+import unittest
+import sys
+import os
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.ai_classification.api.executor import InferenceExecutor, InferenceQueueFullError
+
+
+class TestInferenceExecutor(unittest.IsolatedAsyncioTestCase):
+    """Test per InferenceExecutor"""
+
+    async def asyncSetUp(self):
+        self.executor = InferenceExecutor(max_workers=1, max_pending=2)
+
+    async def asyncTearDown(self):
+        self.executor.shutdown()
+
+    async def test_runs_outside_event_loop(self):
+        """La funzione bloccante gira in un thread diverso da quello del loop"""
+        thread_name = await self.executor.run(lambda: threading.current_thread().name)
+
+        self.assertTrue(thread_name.startswith("inference"))
+
+    async def test_event_loop_stays_responsive(self):
+        """Durante una chiamata lenta il loop continua a servire altri task"""
+        slow = asyncio.ensure_future(self.executor.run(time.sleep, 0.2))
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+
+        self.assertLess(time.perf_counter() - start, 0.1)
+        await slow
+
+    async def test_rejects_when_full(self):
+        """Oltre max_pending le richieste vengono rifiutate subito"""
+        running = [asyncio.ensure_future(self.executor.run(time.sleep, 0.1)) for _ in range(2)]
+        await asyncio.sleep(0)
+
+        with self.assertRaises(InferenceQueueFullError):
+            await self.executor.run(time.sleep, 0.1)
+        self.assertEqual(self.executor.get_stats()["rejected"], 1)
+
+        await asyncio.gather(*running)
+        self.assertEqual(self.executor.pending, 0)
+
+    async def test_cancelled_call_keeps_slot_until_done(self):
+        """Annullare l'attesa non libera il posto finché la chiamata non termina"""
+        started = threading.Event()
+        release = threading.Event()
+
+        def blocking():
+            started.set()
+            release.wait(5)
+
+        running = asyncio.ensure_future(self.executor.run(blocking))
+        while not started.is_set():
+            await asyncio.sleep(0.005)
+        running.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await running
+        self.assertEqual(self.executor.pending, 1)
+
+        queued = asyncio.ensure_future(self.executor.run(time.sleep, 0))
+        await asyncio.sleep(0)
+        with self.assertRaises(InferenceQueueFullError):
+            await self.executor.run(time.sleep, 0)
+
+        release.set()
+        await queued
+        await asyncio.sleep(0.05)
+        self.assertEqual(self.executor.pending, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,177 @@
+"""
+Test del ricaricamento a caldo: scambio atomico, drenaggio e rilascio
+"""
+import asyncio
+import unittest
+import sys
+import os
+import tempfile
+from unittest import mock
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.ai_classification.api.hot_reload import ModelReloader
+from src.ai_classification.core.classifier import AITextClassifier
+from src.ai_classification.core.model_utils import ModelManager
+from src.ai_classification.core.versions import publish_version, version_dir, version_paths
+
+
+class FakeModelManager:
+    def __init__(self):
+        self.warmed_up = False
+        self.model_version = "trained:1"
+
+    def predict_batch(self, texts):
+        self.warmed_up = True
+
+
+class FakeClassifier:
+    """Registra riscaldamento e rilascio al posto di un AITextClassifier"""
+
+    def __init__(self, version):
+        self.version = version
+        self.model_manager = FakeModelManager()
+        self.is_trained = True
+        self.released = False
+
+    def close_worker_pool(self):
+        pass
+
+    def cleanup(self):
+        self.released = True
+
+
+def load_version(version):
+    return FakeClassifier(version or "v1"), version or "v1"
+
+
+class TestModelReloader(unittest.TestCase):
+    """Le richieste in corso terminano sulla versione precedente"""
+
+    def test_reload_swaps_and_releases(self):
+        async def scenario():
+            reloader = ModelReloader(load_version, drain_timeout=5)
+            reloader.load_initial()
+            old = reloader.classifier
+
+            result = await reloader.reload("v2")
+            self.assertEqual(result, {"version": "v2", "previous_version": "v1", "drained": True})
+            self.assertEqual(reloader.classifier.version, "v2")
+            self.assertTrue(reloader.classifier.model_manager.warmed_up)
+            self.assertTrue(old.released)
+            self.assertEqual(reloader.get_status()["reloads"], 1)
+
+        asyncio.run(scenario())
+
+    def test_in_flight_requests_drain_before_release(self):
+        async def scenario():
+            reloader = ModelReloader(load_version, drain_timeout=5)
+            reloader.load_initial()
+            finished = asyncio.Event()
+
+            async def slow_request():
+                with reloader.lease() as classifier:
+                    await finished.wait()
+                    return classifier
+
+            request = asyncio.ensure_future(slow_request())
+            await asyncio.sleep(0)
+            reload = asyncio.ensure_future(reloader.reload("v2"))
+            while reloader.active.version != "v2":
+                await asyncio.sleep(0.01)
+
+            # Le nuove richieste usano già v2, la vecchia versione attende la richiesta in corso
+            with reloader.lease() as classifier:
+                self.assertEqual(classifier.version, "v2")
+            self.assertFalse(reload.done())
+
+            finished.set()
+            served_by = await request
+            self.assertEqual(served_by.version, "v1")
+            self.assertTrue((await reload)["drained"])
+            self.assertTrue(served_by.released)
+
+        asyncio.run(scenario())
+
+    def test_drain_timeout(self):
+        async def scenario():
+            reloader = ModelReloader(load_version, drain_timeout=0.05)
+            reloader.load_initial()
+            with reloader.lease() as old:
+                result = await reloader.reload("v2")
+            self.assertFalse(result["drained"])
+            self.assertTrue(old.released)
+
+        asyncio.run(scenario())
+
+    def test_failed_reload_keeps_active_version(self):
+        def failing(version):
+            if version == "rotta":
+                raise ValueError("Versione del modello non trovata: rotta")
+            return load_version(version)
+
+        async def scenario():
+            reloader = ModelReloader(failing)
+            reloader.load_initial()
+            with self.assertRaises(ValueError):
+                await reloader.reload("rotta")
+            self.assertEqual(reloader.active.version, "v1")
+            self.assertFalse(reloader.classifier.released)
+            self.assertEqual(reloader.get_status()["failed_reloads"], 1)
+
+        asyncio.run(scenario())
+
+    def test_broken_version_is_not_activated(self):
+        """Pesi corrotti: load_or_create_model ripiega sul modello base, la versione non diventa attiva"""
+        with tempfile.TemporaryDirectory() as tmp:
+            model = os.path.join(tmp, "model")
+            versions = os.path.join(tmp, "versions")
+            os.makedirs(model)
+            with open(os.path.join(model, "config.json"), "w") as f:
+                f.write("{non è json")
+            with open(os.path.join(model, "model.safetensors"), "wb") as f:
+                f.write(b"pesi corrotti")
+            publish_version(model, model, "rotta", versions)
+
+            def load(version):
+                if version is None:
+                    return load_version(None)
+                paths = version_paths(version_dir(version, versions))
+                return AITextClassifier(auto_train=False, model_paths=paths), version
+
+            def base_model(manager):
+                # Al posto del download del modello base
+                manager.model_version = "base:test"
+
+            async def scenario():
+                reloader = ModelReloader(load)
+                reloader.load_initial()
+                with mock.patch.object(ModelManager, "_create_new_model", base_model):
+                    with self.assertRaises(RuntimeError):
+                        await reloader.reload("rotta")
+                self.assertEqual(reloader.active.version, "v1")
+                self.assertFalse(reloader.classifier.released)
+                self.assertEqual(reloader.get_status()["failed_reloads"], 1)
+
+            asyncio.run(scenario())
+
+    def test_watch_loads_new_current_version(self):
+        async def scenario():
+            reloader = ModelReloader(load_version)
+            reloader.load_initial()
+            current = ["v1"]
+            task = asyncio.ensure_future(reloader.watch(lambda: current[0], interval=0.01))
+            current[0] = "v3"
+            for _ in range(200):
+                if reloader.active.version == "v3":
+                    break
+                await asyncio.sleep(0.01)
+            task.cancel()
+            self.assertEqual(reloader.active.version, "v3")
+
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    unittest.main()
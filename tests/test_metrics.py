@@ -0,0 +1,70 @@
+"""
+Test delle metriche in formato Prometheus
+"""
+import unittest
+import sys
+import os
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.ai_classification.core import metrics
+from src.ai_classification.core.metrics import Counter, Histogram, format_distribution, process_metrics
+
+
+class TestPrometheusMetrics(unittest.TestCase):
+    """Formato testuale e bucket cumulativi"""
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram("latency_seconds", "Latenza", (0.1, 1.0), labelnames=("stage",))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value, ("forward",))
+
+        lines = histogram.render().splitlines()
+        self.assertEqual(lines[:2], ["# HELP latency_seconds Latenza", "# TYPE latency_seconds histogram"])
+        self.assertEqual(lines[2:], [
+            'latency_seconds_bucket{stage="forward",le="0.1"} 2',
+            'latency_seconds_bucket{stage="forward",le="1"} 3',
+            'latency_seconds_bucket{stage="forward",le="+Inf"} 4',
+            'latency_seconds_sum{stage="forward"} 3.65',
+            'latency_seconds_count{stage="forward"} 4',
+        ])
+        self.assertEqual(histogram.snapshot(("forward",)), (4, 3.65))
+
+    def test_counter_and_label_escaping(self):
+        counter = Counter("requests_total", "Richieste", labelnames=("endpoint",))
+        counter.inc(labels=('/a"b',))
+        counter.inc(2, labels=('/a"b',))
+        self.assertIn('requests_total{endpoint="/a\\"b"} 3', counter.render())
+
+    def test_distribution_as_histogram(self):
+        text = format_distribution("batch_size", "Batch", {1: 3, 4: 1, 100: 1}, (1, 8))
+        self.assertIn('batch_size_bucket{le="1"} 3', text)
+        self.assertIn('batch_size_bucket{le="8"} 4', text)
+        self.assertIn('batch_size_bucket{le="+Inf"} 5', text)
+        self.assertIn("batch_size_sum 107", text)
+
+    def test_stage_timer_can_be_disabled(self):
+        metrics.STAGE_SECONDS.reset()
+        previous = metrics.enabled
+        try:
+            metrics.enabled = False
+            with metrics.stage_timer("tokenize"):
+                pass
+            self.assertEqual(metrics.STAGE_SECONDS.snapshot(("tokenize",))[0], 0)
+            metrics.enabled = True
+            with metrics.stage_timer("tokenize"):
+                pass
+            self.assertEqual(metrics.STAGE_SECONDS.snapshot(("tokenize",))[0], 1)
+        finally:
+            metrics.enabled = previous
+
+    def test_process_metrics(self):
+        text = process_metrics()
+        self.assertIn("process_cpu_seconds_total", text)
+        if sys.platform.startswith("linux"):
+            self.assertIn("process_resident_memory_bytes", text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,237 @@
+"""
+Test di ModelManager su un DistilBERT minimo salvato su disco
+"""
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.ai_classification.core.config import INFERENCE_CONFIG
+from src.ai_classification.core.versions import version_paths
+from tests.tiny_model import HAS_TORCH, reference_probabilities, save_model
+
+TEXTS = ["reti neurali", "ricetta della carbonara", "reti neurali reti neurali ricetta", "carbonara"]
+
+
+def retrain(path, seed):
+    """Sovrascrive il modello salvato, come un nuovo training, con date di modifica più recenti"""
+    mtime = max(os.stat(os.path.join(path, name)).st_mtime_ns for name in os.listdir(path))
+    save_model(path, seed=seed)
+    for name in os.listdir(path):
+        os.utime(os.path.join(path, name), ns=(mtime + 10 ** 9, mtime + 10 ** 9))
+
+
+class ModelManagerTestCase(unittest.TestCase):
+    """Versione v1 del modello minimo in una cartella temporanea"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.paths = version_paths(os.path.join(self.tmp.name, "v1"))
+        save_model(self.paths["trained_model"])
+        config = mock.patch.dict(INFERENCE_CONFIG, {
+            "backend": "torch", "quantization": None, "use_snapshot": True, "mmap_weights": True,
+        })
+        config.start()
+        self.addCleanup(config.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def load(self, **settings):
+        from src.ai_classification.core.model_utils import ModelManager
+
+        manager = ModelManager(self.paths)
+        manager.device = manager.default_device("torch")
+        for name, value in settings.items():
+            setattr(manager, name, value)
+        self.assertTrue(manager.load_or_create_model())
+        return manager
+
+
+@unittest.skipUnless(HAS_TORCH, "torch, transformers e tokenizers sono necessari")
+class TestSnapshotVersioning(ModelManagerTestCase):
+    """Lo snapshot segue la versione del modello salvato"""
+
+    def test_stale_snapshot_is_rebuilt_after_retraining(self):
+        """Dopo un nuovo training lo snapshot obsoleto è ignorato e poi riscritto"""
+        from src.ai_classification.core.snapshot import read_snapshot_version
+
+        first = self.load()
+        self.assertFalse(first.weights_mmapped)
+        self.assertEqual(read_snapshot_version(self.paths["snapshot"]), first.model_version)
+        mapped = self.load()
+        self.assertTrue(mapped.weights_mmapped)
+        self.assertEqual(mapped.model_version, first.model_version)
+
+        retrain(self.paths["trained_model"], seed=1)
+        retrained = self.load()
+        self.assertNotEqual(retrained.model_version, first.model_version)
+        # Lo snapshot obsoleto non viene mappato: i pesi sono quelli nuovi
+        self.assertFalse(retrained.weights_mmapped)
+        probabilities = retrained.predict_batch(TEXTS, return_probabilities=True)[2]
+        np.testing.assert_allclose(probabilities, reference_probabilities(self.paths["trained_model"], TEXTS),
+                                   atol=1e-6)
+        self.assertEqual(read_snapshot_version(self.paths["snapshot"]), retrained.model_version)
+
+        remapped = self.load()
+        self.assertTrue(remapped.weights_mmapped)
+        self.assertEqual(remapped.model_version, retrained.model_version)
+        np.testing.assert_allclose(remapped.predict_batch(TEXTS, return_probabilities=True)[2], probabilities,
+                                   atol=1e-6)
+
+
+@unittest.skipUnless(HAS_TORCH, "torch, transformers e tokenizers sono necessari")
+class TestQuantizedArtifact(ModelManagerTestCase):
+    """model_int8.pt è riusato finché corrisponde al modello addestrato"""
+
+    def load_quantized(self):
+        """Carica il modello int8 contando le quantizzazioni eseguite"""
+        import torch
+
+        with mock.patch("torch.ao.quantization.quantize_dynamic",
+                        wraps=torch.ao.quantization.quantize_dynamic) as quantize:
+            manager = self.load(quantization="dynamic_int8")
+        return manager, quantize.call_count
+
+    def artifact_version(self):
+        import torch
+
+        return torch.load(self.paths["quantized_model"], map_location="cpu", weights_only=False)["model_version"]
+
+    def test_artifact_reused_then_rebuilt_after_retraining(self):
+        """Secondo avvio senza quantizzazione; dopo un nuovo training l'artefatto è rifatto"""
+        first, quantized = self.load_quantized()
+        self.assertEqual(quantized, 1)
+        self.assertTrue(first.model_version.endswith(":int8"))
+        self.assertTrue(os.path.exists(self.paths["quantized_model"]))
+        self.assertEqual(f"{self.artifact_version()}:int8", first.model_version)
+        expected = first.predict_batch(TEXTS, return_probabilities=True)[2]
+
+        reused, quantized = self.load_quantized()
+        self.assertEqual(quantized, 0)
+        self.assertEqual(reused.model_version, first.model_version)
+        np.testing.assert_allclose(reused.predict_batch(TEXTS, return_probabilities=True)[2], expected,
+                                   atol=1e-6)
+
+        retrain(self.paths["trained_model"], seed=1)
+        retrained, quantized = self.load_quantized()
+        self.assertEqual(quantized, 1)
+        self.assertTrue(retrained.model_version.endswith(":int8"))
+        self.assertNotEqual(retrained.model_version, first.model_version)
+        self.assertEqual(f"{self.artifact_version()}:int8", retrained.model_version)
+
+    def test_unwritable_or_corrupt_artifact_is_not_fatal(self):
+        """Un salvataggio fallito o un file illeggibile portano solo a una nuova quantizzazione"""
+        with mock.patch("torch.save", side_effect=OSError("disco pieno")):
+            manager, quantized = self.load_quantized()
+        self.assertEqual(quantized, 1)
+        self.assertTrue(manager.model_version.endswith(":int8"))
+        self.assertFalse(os.path.exists(f"{self.paths['quantized_model']}.tmp"))
+        self.assertFalse(os.path.exists(self.paths["quantized_model"]))
+
+        with open(self.paths["quantized_model"], "wb") as f:
+            f.write(b"non un modello")
+        manager, quantized = self.load_quantized()
+        self.assertEqual(quantized, 1)
+        self.assertEqual(f"{self.artifact_version()}:int8", manager.model_version)
+
+
+@unittest.skipUnless(HAS_TORCH, "torch, transformers e tokenizers sono necessari")
+class TestBatchPrediction(ModelManagerTestCase):
+    """predict_batch e predict_records restituiscono i risultati nell'ordine dei testi"""
+
+    TEXTS = ["ricetta", "reti neurali " * 30, "carbonara reti", "neurali " * 5, "reti neurali ricetta carbonara"]
+
+    def classifier(self):
+        from src.ai_classification.core.classifier import AITextClassifier
+
+        classifier = AITextClassifier(auto_train=False, model_paths=self.paths)
+        self.assertTrue(classifier.is_trained)
+        return classifier
+
+    def test_predict_batch_preserves_order(self):
+        """Probabilità, classi e confidenze allineate ai testi anche con il bucketing per lunghezza"""
+        manager = self.load()
+        expected = reference_probabilities(self.paths["trained_model"], self.TEXTS)
+        classes, confidences, probabilities = manager.predict_batch(self.TEXTS, return_probabilities=True)
+
+        np.testing.assert_allclose(probabilities, expected, atol=1e-6)
+        self.assertEqual(classes.tolist(), expected.argmax(axis=-1).tolist())
+        np.testing.assert_allclose(confidences, expected.max(axis=-1), atol=1e-6)
+
+    def test_invalid_items_get_fallback(self):
+        """Testi vuoti o non stringhe ricevono ALTRO senza interrompere il batch"""
+        from src.ai_classification.core.results import FALLBACK_PREDICTION
+
+        classifier = self.classifier()
+        expected = classifier.predict_records(self.TEXTS)
+        records = classifier.predict_records(
+            [self.TEXTS[0], "", None, self.TEXTS[1], "   ", 5, self.TEXTS[2]]
+        )
+        self.assertEqual(records[1:3] + records[4:6], [FALLBACK_PREDICTION] * 4)
+        for record, reference in zip([records[0], records[3], records[6]], expected[:3]):
+            self.assertEqual(record.class_id, reference.class_id)
+            self.assertAlmostEqual(record.confidence, reference.confidence, places=5)
+
+    def test_failing_batch_falls_back_to_single_predictions(self):
+        """Se il batch fallisce ogni testo è predetto da solo; gli errori restano isolati"""
+        from src.ai_classification.core.results import FALLBACK_PREDICTION
+
+        classifier = self.classifier()
+        classifier.cache = None
+        expected = classifier.predict_records(self.TEXTS)
+        predict_batch = classifier.model_manager.predict_batch
+
+        def fragile_predict_batch(texts, **kwargs):
+            if len(texts) > 1 or texts[0] == self.TEXTS[2]:
+                raise RuntimeError("batch non valido")
+            return predict_batch(texts, **kwargs)
+
+        with mock.patch.object(classifier.model_manager, "predict_batch", side_effect=fragile_predict_batch):
+            records = classifier.predict_records(self.TEXTS)
+
+        self.assertEqual(records[2], FALLBACK_PREDICTION)
+        for i in (0, 1, 3, 4):
+            self.assertEqual(records[i].class_id, expected[i].class_id)
+            self.assertAlmostEqual(records[i].confidence, expected[i].confidence, places=5)
+
+
+@unittest.skipUnless(HAS_TORCH, "torch, transformers e tokenizers sono necessari")
+class TestLengthBucketing(ModelManagerTestCase):
+    """Il bucketing per lunghezza cambia solo la composizione dei batch, non i risultati"""
+
+    def test_bucketed_matches_unbucketed(self):
+        """Testi brevi e lunghi mescolati: stessi risultati nello stesso ordine, con più forward pass"""
+        manager = self.load()
+        texts = [
+            ("reti neurali " * (1 + (i * 7) % 40) if i % 3 else "carbonara ricetta " * (i % 4 + 1)).strip()
+            for i in range(24)
+        ]
+
+        with mock.patch.object(manager, "_predict_probabilities",
+                               wraps=manager._predict_probabilities) as forward:
+            bucketed = manager.predict_batch(texts, length_bucketing=True, max_tokens_per_batch=128,
+                                             return_probabilities=True)
+        self.assertGreater(forward.call_count, 1)
+        # Budget rispettato: nessun batch supera 128 token con il padding
+        for call in forward.call_args_list:
+            input_ids = call.args[0]["input_ids"]
+            self.assertLessEqual(len(input_ids) * max(len(ids) for ids in input_ids), 128)
+
+        unbucketed = manager.predict_batch(texts, batch_size=len(texts), length_bucketing=False,
+                                           return_probabilities=True)
+        self.assertEqual(bucketed[0].tolist(), unbucketed[0].tolist())
+        np.testing.assert_allclose(bucketed[1], unbucketed[1], atol=1e-5)
+        np.testing.assert_allclose(bucketed[2], unbucketed[2], atol=1e-5)
+        np.testing.assert_allclose(bucketed[2], reference_probabilities(self.paths["trained_model"], texts),
+                                   atol=1e-5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+"""
+Test unitari per la lettura incrementale di NDJSON
+"""
+import json
+import unittest
+import sys
+import os
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.ai_classification.api.ndjson import encode_lines, iter_batches, iter_lines, parse_item
+
+
+async def chunked(data: bytes, size: int):
+    """Simula il body di una richiesta letto a blocchi di size byte"""
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+class TestNDJSON(unittest.IsolatedAsyncioTestCase):
+    """Test per il parsing NDJSON in streaming"""
+
+    async def test_lines_split_across_chunks(self):
+        """Le righe spezzate tra blocchi vengono ricomposte e le righe vuote saltate"""
+        data = b'"primo"\n\n"secondo"\n"terzo"'
+        lines = [line async for line in iter_lines(chunked(data, 3))]
+        self.assertEqual(lines, [b'"primo"', b'"secondo"', b'"terzo"'])
+
+    async def test_long_line_in_small_chunks(self):
+        """Una riga lunga arrivata a blocchi di un byte viene ricomposta intera"""
+        long_line = json.dumps("reti neurali " * 2000).encode("utf-8")
+        data = long_line + b"\n" + b'"breve"\n'
+        lines = [line async for line in iter_lines(chunked(data, 1))]
+        self.assertEqual(lines, [long_line, b'"breve"'])
+
+    async def test_batches_preserve_order_and_ids(self):
+        """I batch rispettano la dimensione e l'ordine; senza id si usa la posizione"""
+        data = encode_lines(["a", {"id": "x", "text": "b"}, "c", "d", "e"])
+        batches = [batch async for batch in iter_batches(chunked(data, 4), batch_size=2)]
+
+        self.assertEqual([len(batch) for batch in batches], [2, 2, 1])
+        items = [item for batch in batches for item in batch]
+        self.assertEqual([(i, text) for i, text, _ in items],
+                         [(0, "a"), ("x", "b"), (2, "c"), (3, "d"), (4, "e")])
+
+    def test_invalid_lines(self):
+        """Le righe non valide producono un errore senza testo"""
+        for line in (b"{non json", b"42", b'{"id": 1}'):
+            item_id, text, error = parse_item(line, 7)
+            self.assertEqual(item_id, 7)
+            self.assertIsNone(text)
+            self.assertIsNotNone(error)
+
+    def test_encode_lines(self):
+        """Ogni oggetto diventa una riga JSON UTF-8"""
+        data = encode_lines([{"category": "Età"}, {"id": 2}])
+        self.assertEqual([json.loads(line) for line in data.splitlines()],
+                         [{"category": "Età"}, {"id": 2}])
+
+
+if __name__ == "__main__":
+    unittest.main()
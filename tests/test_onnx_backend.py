@@ -0,0 +1,154 @@
+"""
+Test di parità tra backend torch e backend ONNX Runtime
+"""
+import importlib.util
+import json
+import subprocess
+import tempfile
+import unittest
+import sys
+import os
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.ai_classification.core.config import MODEL_PATHS
+
+HAS_ONNX = all(
+    importlib.util.find_spec(name) is not None for name in ("torch", "onnx", "onnxruntime")
+)
+HAS_TOKENIZERS = importlib.util.find_spec("tokenizers") is not None
+HAS_TRANSFORMERS = importlib.util.find_spec("transformers") is not None
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def save_tokenizer(path):
+    """Salva un tokenizer WordPiece minimo (tokenizer.json e tokenizer_config.json)"""
+    from tokenizers import Tokenizer, models, normalizers, pre_tokenizers, processors
+
+    words = "reti neurali per il riconoscimento di immagini ricetta della carbonara".split()
+    tokens = ["[PAD]", "[UNK]", "[CLS]", "[SEP]"] + words
+    tokens += [chr(c) for c in range(97, 123)] + ["##" + chr(c) for c in range(97, 123)]
+    tokenizer = Tokenizer(models.WordPiece({t: i for i, t in enumerate(tokens)}, unk_token="[UNK]"))
+    tokenizer.normalizer = normalizers.BertNormalizer(lowercase=True)
+    tokenizer.pre_tokenizer = pre_tokenizers.BertPreTokenizer()
+    tokenizer.post_processor = processors.TemplateProcessing(
+        single="[CLS] $A [SEP]", special_tokens=[("[CLS]", 2), ("[SEP]", 3)]
+    )
+    tokenizer.save(os.path.join(path, "tokenizer.json"))
+    with open(os.path.join(path, "tokenizer_config.json"), "w", encoding="utf-8") as f:
+        json.dump({"pad_token": "[PAD]", "unk_token": "[UNK]", "cls_token": "[CLS]",
+                   "sep_token": "[SEP]"}, f)
+
+
+@unittest.skipUnless(HAS_TOKENIZERS, "tokenizers è necessario")
+class TestOnnxServingPath(unittest.TestCase):
+    """Il percorso di inferenza ONNX non importa torch"""
+
+    TEXTS = ["Reti neurali per il riconoscimento di immagini", "Ricetta della carbonara " * 20, ""]
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        save_tokenizer(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_torch_not_imported(self):
+        """Server, ModelManager ONNX e FastTokenizer funzionano senza caricare torch"""
+        code = f"""
+import sys
+sys.path.insert(0, {PROJECT_ROOT!r})
+from src.ai_classification.api import server
+from src.ai_classification.core.config import INFERENCE_CONFIG
+from src.ai_classification.core.model_utils import ModelManager
+from src.ai_classification.core.onnx_backend import FastTokenizer, OnnxBackend
+
+INFERENCE_CONFIG["backend"] = "onnx"
+manager = ModelManager()
+manager.tokenizer = FastTokenizer.from_pretrained({self.tmp.name!r})
+inputs = manager.tokenizer.pad(manager.tokenizer({self.TEXTS!r}, truncation=True, max_length=16))
+assert inputs["input_ids"].shape == (3, 16), inputs["input_ids"].shape
+assert manager.device == "cpu"
+manager.get_memory_usage()
+manager.cleanup()
+assert "torch" not in sys.modules, "torch importato"
+"""
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+    @unittest.skipUnless(HAS_TRANSFORMERS, "transformers è necessario per il confronto")
+    def test_same_encodings_as_transformers(self):
+        """FastTokenizer produce gli stessi input del tokenizer fast di transformers"""
+        from transformers import PreTrainedTokenizerFast
+        from src.ai_classification.core.onnx_backend import FastTokenizer
+
+        expected_tokenizer = PreTrainedTokenizerFast(
+            tokenizer_file=os.path.join(self.tmp.name, "tokenizer.json"), pad_token="[PAD]"
+        )
+        tokenizer = FastTokenizer.from_pretrained(self.tmp.name)
+
+        expected = expected_tokenizer(self.TEXTS, truncation=True, max_length=16)
+        encodings = tokenizer(self.TEXTS, truncation=True, max_length=16)
+        self.assertEqual(encodings["input_ids"], expected["input_ids"])
+        self.assertEqual(encodings["attention_mask"], expected["attention_mask"])
+
+        expected_inputs = expected_tokenizer.pad(dict(expected), padding=True, return_tensors="np")
+        inputs = tokenizer.pad(encodings, padding=True, return_tensors="np")
+        for name in ("input_ids", "attention_mask"):
+            self.assertEqual(inputs[name].tolist(), expected_inputs[name].tolist())
+
+
+@unittest.skipUnless(HAS_ONNX, "torch, onnx e onnxruntime sono necessari")
+@unittest.skipUnless(os.path.exists(MODEL_PATHS["trained_model"]), "modello addestrato non presente")
+class TestOnnxParity(unittest.TestCase):
+    """Il backend ONNX restituisce le stesse predizioni del backend torch"""
+
+    TEXTS = [
+        "GPT-4 è un modello di linguaggio generativo",
+        "Ricetta della pasta alla carbonara",
+        "Veicoli a guida autonoma con sensori LiDAR",
+        "Diagnosi medica assistita da intelligenza artificiale per l'analisi "
+        "di immagini radiologiche e la scoperta di nuovi farmaci",
+    ]
+
+    @classmethod
+    def setUpClass(cls):
+        import torch
+        from src.ai_classification.core.model_utils import ModelManager
+
+        cls.torch_manager = ModelManager()
+        cls.torch_manager.device = torch.device("cpu")
+        cls.torch_manager.backend = "torch"
+        cls.torch_manager.quantization = None
+        cls.torch_manager.load_or_create_model()
+
+        cls.onnx_manager = ModelManager()
+        cls.onnx_manager.backend = "onnx"
+        cls.onnx_manager.load_or_create_model()
+
+    def test_backend_loaded(self):
+        """Il manager ONNX non carica il modello torch"""
+        self.assertIsNotNone(self.onnx_manager.onnx_backend)
+        self.assertIsNone(self.onnx_manager.model)
+
+    def test_same_predictions(self):
+        """Classi identiche e confidenze numericamente equivalenti"""
+        torch_classes, torch_conf = self.torch_manager.predict_batch(self.TEXTS)
+        onnx_classes, onnx_conf = self.onnx_manager.predict_batch(self.TEXTS)
+
+        self.assertEqual(torch_classes.tolist(), onnx_classes.tolist())
+        for expected, actual in zip(torch_conf, onnx_conf):
+            self.assertAlmostEqual(float(expected), float(actual), places=4)
+
+    def test_dynamic_batch_sizes(self):
+        """Il grafo esportato accetta batch e lunghezze diverse da quelle di esportazione"""
+        for batch_size in (1, 3):
+            classes, confidences = self.onnx_manager.predict_batch(self.TEXTS, batch_size=batch_size)
+            self.assertEqual(len(classes), len(self.TEXTS))
+            self.assertTrue(((confidences >= 0) & (confidences <= 1)).all())
+
+
+if __name__ == "__main__":
+    unittest.main()
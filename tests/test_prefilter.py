@@ -0,0 +1,71 @@
+"""
+Test unitari per il pre-filtro ALTRO su n-grammi hashati
+"""
+import os
+import tempfile
+import unittest
+import sys
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from src.ai_classification.core.prefilter import HashedNgramFilter
+
+ALTRO = [
+    "Ricetta della pizza margherita", "Risultati del campionato di calcio",
+    "Vacanze al mare in Sardegna", "Corso di chitarra per principianti",
+    "Torta al cioccolato della nonna", "Partita di tennis a Wimbledon",
+    "Viaggio in montagna sulle Dolomiti", "Ricetta della pasta al pesto",
+]
+AI = [
+    "Reti neurali per il riconoscimento di immagini", "ChatGPT genera testi",
+    "Machine learning per la diagnosi medica", "Robot industriali con intelligenza artificiale",
+    "Auto a guida autonoma con LiDAR", "Data science con Python e machine learning",
+    "Deep learning e reti neurali transformer", "Algoritmi di intelligenza artificiale",
+]
+
+
+class TestHashedNgramFilter(unittest.TestCase):
+    """Test per training, filtro e serializzazione"""
+
+    def setUp(self):
+        self.prefilter = HashedNgramFilter(num_buckets=2 ** 14, threshold=0.6)
+        self.prefilter.train(ALTRO + AI, [True] * len(ALTRO) + [False] * len(AI))
+
+    def test_separates_training_data(self):
+        """Dopo il training i testi ALTRO hanno probabilità più alta dei testi AI"""
+        probabilities = self.prefilter.predict_proba(ALTRO + AI)
+        self.assertGreater(probabilities[:len(ALTRO)].min(), probabilities[len(ALTRO):].max())
+
+    def test_filter_and_stats(self):
+        """Solo i testi sopra soglia vengono filtrati e conteggiati"""
+        mask, probabilities = self.prefilter.filter(["Ricetta della pizza al pesto", "Reti neurali e machine learning"])
+        np.testing.assert_array_equal(mask, probabilities >= 0.6)
+        self.assertFalse(mask[1])
+
+        stats = self.prefilter.get_stats()
+        self.assertEqual(stats["total"], 2)
+        self.assertEqual(stats["short_circuited"], int(mask.sum()))
+
+    def test_untrained_filters_nothing(self):
+        """Un filtro non addestrato lascia passare tutto al modello"""
+        mask, _ = HashedNgramFilter(num_buckets=2 ** 10).filter(ALTRO)
+        self.assertFalse(mask.any())
+
+    def test_save_and_load(self):
+        """Il filtro ricaricato produce le stesse probabilità"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "prefilter.npz")
+            self.prefilter.save(path)
+            loaded = HashedNgramFilter.load(path, threshold=0.6)
+        np.testing.assert_allclose(loaded.predict_proba(ALTRO + AI), self.prefilter.predict_proba(ALTRO + AI), rtol=1e-5)
+
+    def test_invalid_buckets(self):
+        with self.assertRaises(ValueError):
+            HashedNgramFilter(num_buckets=1000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+"""
+Test della profilazione su richiesta
+"""
+import json
+import os
+import pstats
+import sys
+import tempfile
+import unittest
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.ai_classification.core.profiling import RequestProfiler
+
+
+def work():
+    return sum(i * i for i in range(1000))
+
+
+class TestRequestProfiler(unittest.TestCase):
+    """Selezione delle chiamate e file scritti"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.profiler = RequestProfiler(self.tmp.name, max_profiles=10)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def call(self, batch_size=2):
+        with self.profiler.capture(batch_size=batch_size) as capture:
+            if capture is not None:
+                capture.annotate(tokens=17)
+            work()
+        return capture
+
+    def test_disarmed_by_default(self):
+        self.assertIsNone(self.call())
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+    def test_next_calls_then_disarm(self):
+        self.profiler.arm("cprofile", next_calls=2)
+        self.assertIsNotNone(self.call())
+        self.assertIsNotNone(self.call(batch_size=5))
+        self.assertIsNone(self.call())
+        self.assertFalse(self.profiler.armed)
+
+        profiles = self.profiler.list_profiles()
+        self.assertEqual([p["batch_size"] for p in profiles], [5, 2])
+        self.assertEqual(profiles[0]["tokens"], 17)
+        self.assertGreater(profiles[0]["duration_ms"], 0)
+        # Il file .prof è leggibile con pstats
+        stats = pstats.Stats(os.path.join(self.tmp.name, profiles[0]["profile"]))
+        self.assertTrue(any(func[2] == "work" for func in stats.stats))
+
+    def test_sample_rate_and_max_profiles(self):
+        self.profiler.max_profiles = 3
+        self.profiler.arm("cprofile", sample_rate=1.0)
+        for _ in range(5):
+            self.call()
+        self.assertEqual(len(self.profiler.list_profiles()), 3)
+        self.assertFalse(self.profiler.armed)
+
+    def test_torch_trace(self):
+        self.profiler.arm("torch", next_calls=1)
+        self.call()
+        profile = self.profiler.list_profiles()[0]
+        self.assertTrue(profile["profile"].endswith(".trace.json"))
+        with open(os.path.join(self.tmp.name, profile["profile"])) as f:
+            self.assertIn("traceEvents", json.load(f))
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            self.profiler.arm("perf", next_calls=1)
+        with self.assertRaises(ValueError):
+            self.profiler.arm("cprofile")
+        with self.assertRaises(ValueError):
+            self.profiler.arm("cprofile", sample_rate=2.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
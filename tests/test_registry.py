@@ -0,0 +1,85 @@
+"""
+Test del registro dei classificatori condivisi
+"""
+import threading
+import time
+import unittest
+import sys
+import os
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.ai_classification.core.registry import ClassifierRegistry
+
+
+class FakeClassifier:
+    """Tiene traccia dei rilasci al posto di un AITextClassifier"""
+
+    def __init__(self):
+        self.released = False
+
+    def close_worker_pool(self):
+        pass
+
+    def cleanup(self):
+        self.released = True
+
+
+class TestClassifierRegistry(unittest.TestCase):
+    """Un'istanza per chiave, caricata una volta e rilasciata se inattiva"""
+
+    def test_same_instance_per_key(self):
+        registry = ClassifierRegistry()
+        first = registry.get(("model", "cpu"), FakeClassifier)
+        self.assertIs(registry.get(("model", "cpu"), FakeClassifier), first)
+        self.assertIsNot(registry.get(("model", "cuda"), FakeClassifier), first)
+        self.assertEqual(registry.get_stats()["loads"], 2)
+        self.assertEqual(registry.get_stats()["hits"], 1)
+
+    def test_concurrent_load_calls_factory_once(self):
+        """Richieste concorrenti per la stessa chiave attendono un unico caricamento"""
+        registry = ClassifierRegistry()
+        calls = []
+
+        def slow_factory():
+            calls.append(1)
+            time.sleep(0.05)
+            return FakeClassifier()
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(registry.get("model", slow_factory)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(result is results[0] for result in results))
+
+    def test_unload_idle(self):
+        """Le istanze inattive sono rilasciate e ricaricate alla richiesta successiva"""
+        registry = ClassifierRegistry(idle_timeout=0.05)
+        first = registry.get("model", FakeClassifier)
+        deadline = time.monotonic() + 2
+        while not first.released and time.monotonic() < deadline:
+            time.sleep(0.02)
+        registry.close()
+
+        self.assertTrue(first.released)
+        self.assertEqual(registry.get_stats()["loaded"], 0)
+        self.assertIsNot(registry.get("model", FakeClassifier), first)
+
+    def test_unload(self):
+        registry = ClassifierRegistry()
+        instance = registry.get("model", FakeClassifier)
+        registry.unload("model")
+        self.assertTrue(instance.released)
+        self.assertEqual(registry.get_stats()["unloads"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+"""
+Test unitari per le tabelle di lookup delle categorie e il record Prediction
+"""
+import unittest
+import sys
+import os
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from src.ai_classification.core.config import CATEGORIES, CATEGORY_IDS, CATEGORY_NAMES
+from src.ai_classification.core.results import FALLBACK_PREDICTION, Prediction, top_k_probabilities
+
+
+class TestPrediction(unittest.TestCase):
+    """Test per CATEGORY_NAMES/CATEGORY_IDS e Prediction"""
+
+    def test_lookup_tables(self):
+        """Le tabelle sono coerenti con CATEGORIES in entrambe le direzioni"""
+        self.assertEqual(len(CATEGORY_NAMES), len(CATEGORIES))
+        for class_id, name in CATEGORIES.items():
+            self.assertEqual(CATEGORY_NAMES[class_id], name)
+            self.assertEqual(CATEGORY_IDS[name], class_id)
+
+    def test_from_class(self):
+        """Il record contiene indice, nome e confidenza"""
+        prediction = Prediction.from_class(3, 0.75)
+        self.assertEqual(prediction[:3], (3, CATEGORIES[3], 0.75))
+        self.assertEqual(prediction.to_dict(), {"prediction": 3, "category": CATEGORIES[3], "confidence": 0.75})
+
+    def test_probabilities_in_dict(self):
+        """Le probabilità compaiono nel JSON solo se presenti"""
+        prediction = Prediction.from_class(1, 0.6, [0.4, 0.6])
+        self.assertEqual(prediction.to_dict()["probabilities"], [0.4, 0.6])
+        self.assertEqual(FALLBACK_PREDICTION.category, "ALTRO")
+        self.assertNotIn("probabilities", FALLBACK_PREDICTION.to_dict())
+
+
+    def test_top_k(self):
+        """Top-k ordinato per probabilità decrescente su tutta la matrice"""
+        probabilities = np.array([[0.1, 0.6, 0.3], [0.5, 0.2, 0.3]], dtype=np.float32)
+        indices, values = top_k_probabilities(probabilities, 2)
+        np.testing.assert_array_equal(indices, [[1, 2], [0, 2]])
+        np.testing.assert_allclose(values, [[0.6, 0.3], [0.5, 0.3]])
+
+        # k oltre il numero di classi e matrice vuota
+        self.assertEqual(top_k_probabilities(probabilities, 10)[0].shape, (2, 3))
+        self.assertEqual(top_k_probabilities(np.empty((0, 3), dtype=np.float32), 2)[0].shape, (0, 2))
+
+        prediction = Prediction.from_class(1, 0.6, top_k=(indices[0], values[0]))
+        self.assertEqual([entry["prediction"] for entry in prediction.to_dict()["top_k"]], [1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+"""
+Test dello snapshot del modello: salvataggio, caricamento via mmap e header non validi
+"""
+import json
+import os
+import struct
+import sys
+import tempfile
+import unittest
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.tiny_model import HAS_TORCH, reference_probabilities, save_model
+
+
+def write_safetensors(path, header, data: bytes):
+    """Scrive un file safetensors con l'header indicato così com'è"""
+    encoded = json.dumps(header).encode("utf-8")
+    encoded += b" " * (-len(encoded) % 8)
+    with open(path, "wb") as f:
+        f.write(struct.pack("<Q", len(encoded)))
+        f.write(encoded)
+        f.write(data)
+
+
+@unittest.skipUnless(HAS_TORCH, "torch, transformers e tokenizers sono necessari")
+class TestSnapshot(unittest.TestCase):
+    """Lo snapshot si ricarica identico con i pesi mappati dal file"""
+
+    TEXTS = ["reti neurali", "ricetta della carbonara", "reti neurali reti neurali ricetta"]
+
+    def setUp(self):
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+        from src.ai_classification.core.snapshot import save_snapshot
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.model_path = os.path.join(self.tmp.name, "model")
+        self.snapshot_path = os.path.join(self.tmp.name, "snapshot")
+        save_model(self.model_path)
+        save_snapshot(AutoModelForSequenceClassification.from_pretrained(self.model_path),
+                      AutoTokenizer.from_pretrained(self.model_path), self.snapshot_path, "trained:1")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def probabilities(self, model, tokenizer):
+        import torch
+
+        inputs = tokenizer(self.TEXTS, padding=True, return_tensors="pt")
+        with torch.no_grad():
+            return torch.softmax(model(**inputs).logits, dim=-1).numpy()
+
+    def test_round_trip_matches_from_pretrained(self):
+        """Snapshot mappato e from_pretrained danno le stesse probabilità"""
+        from src.ai_classification.core.snapshot import load_snapshot, read_snapshot_version
+
+        self.assertEqual(read_snapshot_version(self.snapshot_path), "trained:1")
+        expected = reference_probabilities(self.model_path, self.TEXTS)
+        for mmap_weights in (True, False):
+            model, tokenizer = load_snapshot(self.snapshot_path, "cpu", mmap_weights)
+            self.assertEqual(self.probabilities(model, tokenizer).tolist(), expected.tolist())
+
+    def test_parameters_are_views_on_the_mapped_file(self):
+        """Con mmap i parametri condividono la mappatura dell'intero file, senza copie"""
+        from src.ai_classification.core.snapshot import SNAPSHOT_WEIGHTS, load_snapshot
+
+        model, _ = load_snapshot(self.snapshot_path, "cpu", mmap_weights=True)
+        file_size = os.path.getsize(os.path.join(self.snapshot_path, SNAPSHOT_WEIGHTS))
+        storages = {tensor.untyped_storage().data_ptr() for tensor in model.state_dict().values()}
+        self.assertEqual(len(storages), 1)
+        for name, parameter in model.named_parameters():
+            self.assertEqual(parameter.untyped_storage().nbytes(), file_size, name)
+
+        copied, _ = load_snapshot(self.snapshot_path, "cpu", mmap_weights=False)
+        self.assertNotEqual(copied.classifier.weight.untyped_storage().nbytes(), file_size)
+
+    def test_invalid_header_raises(self):
+        """Tipo sconosciuto e offset incoerenti sollevano ValueError invece di dare tensori errati"""
+        from src.ai_classification.core.snapshot import mmap_load_safetensors
+
+        data = bytes(16)
+        cases = {
+            "tipo": {"w": {"dtype": "F8_E4M3", "shape": [4], "data_offsets": [0, 4]}},
+            "offset oltre il file": {"w": {"dtype": "F32", "shape": [4], "data_offsets": [8, 24]}},
+            "offset e forma incoerenti": {"w": {"dtype": "F32", "shape": [2, 2], "data_offsets": [0, 8]}},
+            "offset invertiti": {"w": {"dtype": "F32", "shape": [0], "data_offsets": [8, 0]}},
+        }
+        for case, header in cases.items():
+            with self.subTest(case):
+                path = os.path.join(self.tmp.name, "bad.safetensors")
+                write_safetensors(path, header, data)
+                with self.assertRaises(ValueError):
+                    mmap_load_safetensors(path)
+
+        write_safetensors(path, {"w": {"dtype": "F32", "shape": [2, 2], "data_offsets": [0, 16]}}, data)
+        self.assertEqual(mmap_load_safetensors(path)["w"].shape, (2, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+"""
+Test delle cartelle di modello versionate
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.ai_classification.core.versions import (
+    list_versions, publish_version, read_current_version, set_current_version, version_dir, version_paths
+)
+
+
+class TestModelVersions(unittest.TestCase):
+    """Pubblicazione, attivazione e percorsi delle versioni"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.model = os.path.join(self.root, "model")
+        self.tokenizer = os.path.join(self.root, "tokenizer")
+        self.versions = os.path.join(self.root, "versions")
+        for path, name in ((self.model, "config.json"), (self.tokenizer, "tokenizer.json")):
+            os.makedirs(path)
+            with open(os.path.join(path, name), "w") as f:
+                f.write("{}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def publish(self, version, activate=False):
+        return publish_version(self.model, self.tokenizer, version, self.versions, activate=activate)
+
+    def test_publish_and_activate(self):
+        self.assertIsNone(read_current_version(self.versions))
+        self.publish("v1", activate=True)
+        self.publish("v2")
+
+        self.assertEqual(list_versions(self.versions), ["v1", "v2"])
+        self.assertEqual(read_current_version(self.versions), "v1")
+        set_current_version("v2", self.versions)
+        self.assertEqual(read_current_version(self.versions), "v2")
+
+        model_dir = version_paths(version_dir("v2", self.versions))["trained_model"]
+        self.assertEqual(sorted(os.listdir(model_dir)), ["config.json", "tokenizer.json"])
+
+    def test_invalid_versions(self):
+        self.publish("v1")
+        with self.assertRaises(ValueError):
+            self.publish("v1")
+        with self.assertRaises(ValueError):
+            self.publish("../fuori")
+        with self.assertRaises(ValueError):
+            set_current_version("mancante", self.versions)
+
+    def test_artifacts_stay_inside_version(self):
+        """Gli artefatti derivati non toccano la cartella del modello né le altre versioni"""
+        paths = version_paths(os.path.join(self.versions, "v1"))
+        for key in ("snapshot", "quantized_model", "onnx_model", "prefilter", "cascade_head"):
+            self.assertEqual(os.path.dirname(paths[key]), os.path.join(self.versions, "v1"))
+            self.assertNotEqual(os.path.dirname(paths[key]), paths["trained_model"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+"""
+Test unitari per il formato binario delle risposte batch
+"""
+import struct
+import unittest
+import sys
+import os
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.ai_classification.api.wire import BINARY_MEDIA_TYPE, accepts_binary, decode_batch, encode_batch
+
+
+class TestWireFormat(unittest.TestCase):
+    """Test per encode_batch/decode_batch"""
+
+    def test_round_trip(self):
+        """Id e classi sono esatti, le confidenze hanno precisione float32"""
+        ids, classes, confidences = [0, 1, 2], [7, 0, 3], [0.91, 0.5, 0.123456789]
+        data = encode_batch(ids, classes, confidences)
+
+        self.assertEqual(len(data), 12 + 9 * 3)
+        decoded_ids, decoded_classes, decoded_confidences = decode_batch(data)
+        self.assertEqual((decoded_ids, decoded_classes), (ids, classes))
+        for expected, value in zip(confidences, decoded_confidences):
+            self.assertAlmostEqual(expected, value, places=6)
+
+    def test_empty_batch(self):
+        """Un batch vuoto contiene solo l'header"""
+        self.assertEqual(decode_batch(encode_batch([], [], [])), ([], [], []))
+
+    def test_invalid_data(self):
+        """Dati troncati o con header diverso vengono rifiutati"""
+        data = encode_batch([0, 1], [1, 2], [0.5, 0.5])
+        for invalid in (data[:5], data[:-1], b"JSON" + data[4:], struct.pack("<4sB3xI", b"AICB", 9, 0)):
+            with self.assertRaises(ValueError):
+                decode_batch(invalid)
+        with self.assertRaises(ValueError):
+            encode_batch([0], [1, 2], [0.5])
+
+    def test_accept_negotiation(self):
+        """Il formato binario è usato solo se richiesto"""
+        self.assertTrue(accepts_binary(f"{BINARY_MEDIA_TYPE}, application/json;q=0.5"))
+        self.assertFalse(accepts_binary("application/json"))
+        self.assertFalse(accepts_binary(None))
+
+
+if __name__ == "__main__":
+    unittest.main()
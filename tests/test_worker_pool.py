@@ -0,0 +1,63 @@
+"""
+Test del pool di processi con start method "spawn"
+"""
+import tempfile
+import unittest
+import sys
+import os
+from unittest import mock
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.ai_classification.core.versions import version_paths
+from tests.tiny_model import HAS_TORCH, save_model
+
+
+def worker_settings(_):
+    """Impostazioni del ModelManager di un processo worker"""
+    from src.ai_classification.core import worker_pool
+
+    manager = worker_pool._worker_manager
+    return manager.paths["trained_model"], manager.quantization, manager.backend, manager.model_version
+
+
+@unittest.skipUnless(HAS_TORCH, "torch, transformers e tokenizers sono necessari")
+class TestSpawnWorkerPool(unittest.TestCase):
+    """Con "spawn" i worker caricano lo stesso modello del processo padre"""
+
+    TEXTS = ["reti neurali", "ricetta carbonara", "reti", "carbonara neurali reti"]
+
+    def test_workers_use_parent_settings(self):
+        from src.ai_classification.core.model_utils import ModelManager
+        from src.ai_classification.core.worker_pool import InferenceWorkerPool
+
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = version_paths(os.path.join(tmp, "v1"))
+            save_model(paths["trained_model"])
+
+            manager = ModelManager(paths)
+            manager.device = manager.default_device("torch")
+            manager.backend = "torch"
+            manager.quantization = "dynamic_int8"
+            self.assertTrue(manager.load_or_create_model())
+            expected = manager.predict_batch(self.TEXTS)
+
+            with mock.patch("multiprocessing.get_all_start_methods", return_value=["spawn"]):
+                pool = InferenceWorkerPool(manager, num_workers=1)
+            try:
+                # Un worker che non riesce a inizializzarsi viene ricreato all'infinito
+                settings = pool._pool.map_async(worker_settings, [0]).get(timeout=120)[0]
+                self.assertEqual(settings, (paths["trained_model"], "dynamic_int8", "torch",
+                                            manager.model_version))
+
+                classes, confidences = pool.predict_batch(self.TEXTS)
+                self.assertEqual(classes.tolist(), expected[0].tolist())
+                for actual, value in zip(confidences, expected[1]):
+                    self.assertAlmostEqual(float(actual), float(value), places=5)
+            finally:
+                pool._pool.terminate()
+
+
+if __name__ == "__main__":
+    unittest.main()
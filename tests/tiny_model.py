@@ -0,0 +1,57 @@
+"""
+Classificatore DistilBERT minimo salvato su disco, condiviso dai test che caricano un modello
+"""
+import importlib.util
+import os
+import sys
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.ai_classification.core.config import MODEL_CONFIG
+
+HAS_TORCH = all(importlib.util.find_spec(name) is not None for name in ("torch", "transformers", "tokenizers"))
+
+if HAS_TORCH:
+    # Come nel server, torch è importato prima di transformers: pickle cerca
+    # i qscheme dei modelli int8 nei moduli in ordine di import, e i moduli
+    # lazy di transformers falliscono se mancano dipendenze opzionali
+    import torch  # noqa: F401
+
+# Parole del vocabolario: le altre diventano [UNK]
+WORDS = "reti neurali ricetta carbonara".split()
+
+
+def save_model(path, seed: int = 0):
+    """Salva un classificatore DistilBERT minimo con il relativo tokenizer"""
+    import torch
+    from tokenizers import Tokenizer, models, pre_tokenizers, processors
+    from transformers import DistilBertConfig, DistilBertForSequenceClassification, PreTrainedTokenizerFast
+
+    tokens = ["[PAD]", "[UNK]", "[CLS]", "[SEP]"] + WORDS
+    backend = Tokenizer(models.WordLevel({t: i for i, t in enumerate(tokens)}, unk_token="[UNK]"))
+    backend.pre_tokenizer = pre_tokenizers.Whitespace()
+    backend.post_processor = processors.TemplateProcessing(
+        single="[CLS] $A [SEP]", special_tokens=[("[CLS]", 2), ("[SEP]", 3)]
+    )
+    tokenizer = PreTrainedTokenizerFast(tokenizer_object=backend, unk_token="[UNK]", pad_token="[PAD]",
+                                        cls_token="[CLS]", sep_token="[SEP]")
+    torch.manual_seed(seed)
+    config = DistilBertConfig(vocab_size=len(tokens), dim=16, hidden_dim=32, n_layers=2, n_heads=2,
+                              max_position_embeddings=MODEL_CONFIG["max_length"],
+                              num_labels=MODEL_CONFIG["num_labels"])
+    DistilBertForSequenceClassification(config).save_pretrained(path)
+    tokenizer.save_pretrained(path)
+
+
+def reference_probabilities(path, texts):
+    """Probabilità del modello salvato in path caricato con from_pretrained, senza ModelManager"""
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(path)
+    model = AutoModelForSequenceClassification.from_pretrained(path).eval()
+    inputs = tokenizer(list(texts), padding=True, truncation=True, max_length=MODEL_CONFIG["max_length"],
+                       return_tensors="pt")
+    with torch.no_grad():
+        return torch.softmax(model(**inputs).logits, dim=-1).numpy()